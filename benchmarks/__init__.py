@@ -0,0 +1,79 @@
+"""
+Micro-benchmarks run offline against bundled data/forex CSV files. Run from repository root e.g.:
+python -m benchmarks.bench_rolling
+Whole suite, with results saved as JSON for comparison between commits: python -m benchmarks.suite
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+import interface
+
+
+def loadForex(ticker: str = "EURUSD=X", interval: str = "2m", indicators: (list | None) = None) -> pd.DataFrame:
+    """
+    Reads bundled data/forex CSV file (shared by benchmarks and tests)
+    :param indicators: specifications of indicators added with Indicators.compute, e.g. ["Close_sma_20", "Close_rsi"]
+    """
+    data = pd.read_csv(f"data/forex/{interval}/{ticker}.csv", index_col=[0])
+    data.index = pd.to_datetime(data.index, utc=True).tz_convert('Europe/Warsaw')
+    if indicators:
+        import stockPrice
+        data = stockPrice.Indicators(data).compute(indicators).getSP()
+    return data
+
+
+def synthesize(data: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Creates longer stock price of 1m bars by bootstrapping bars of data: every new bar is a random bar of data
+    (Open, High, Low, Close scaled together, so its shape is kept) moved so, that its return from the previous
+    close is the return of the drawn bar (less mean return of data). Bars are placed on consecutive minutes of
+    weekdays (in UTC) from the first date of data, as forex bars.
+    :param data: stock price with Close column
+    :param rows: number of bars
+    :param seed: seed of random generator, the same seed gives the same series
+    """
+    data = data.dropna(subset=["Close"])
+    close = data["Close"].to_numpy(dtype=np.float64)
+    drawn = np.random.default_rng(seed).integers(1, len(close), rows)
+    # trend of data is removed, otherwise it would be compounded over the whole longer series
+    returns = np.log(close[1:] / close[:-1])
+    newClose = close[0] * np.exp(np.cumsum(returns[drawn - 1] - returns.mean()))
+    scale = newClose / close[drawn]
+
+    columns = {}
+    for c in data.columns:
+        values = data[c].to_numpy(dtype=np.float64)[drawn]
+        columns[c] = values if c == "Volume" else values * scale
+
+    minute, start = 60 * 10 ** 9, data.index[0].value
+    minutes = start + np.arange(int(rows * 7 / 5) + 7 * 1440, dtype=np.int64) * minute
+    # 1970-01-01 was Thursday, Monday is 0
+    minutes = minutes[(minutes // (1440 * minute) + 3) % 7 < 5][:rows]
+    return pd.DataFrame(columns, index=interface.Utils.fromUtc(minutes, "Europe/Warsaw", data.index.name))
+
+
+def timings(function, *args, repeat: int = 5) -> list:
+    """
+    Returns wall times (in seconds) of repeat calls of function(*args)
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+
+    return times
+
+
+def measure(function, *args, repeat: int = 5) -> float:
+    """
+    Returns best wall time (in seconds) out of repeat calls of function(*args)
+    """
+    return min(timings(function, *args, repeat=repeat))
+
+
+def report(name: str, seconds: float, baseline: (float | None) = None) -> None:
+    speedUp = f" ({baseline / seconds:.1f}x)" if baseline else ""
+    print(f"{name:<50} {seconds * 1000:>10.2f} ms{speedUp}")
@@ -0,0 +1,54 @@
+"""
+Compares reading three weeks of 5m EURUSD=X from seeded SQLite database: full ticker history trimmed in pandas
+(previous findByTicker + applyDateRange in main.py) vs date bounded StockPriceDb.find, with and without
+(Ticker, Datetime) index.
+"""
+import os
+import tempfile
+
+import pandas as pd
+import sqlalchemy
+
+from benchmarks import measure, report
+from cache import ColumnarStore
+from dataBase import StockPriceDb
+from stockPrice import StockPrice
+
+FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
+
+
+def findLegacy(engine, start, end) -> pd.DataFrame:
+    data = pd.read_sql('SELECT * FROM "5m" WHERE Ticker = \'EURUSD=X\'', con=engine, parse_dates=["Datetime"])
+    data = data.set_index("Datetime")
+    data.index = data.index.tz_localize("Europe/Warsaw")
+    return StockPrice(data).applyDateRange(start, end)
+
+
+def run():
+    with tempfile.TemporaryDirectory() as folder:
+        engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(folder, 'db.sqlite')}")
+        db = StockPriceDb(engine)
+        for ticker in FOREX:
+            db.save(ColumnarStore.readCsv(f"data/forex/5m/{ticker}.csv"), ticker, "5m")
+        with engine.begin() as connection:
+            connection.execute(sqlalchemy.text('DROP INDEX "ix_5m_ticker_datetime"'))
+        end = ColumnarStore.readCsv("data/forex/5m/EURUSD=X.csv").index[-1]
+        start = end - pd.Timedelta(weeks=3)
+        total = pd.read_sql('SELECT COUNT(*) AS n FROM "5m"', engine)["n"][0]
+        print(f"{total} rows of 5m data for {len(FOREX)} tickers, reading EURUSD=X from {start} to {end}")
+
+        rows = len(pd.read_sql('SELECT * FROM "5m" WHERE Ticker = \'EURUSD=X\'', engine).index)
+        baseline = measure(findLegacy, engine, start, end)
+        report(f"SELECT * + applyDateRange ({rows} rows transferred)", baseline)
+        rows = len(db.find("EURUSD=X", "5m", start, end, ["Close"]).index)
+        report(f"find, no index ({rows} rows transferred)",
+               measure(db.find, "EURUSD=X", "5m", start, end), baseline)
+        db.migrate(["5m"])
+        report(f"find, (Ticker, Datetime) index ({rows} rows transferred)",
+               measure(db.find, "EURUSD=X", "5m", start, end), baseline)
+        report("find, index, Close only", measure(db.find, "EURUSD=X", "5m", start, end, ["Close"]), baseline)
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,48 @@
+"""
+Compares date parsing and date range slicing before and after fast path: dateutil parser per row (old Yahoo.loadData)
+and pd.to_datetime vs fixed format Utils.parseDates, label slicing of interpreted string dates (old
+StockPrice.applyDateRange) vs binary search returning view.
+"""
+import dateutil.parser
+import pandas as pd
+
+from benchmarks import measure, report
+from interface import Utils
+from stockPrice import StockPrice
+
+
+def parseLegacy(dates: pd.Index) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex([dateutil.parser.parse(x, ignoretz=False) for x in dates]).tz_convert('Europe/Warsaw')
+
+
+def applyDateRangeLegacy(data: pd.DataFrame, startDate, endDate) -> pd.DataFrame:
+    startDate, endDate = str(startDate), str(endDate)
+    startDate = data.index[0] if startDate == '' else startDate
+    endDate = data.index[-1] if endDate == '' else endDate
+    return data.loc[pd.to_datetime(startDate, utc=True):pd.to_datetime(endDate, utc=True), :]
+
+
+def run():
+    for interval in ["1m", "2m"]:
+        filePath = f"data/forex/{interval}/EURUSD=X.csv"
+        raw = pd.read_csv(filePath, index_col=[0])
+        print(f"EURUSD=X {interval}, {len(raw.index)} bars")
+
+        baseline = measure(parseLegacy, raw.index, repeat=1)
+        report(f"{interval} parse, dateutil per row", baseline)
+        report(f"{interval} parse, pd.to_datetime",
+               measure(lambda: pd.to_datetime(raw.index, utc=True).tz_convert('Europe/Warsaw')), baseline)
+        report(f"{interval} parse, Utils.parseDates", measure(Utils.parseDates, raw.index), baseline)
+
+        data = raw.set_axis(Utils.parseDates(raw.index))
+        startDate, endDate = data.index[len(data.index) // 4], data.index[len(data.index) // 2]
+        for name, dates in [("timestamps", (startDate, endDate)), ("strings", (str(startDate), str(endDate))),
+                            ("open end", (str(startDate), ''))]:
+            baseline = measure(applyDateRangeLegacy, data, *dates, repeat=50)
+            report(f"{interval} range ({name}), label slicing", baseline)
+            report(f"{interval} range ({name}), applyDateRange",
+                   measure(lambda: StockPrice(data).applyDateRange(*dates), repeat=50), baseline)
+
+
+if __name__ == '__main__':
+    run()
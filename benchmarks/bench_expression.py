@@ -0,0 +1,46 @@
+"""
+Measures evaluation of buy criteria of newHighAfterReversal (5 rules) over 5m bars and 40 times longer history:
+every rule evaluated separately over whole columns (as CriteriaPlan did before expressions) against compiled
+expression tree evaluated in chunks, for JSON rules and for the same criteria written as expression.
+"""
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex, measure, report
+from stockPrice import CriteriaPlan, Indicators, StrategyUtils
+
+EXPRESSION = "Close > Close_sma_20 and Close > Close_sma_150 and Close > max(Close, 20) and " \
+             "Close_sma_20 < Close_sma_150 and Close_rsi < 70"
+
+
+def perRule(plan: CriteriaPlan, data: dict) -> np.ndarray:
+    """
+    Every rule allocates full boolean column, combined one by one
+    """
+    result = np.full(len(data["Close"]), True)
+    for rule in plan.rules["buyOn"]:
+        values = [plan.operandValues(o, data, 0, len(data["Close"]), 0) for o in rule.operands]
+        result &= rule.function(data[rule.statistic], values[0])
+    return result
+
+
+def run():
+    criteria = StrategyUtils.loadCriteria("newHighAfterReversal")
+    data = loadForex("EURUSD=X", "5m")
+    for stockPrice in [data, pd.concat([data] * 40, ignore_index=True)]:
+        stockPrice = Indicators(stockPrice).compute(["Close_sma_20", "Close_sma_150", "Close_rsi"]).getSP()
+        print(f"EURUSD=X 5m, {len(stockPrice.index)} bars")
+        rules, expression = CriteriaPlan(criteria), CriteriaPlan(dict(criteria, buyOn=EXPRESSION))
+        arrays = rules.prepare(stockPrice)
+        assert np.array_equal(perRule(rules, arrays), expression.evaluate("buyOn", arrays))
+
+        baseline = measure(perRule, rules, arrays, repeat=10)
+        report("per rule, whole columns", baseline)
+        report("CriteriaPlan.evaluate, JSON rules", measure(rules.evaluate, "buyOn", arrays, repeat=10), baseline)
+        report("CriteriaPlan.evaluate, expression", measure(expression.evaluate, "buyOn", arrays, repeat=10),
+               baseline)
+        report("CriteriaPlan(expression) compile", measure(CriteriaPlan, dict(criteria, buyOn=EXPRESSION)))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,58 @@
+"""
+Compares calculating indicators from scratch with taking them from IndicatorCache: hit (the same data) and extension
+(cached history with new bars appended, e.g. next run after download of the latest bars).
+"""
+import tempfile
+
+import pandas as pd
+
+from benchmarks import loadForex, measure, report
+from cache import IndicatorCache
+from stockPrice import Indicators
+
+specs = ["Close_sma_20", "Close_sma_150", "Close_rsi", "Close_MACD_12_26", "Close_max_20"]
+
+
+def longHistory(data: pd.DataFrame, copies: int) -> pd.DataFrame:
+    """
+    Bundled bars repeated one after another (shifted in time), stands for years of history
+    """
+    span = data.index[-1] - data.index[0] + pd.Timedelta(minutes=1)
+    frames = [data.set_axis(data.index + i * span) for i in range(copies)]
+    return pd.concat(frames)
+
+
+def run():
+    with tempfile.TemporaryDirectory() as folder:
+        cases = [("1m", loadForex("EURUSD=X", "1m"), "numpy"), ("2m", loadForex("EURUSD=X", "2m"), "numpy"),
+                 ("2m", loadForex("EURUSD=X", "2m"), "ta")]
+        cases.append(("1m x40", longHistory(cases[0][1], 40), "numpy"))
+        for interval, data, backend in cases:
+            Indicators.backend = backend
+            interval = f"{interval} {backend}"
+            print(f"EURUSD=X {interval}, {len(data.index)} bars")
+            baseline = measure(lambda: Indicators(data).compute(specs).getSP(), repeat=3)
+            report(f"{interval} Indicators.compute", baseline)
+
+            indicatorCache = IndicatorCache(folder)
+            seconds = []
+            for _ in range(3):
+                indicatorCache.clear()
+                seconds.append(measure(indicatorCache.compute, data, "EURUSD=X", interval, specs, repeat=1))
+            report(f"{interval} cache miss (calculated and saved)", min(seconds), baseline)
+            report(f"{interval} cache hit", measure(indicatorCache.compute, data, "EURUSD=X", interval, specs),
+                   baseline)
+
+            for appended in [60, 1000]:
+                history = data.iloc[:-appended]
+                seconds = []
+                for _ in range(3):
+                    indicatorCache.clear()
+                    indicatorCache.compute(history, "EURUSD=X", interval, specs)
+                    seconds.append(measure(indicatorCache.compute, data, "EURUSD=X", interval, specs, repeat=1))
+                report(f"{interval} cache extension, {appended} new bars", min(seconds), baseline)
+            print(indicatorCache.stats)
+
+
+if __name__ == '__main__':
+    run()
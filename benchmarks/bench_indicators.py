@@ -0,0 +1,34 @@
+"""
+Compares chain of Indicators.add* calls with ta backend (one pd.concat per output column) with one
+Indicators.compute call calculating the same 10 indicators, with both backends.
+"""
+from benchmarks import loadForex, measure, report
+from stockPrice import Indicators
+
+SPECS = [{"indicator": "sma", "length": 20}, {"indicator": "sma", "length": 50}, {"indicator": "sma", "length": 150},
+         {"indicator": "ema", "length": 10}, {"indicator": "ema", "length": 12}, {"indicator": "ema", "length": 26},
+         {"indicator": "rsi"}, {"indicator": "rsi", "column": "Open"}, {"indicator": "macd"},
+         {"indicator": "bollinger"}]
+
+
+def chain(data):
+    return Indicators(data, backend="ta").addSMA(length=20).addSMA(length=50).addSMA(length=150)\
+        .addEMA(length=10).addEMA(length=12).addEMA(length=26)\
+        .addRSI().addRSI("Open").addMACD().addBollingerBands().getSP()
+
+
+def compute(data, backend: str = "numpy"):
+    return Indicators(data, backend).compute(SPECS).getSP()
+
+
+def run():
+    data = loadForex("EURUSD=X", "2m")
+    print(f"EURUSD=X 2m, {len(data.index)} bars, {len(compute(data).columns) - len(data.columns)} output columns")
+    baseline = measure(chain, data)
+    report("add* chain", baseline)
+    report("compute, ta backend", measure(compute, data, "ta"), baseline)
+    report("compute, numpy backend", measure(compute, data), baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,78 @@
+"""
+Measures overhead of instrumentation: per call cost of timer decorator and span while disabled and enabled, and
+indicators plus backtest of EURUSD=X 2m (all instrumented functions) with undecorated functions, disabled and enabled
+instrumentation.
+"""
+from benchmarks import loadForex, measure, report
+from interface import instrumentation, timer
+from stockPrice import Indicators, Backtesting
+
+
+def run():
+    calls = 10 ** 5
+
+    def function():
+        return None
+
+    decorated = timer(function)
+
+    def plain():
+        for _ in range(calls):
+            function()
+
+    def wrapped():
+        for _ in range(calls):
+            decorated()
+
+    def spans():
+        for _ in range(calls):
+            with instrumentation.span("span"):
+                pass
+
+    baseline = measure(plain)
+    report(f"{calls} calls, undecorated", baseline)
+    report(f"{calls} calls, timer disabled", measure(wrapped))
+    report(f"{calls} spans, disabled", measure(spans))
+    with instrumentation.recording():
+        report(f"{calls} calls, timer enabled", measure(wrapped))
+        report(f"{calls} spans, enabled", measure(spans))
+    instrumentation.reset()
+
+    data = loadForex("EURUSD=X", "2m")
+    criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
+    print(f"EURUSD=X 2m, {len(data.index)} bars")
+
+    def backtest(compute, executeTrades):
+        indicators = Indicators(data)
+        for length in [20, 50, 150]:
+            indicators.addSMA(length=length)
+        compute(indicators, ["Close_rsi", "Close_MACD_12_26"])
+        strategy = Backtesting.Strategy(indicators.getSP(), criteria)
+        return executeTrades(strategy)
+
+    methods = ["addSMA", "compute"]
+    decoratedMethods = {m: getattr(Indicators, m) for m in methods}
+    decoratedTrades = Backtesting.Strategy.executeTrades
+    try:
+        for m in methods:
+            setattr(Indicators, m, decoratedMethods[m].__wrapped__)
+        Backtesting.Strategy.executeTrades = decoratedTrades.__wrapped__
+        baseline = measure(backtest, Indicators.compute, Backtesting.Strategy.executeTrades)
+    finally:
+        for m in methods:
+            setattr(Indicators, m, decoratedMethods[m])
+        Backtesting.Strategy.executeTrades = decoratedTrades
+    report("indicators + executeTrades, undecorated", baseline)
+    report("indicators + executeTrades, disabled",
+           measure(backtest, Indicators.compute, Backtesting.Strategy.executeTrades), baseline)
+    with instrumentation.recording():
+        report("indicators + executeTrades, enabled",
+               measure(backtest, Indicators.compute, Backtesting.Strategy.executeTrades), baseline)
+    for name, histogram in instrumentation.histograms().items():
+        print(f"{name:<30} count {histogram['count']:>3}  p50 {histogram['p50']:>8.2f} ms  "
+              f"p99 {histogram['p99']:>8.2f} ms  {histogram['bytes'] / 2 ** 20:>8.1f} MB")
+    instrumentation.reset()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,37 @@
+"""
+Compares every indicator calculated with ta library (Indicators 'ta' backend) and with NumPy kernels ('numpy'
+backend), on 2m data and on the same data repeated 100 times.
+"""
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex, measure, report
+from stockPrice import Indicators
+from stockPrice.Kernels import numba
+
+INDICATORS = [("SMA 20", lambda i: i.addSMA(length=20)),
+              ("SMA 150", lambda i: i.addSMA(length=150)),
+              ("EMA 10", lambda i: i.addEMA(length=10)),
+              ("RSI 14", lambda i: i.addRSI()),
+              ("MACD 12 26 9", lambda i: i.addMACD()),
+              ("Bollinger 20 2", lambda i: i.addBollingerBands())]
+
+
+def add(data, backend, function):
+    return function(Indicators(data, backend)).getSP()
+
+
+def run():
+    close = loadForex("EURUSD=X", "2m")[["Close"]]
+    repeated = pd.DataFrame({"Close": np.tile(close["Close"].to_numpy(), 100)})
+    print(f"Numba {'enabled' if numba is not None else 'not installed'}")
+    for data in [close, repeated]:
+        print(f"{len(data.index)} bars")
+        for name, function in INDICATORS:
+            baseline = measure(add, data, "ta", function)
+            report(f"{name} ta", baseline)
+            report(f"{name} numpy", measure(add, data, "numpy", function), baseline)
+
+
+if __name__ == '__main__':
+    run()
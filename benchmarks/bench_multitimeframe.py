@@ -0,0 +1,43 @@
+"""
+Measures projection of 1h and 1d indicators (SMA 150, RSI) onto 5m bars: naive per-bar lookup of the last closed
+coarser bar against MultiTimeframe as-of join (indicators of every interval calculated once, one searchsorted).
+"""
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex, measure, report
+from stockPrice import Indicators, MultiTimeframe, Resampler
+
+NAMES = ["1h:Close_sma_150", "1h:Close_rsi", "1d:Close_sma_5"]
+
+
+def naive(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    For every bar looks up values of the last coarser bar closed before it
+    """
+    columns = {}
+    for name in NAMES:
+        interval, column = MultiTimeframe.splitName(name)
+        frame = Indicators(Resampler.resample(data, interval)).compute([column]).getSP()
+        closed = pd.Series(frame[column].to_numpy(), index=Resampler.barEnds(frame.index, interval))
+        columns[name] = [closed.asof(end) for end in Resampler.barEnds(data.index, "5m")]
+    return pd.DataFrame(columns, index=data.index)
+
+
+def run():
+    data = loadForex("EURUSD=X", "5m")
+    print(f"EURUSD=X 5m, {len(data.index)} bars")
+    expected = naive(data)
+    joined = MultiTimeframe(data, "5m").columns(NAMES)
+    assert np.allclose(expected.to_numpy(), joined.to_numpy(), equal_nan=True)
+
+    baseline = measure(naive, data, repeat=1)
+    report("naive per-bar lookup", baseline)
+    report("MultiTimeframe.columns", measure(lambda: MultiTimeframe(data, "5m").columns(NAMES)), baseline)
+    view = MultiTimeframe(data, "5m")
+    view.columns(NAMES)
+    report("MultiTimeframe.columns, indicators calculated", measure(view.columns, NAMES), baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,45 @@
+"""
+Compares sequential and concurrent DownloadPipeline, with fake provider serving bundled CSV files. Network latency
+and database writes are simulated with sleeps, so the benchmark shows how much waiting overlaps.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks import report
+from cache import CsvProvider, DownloadPipeline
+
+FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
+INTERVALS = ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"]
+
+
+class SlowDb(object):
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def save(self, newData, ticker: str, interval: str) -> None:
+        time.sleep(self.delay)
+
+
+def runPipeline(fetchWorkers: int, persistWorkers: int) -> dict:
+    with tempfile.TemporaryDirectory() as folder:
+        shutil.copytree("data/forex", os.path.join(folder, "forex"))
+        return DownloadPipeline(FOREX, INTERVALS, fetch=CsvProvider(lastRows=200, delay=0.3),
+                                folderPath=os.path.join(folder, "forex"), db=SlowDb(0.05),
+                                fetchWorkers=fetchWorkers, persistWorkers=persistWorkers).run()
+
+
+def run():
+    print(f"{len(INTERVALS)} intervals x {len(FOREX)} tickers, 0.3 s per fetch, 0.05 s per database save")
+    baseline = None
+    for fetchWorkers, persistWorkers in [(1, 1), (4, 4), (13, 8)]:
+        stats = runPipeline(fetchWorkers, persistWorkers)
+        baseline = baseline or stats["seconds"]
+        report(f"fetchWorkers={fetchWorkers}, persistWorkers={persistWorkers}", stats["seconds"], baseline)
+        print(f"    fetch {stats['fetch']['seconds']:.2f} s, persist {stats['persist']['seconds']:.2f} s (summed)")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,37 @@
+"""
+Compares backtesting six forex pairs with Portfolio (2-D criteria, lockstep walk) against looping over Strategy per
+ticker, for one criteria with few trades (newHighAfterReversal) and one with many (window sell criteria).
+"""
+import pandas as pd
+
+from benchmarks import loadForex, measure, report
+from stockPrice import Indicators, Portfolio, Strategy, StrategyUtils
+
+FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
+CRITERIA = {
+    "newHigh": StrategyUtils.loadCriteria("newHighAfterReversal"),
+    "windowSell": {
+        "buyOn": pd.DataFrame({"statistic": ["Close", "Close_rsi"], "operation": [">", "<"],
+                               "value": ["max_10", "70"]}),
+        "sellOn": pd.DataFrame({"statistic": ["Close", "High"], "operation": ["<", ">"], "value": ["min_5", "TP_30"]})
+    }
+}
+
+
+def run():
+    for interval in ["1m", "5m", "15m"]:
+        frames = {t: Indicators(loadForex(t, interval)).compute(["Close_sma_20", "Close_sma_150", "Close_rsi"])
+                  .getSP() for t in FOREX}
+        print(f"{interval}, bars: {[len(f.index) for f in frames.values()]}")
+        for name, criteria in CRITERIA.items():
+            trades = sum(len(log) for log in Portfolio(frames, criteria).run().values())
+            single = measure(lambda: Strategy(frames[FOREX[0]], criteria).executeTrades())
+            baseline = measure(lambda: [Strategy(frames[t], criteria).executeTrades() for t in FOREX])
+            print(f"  {name}: {trades} trades")
+            report(f"  {name}: Strategy, one ticker", single)
+            report(f"  {name}: Strategy loop, six tickers", baseline)
+            report(f"  {name}: Portfolio, six tickers", measure(lambda: Portfolio(frames, criteria).run()), baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,50 @@
+"""
+Measures repeated loads of the same series within one process: Yahoo.loadData of 1m/2m CSV cache (columnar store is
+used once it is fresh) and StockPriceDb.find of SQLite database, without and with process-wide priceCache.
+"""
+import os
+import tempfile
+
+import pandas as pd
+import sqlalchemy
+
+from benchmarks import measure, report
+from cache import ColumnarStore, Yahoo, priceCache
+from dataBase import StockPriceDb
+
+
+def run():
+    with tempfile.TemporaryDirectory() as folder:
+        for interval in ["1m", "2m"]:
+            yahoo = Yahoo("EURUSD=X", interval)
+            yahoo.store = ColumnarStore(folder)
+            yahoo.loadData("EURUSD=X")
+            print(f"EURUSD=X {interval}, {len(yahoo.getSP().index)} bars")
+
+            def uncached():
+                priceCache.clear()
+                return yahoo.loadData("EURUSD=X", startDate="2022-10-10")
+
+            baseline = measure(uncached, repeat=10)
+            report(f"{interval} Yahoo.loadData, columnar store", baseline)
+            report(f"{interval} Yahoo.loadData, priceCache hit",
+                   measure(yahoo.loadData, "EURUSD=X", repeat=10), baseline)
+
+        engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(folder, 'db.sqlite')}")
+        for interval in ["1m", "2m"]:
+            StockPriceDb(engine).save(ColumnarStore.readCsv(f"data/forex/{interval}/EURUSD=X.csv"), "EURUSD=X",
+                                      interval)
+            db, cachedDb = StockPriceDb(engine), StockPriceDb(engine, useCache=True)
+            end = pd.Timestamp("2022-10-14 23:59", tz="Europe/Warsaw")
+            for name, startDate in [("whole series", None), ("last week", end - pd.Timedelta(weeks=1))]:
+                baseline = measure(db.find, "EURUSD=X", interval, startDate, repeat=3)
+                report(f"{interval} StockPriceDb.find ({name})", baseline)
+                report(f"{interval} StockPriceDb.find ({name}), priceCache hit",
+                       measure(cachedDb.find, "EURUSD=X", interval, startDate, repeat=10), baseline)
+        engine.dispose()
+
+    print({**priceCache.stats, "entries": len(priceCache), "MB": priceCache.stats["bytes"] / 2 ** 20})
+
+
+if __name__ == '__main__':
+    run()
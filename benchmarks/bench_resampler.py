@@ -0,0 +1,46 @@
+"""
+Measures resampling of 1m forex bars (bundled history and 40 times longer one) to coarser intervals: pandas
+resample().agg() against vectorized Resampler.resample, and incremental Resampler.update after 60 new 1m bars.
+"""
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex, measure, report
+from stockPrice import Resampler
+
+AGGREGATIONS = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Adj Close": "last", "Volume": "sum"}
+
+
+def longHistory(data: pd.DataFrame, times: int) -> pd.DataFrame:
+    """
+    Repeats bars with consecutive 1m timestamps, going back from the last one
+    """
+    repeated = pd.concat([data] * times)
+    repeated.index = data.index[-1] - pd.to_timedelta(np.arange(len(repeated.index))[::-1], unit="min")
+    return repeated
+
+
+def run():
+    m1 = loadForex("EURUSD=X", "1m")
+    for data in [m1, longHistory(m1, 40)]:
+        print(f"EURUSD=X 1m, {len(data.index)} bars")
+        for interval, rule in [("5m", "5min"), ("1h", "1h"), ("1d", "1D")]:
+            baseline = measure(lambda: data.resample(rule).agg(AGGREGATIONS).dropna(subset=["Open"]))
+            report(f"{interval} pandas resample", baseline)
+            report(f"{interval} Resampler.resample", measure(Resampler.resample, data, interval), baseline)
+
+            resampler = Resampler()
+
+            def update():
+                resampler.materialized.clear()
+                resampler.update("EURUSD=X", interval, data.iloc[:-60])
+                start = pd.Timestamp.now()
+                resampler.update("EURUSD=X", interval, data)
+                return pd.Timestamp.now() - start
+
+            updates = min(update().total_seconds() for _ in range(5))
+            report(f"{interval} Resampler.update (60 new bars)", updates, baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,28 @@
+"""
+Compares Rolling mean/max/min with list comprehensions previously used by Strategy.average/maxLast/minLast.
+"""
+import numpy as np
+
+from benchmarks import loadForex, measure, report
+from stockPrice import Rolling
+
+
+def legacy(inputCol, k: int, function):
+    return np.append(np.repeat(np.nan, k), [function(inputCol.iloc[i-k: i]) for i in range(k, len(inputCol))])
+
+
+def run():
+    close = loadForex("EURUSD=X", "2m")["Close"]
+    values = close.to_numpy()
+    print(f"EURUSD=X 2m, {len(values)} bars")
+    for k in [20, 150, 500]:
+        for name, rolling, function in [("avg", Rolling.mean, np.mean),
+                                        ("max", Rolling.max, np.max),
+                                        ("min", Rolling.min, np.min)]:
+            baseline = measure(legacy, close, k, function, repeat=1)
+            report(f"{name}_{k} legacy", baseline)
+            report(f"{name}_{k} Rolling", measure(rolling, values, k), baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,42 @@
+"""
+Compares loading stock price from CSV cache (per row dateutil parsing, as in Yahoo.loadData) with loading it from
+memory-mapped ColumnarStore.
+"""
+import tempfile
+
+import dateutil.parser
+import pandas as pd
+
+from benchmarks import measure, report
+from cache import ColumnarStore
+
+
+def loadCsvLegacy(filePath: str) -> pd.DataFrame:
+    data = pd.read_csv(filePath, index_col=[0])
+    data.index = pd.DatetimeIndex([dateutil.parser.parse(x, ignoretz=False) for x in data.index])
+    data.index = data.index.tz_convert('Europe/Warsaw')
+    return data
+
+
+def run():
+    with tempfile.TemporaryDirectory() as folder:
+        store = ColumnarStore(folder)
+        for interval in ["1m", "2m"]:
+            filePath = f"data/forex/{interval}/EURUSD=X.csv"
+            data = ColumnarStore.readCsv(filePath)
+            store.save(data, "EURUSD=X", interval, filePath)
+            lastWeek = data.index[-1] - pd.Timedelta(days=7)
+            print(f"EURUSD=X {interval}, {len(data.index)} bars")
+
+            baseline = measure(loadCsvLegacy, filePath, repeat=3)
+            report(f"{interval} CSV, dateutil parser", baseline)
+            report(f"{interval} CSV, vectorized parser", measure(ColumnarStore.readCsv, filePath), baseline)
+            report(f"{interval} ColumnarStore", measure(store.load, "EURUSD=X", interval), baseline)
+            report(f"{interval} ColumnarStore, last week",
+                   measure(store.load, "EURUSD=X", interval, lastWeek), baseline)
+            report(f"{interval} ColumnarStore, Close only",
+                   measure(store.load, "EURUSD=X", interval, None, None, ["Close"]), baseline)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,70 @@
+"""
+Compares peak memory (RSS) of reading whole 1m table from seeded SQLite database with findByIntervalOnly against
+StockPriceDb.stream. Bundled 1m history of all pairs is repeated (shifted by its own length) to get multi-year
+sized table. Every reader runs in fresh process, so its peak RSS is not affected by the others.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import sqlalchemy
+
+from cache import ColumnarStore
+from dataBase import StockPriceDb
+
+FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
+COPIES = 12
+
+
+def seed(engine) -> int:
+    db = StockPriceDb(engine)
+    for ticker in FOREX:
+        data = ColumnarStore.readCsv(f"data/forex/1m/{ticker}.csv")
+        span = data.index[-1] - data.index[0] + pd.Timedelta(minutes=1)
+        copies = [data.set_axis(data.index - span * (COPIES - 1 - i)) for i in range(COPIES)]
+        db.save(pd.concat(copies), ticker, "1m")
+
+    return pd.read_sql('SELECT COUNT(*) AS n FROM "1m"', engine)["n"][0]
+
+
+def read(path: str, mode: str) -> None:
+    """
+    Runs in child process, prints rows read, seconds, peak RSS after imports and peak RSS at the end (MB)
+    """
+    db = StockPriceDb(sqlalchemy.create_engine(f"sqlite:///{path}"))
+    db.table("1m")
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "find":
+        rows = len(db.findByIntervalOnly("1m").index)
+    else:
+        rows = sum(len(chunk.index) for chunk in db.stream(None, "1m", chunkSize=int(mode)))
+    seconds = time.perf_counter() - start
+    print(rows, seconds, before / 1024, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def run():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "db.sqlite")
+        engine = sqlalchemy.create_engine(f"sqlite:///{path}")
+        print(f"seeded {seed(engine)} rows of 1m data")
+        engine.dispose()
+
+        for name, mode in [("findByIntervalOnly", "find"), ("stream, chunkSize=50000", "50000"),
+                           ("stream, chunkSize=10000", "10000")]:
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_stream", path, mode],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            rows, seconds, before, peak = int(output[0]), float(output[1]), float(output[2]), float(output[3])
+            print(f"{name:<30} {rows:>10} rows {seconds:>8.2f} s   peak RSS {peak:.0f} MB "
+                  f"(after imports {before:.0f} MB)")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        read(*sys.argv[1:])
+    else:
+        run()
@@ -0,0 +1,25 @@
+"""
+Compares cost of adding one new bar: recalculating SMA-150, RSI and MACD over whole 1m history with Indicators
+against StreamingIndicators.update.
+"""
+from benchmarks import loadForex, measure, report
+from stockPrice import Indicators, StreamingIndicators
+
+SPECS = ["Close_sma_150", "Close_rsi", "Close_MACD_12_26"]
+
+
+def run():
+    data = loadForex("EURUSD=X", "1m")
+    history, bars = data.iloc[:-1000], [bar for _, bar in data.iloc[-1000:].iterrows()]
+    print(f"EURUSD=X 1m, {len(history.index)} bars of history, {len(bars)} new bars")
+
+    baseline = measure(lambda: Indicators(data).compute(SPECS))
+    report("Indicators.compute over whole history, per bar", baseline)
+    report("StreamingIndicators.seed", measure(lambda: StreamingIndicators(SPECS).seed(history)))
+    streaming = StreamingIndicators(SPECS).seed(history)
+    perBar = measure(lambda: [streaming.update(bar) for bar in bars], repeat=1) / len(bars)
+    report("StreamingIndicators.update, per bar", perBar, baseline)
+
+
+if __name__ == '__main__':
+    run()
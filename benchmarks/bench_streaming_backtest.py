@@ -0,0 +1,53 @@
+"""
+Throughput (bars/sec) of StreamingBacktest replaying 2m EURUSD (data frame and chunked CSV) against
+Strategy.executeTrades, and peak traced memory of streaming runs over 1x and 10x longer synthetic streams, which
+shows that memory does not grow with number of bars.
+"""
+import tracemalloc
+
+from benchmarks import loadForex, measure, report
+from stockPrice import Indicators, Strategy, StrategyUtils, StreamingBacktest
+
+INDICATORS = ["Close_sma_20", "Close_sma_150", "Close_rsi"]
+
+
+def repeatedBars(data, times: int):
+    """
+    Replays data times in a row, every copy shifted in time after the previous one
+    """
+    span = data.index[-1] - data.index[0] + (data.index[1] - data.index[0])
+    for i in range(times):
+        yield from ((date + i * span, bar) for date, bar in StreamingBacktest.frameBars(data))
+
+
+def peakMemory(criteria: dict, bars) -> int:
+    tracemalloc.start()
+    for _ in StreamingBacktest(criteria).run(bars):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run():
+    criteria = StrategyUtils.loadCriteria("newHighAfterReversal")
+    data = loadForex("EURUSD=X", "2m")
+    bars = len(data.index)
+    print(f"EURUSD=X 2m, {bars} bars")
+
+    baseline = measure(lambda: Strategy(Indicators(data).compute(INDICATORS).getSP(), criteria).executeTrades(),
+                       repeat=3)
+    report("Indicators.compute + executeTrades", baseline)
+    for name, source in [("frame", lambda: StreamingBacktest.frameBars(data)),
+                         ("CSV", lambda: StreamingBacktest.csvBars("data/forex/2m/EURUSD=X.csv"))]:
+        seconds = measure(lambda: list(StreamingBacktest(criteria).run(source())), repeat=3)
+        report(f"StreamingBacktest ({name} replay)", seconds, baseline)
+        print(f"{'':<50} {bars / seconds:>10.0f} bars/s")
+
+    for times in [1, 10]:
+        peak = peakMemory(criteria, repeatedBars(data, times))
+        print(f"{f'peak traced memory, {times * bars} bars':<50} {peak / 2 ** 20:>10.2f} MB")
+
+
+if __name__ == '__main__':
+    run()
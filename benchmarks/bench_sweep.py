@@ -0,0 +1,32 @@
+"""
+Measures scaling of Sweep across worker processes. Speed-up should stay close to number of workers as long as
+there are enough combinations per (ticker, interval) to amortize loading stock price in every worker.
+"""
+import os
+import sys
+import time
+
+from benchmarks import loadForex, report
+from stockPrice import Sweep
+
+FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
+GRID = {"fast": [10, 20], "slow": [100, 150], "window": [10, 20, 30], "stopLoss": [20, 40], "takeProfit": [20, 40]}
+
+
+def run(maxWorkers: int = os.cpu_count()):
+    template = Sweep.loadTemplate("newHighAfterReversal")
+    workers = sorted({1, *[2 ** i for i in range(1, maxWorkers.bit_length()) if 2 ** i <= maxWorkers], maxWorkers})
+    combinations = len(Sweep(template, GRID, FOREX, "5m").combinations())
+    print(f"{combinations} combinations on 5m data, {os.cpu_count()} cpus")
+
+    baseline = None
+    for w in workers:
+        start = time.perf_counter()
+        Sweep(template, GRID, FOREX, "5m", loader=loadForex, workers=w).summary()
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        report(f"workers={w} (efficiency {baseline / seconds / w:.0%})", seconds, baseline)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count())
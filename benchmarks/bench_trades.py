@@ -0,0 +1,60 @@
+"""
+Compares creating trades as copied data frame slices with lookups (legacy Trade) against TradeLog.fromPositions,
+and aggregates computed with list comprehensions against TradeLog columns. Trades are random entry/exit pairs on
+1m EURUSD.
+"""
+import tracemalloc
+import numpy as np
+
+from benchmarks import loadForex, measure, report
+from stockPrice import TradeLog
+
+TRADES = 5000
+
+
+def legacyTrades(data, entryDates, exitDates) -> list:
+    trades = []
+    for entryDate, exitDate in zip(entryDates, exitDates):
+        prices = data.loc[entryDate:exitDate, ["Open", "High", "Low", "Close"]]
+        entryClose, exitHigh = prices.at[entryDate, "Close"], prices.at[exitDate, "High"]
+        profit = 30 / 10000 if exitHigh > entryClose else -30 / 10000
+        trades.append((entryDate, exitDate, prices, exitDate - entryDate, profit))
+    return trades
+
+
+def legacySummary(trades: list) -> tuple:
+    profits = [t[4] for t in trades]
+    return sum(profits), len([p for p in profits if p > 0]) / len(profits), sum(profits) / len(profits)
+
+
+def peakMemory(function, *args) -> float:
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 2 ** 20
+
+
+def run():
+    data = loadForex("EURUSD=X", "1m")
+    rng = np.random.default_rng(0)
+    entries = np.sort(rng.choice(len(data.index) - 100, TRADES, replace=False))
+    exits = entries + rng.integers(1, 100, TRADES)
+    entryDates, exitDates = data.index[entries], data.index[exits]
+    print(f"EURUSD=X 1m, {len(data.index)} bars, {TRADES} trades")
+
+    baseline = measure(legacyTrades, data, entryDates, exitDates, repeat=1)
+    report("legacy trades (data frame slices)", baseline)
+    report("TradeLog.fromPositions", measure(TradeLog.fromPositions, data, entries, exits), baseline)
+    print(f"{'peak memory legacy / TradeLog':<50} {peakMemory(legacyTrades, data, entryDates, exitDates):>10.2f}"
+          f" / {peakMemory(TradeLog.fromPositions, data, entries, exits):.2f} MB")
+
+    trades, log = legacyTrades(data, entryDates, exitDates), TradeLog.fromPositions(data, entries, exits)
+    baseline = measure(legacySummary, trades)
+    report("aggregates with list comprehensions", baseline)
+    report("TradeLog aggregates", measure(lambda: (log.totalProfit(), log.winRate(), log.expectancy())), baseline)
+
+
+if __name__ == '__main__':
+    run()
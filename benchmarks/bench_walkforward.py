@@ -0,0 +1,37 @@
+"""
+Compares walk-forward backtest done by hand (indicators and buy mask recalculated for every fold, then
+executeTrades(startDate, endDate)) against WalkForward, which calculates them once and slices arrays per fold.
+"""
+from benchmarks import loadForex, measure, report
+from stockPrice import Indicators, Strategy, StrategyUtils, WalkForward
+
+SPECS = ["Close_sma_20", "Close_sma_150", "Close_rsi"]
+
+
+def byHand(data, criteria, folds):
+    return [Strategy(Indicators(data).compute(SPECS).getSP(), criteria).executeTrades(startDate, endDate)
+            for _, _, startDate, endDate in folds]
+
+
+def run():
+    criteria = StrategyUtils.loadCriteria("newHighAfterReversal")
+    for interval, window, step in [("5m", "W-2", "W-1"), ("1m", "H-12", "H-2")]:
+        data = loadForex("EURUSD=X", interval)
+        folds = WalkForward(data, criteria, window, step).folds()
+        print(f"EURUSD=X {interval}, {len(data.index)} bars, {len(folds)} folds of {window} every {step}")
+        baseline = measure(byHand, data, criteria, folds, repeat=3)
+        report("  by hand", baseline)
+        for workers in [1, 4]:
+            seconds = measure(lambda: WalkForward(data, criteria, window, step, indicators=SPECS,
+                                                  workers=workers).summary(), repeat=3)
+            report(f"  WalkForward, {workers} threads", seconds, baseline)
+
+        walkForward = WalkForward(data, criteria, window, step, indicators=SPECS, workers=1)
+        summary = walkForward.summary()
+        stages = ", ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in walkForward.stats.items())
+        print(f"  {stages}, per fold: mean {summary['seconds'].mean() * 1000:.2f} ms, "
+              f"max {summary['seconds'].max() * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,176 @@
+"""
+Benchmark suite run offline against bundled data/forex CSV files: CSV and columnar store load, date range slicing,
+every indicator, criteria evaluation (JSON rules and expression), Strategy.executeTrades and StockPriceDb save/find
+on SQLite. Cases are run on EURUSD=X 1m bars and on longer series synthesized by bootstrapping them (scaling curves),
+results are saved as JSON, so results of two commits can be compared. Run from repository root e.g.:
+python -m benchmarks.suite --sizes 100000 1000000 10000000
+python -m benchmarks.suite --compare benchmarks/results/<commit>.json
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import sqlalchemy
+
+from benchmarks import synthesize, timings
+from cache import ColumnarStore
+from dataBase import StockPriceDb
+from stockPrice import Backtesting, CriteriaPlan, Indicators, StockPrice
+
+INDICATORS = {"addSMA": lambda i: i.addSMA(length=20), "addEMA": lambda i: i.addEMA(length=10),
+              "addRSI": lambda i: i.addRSI(), "addMACD": lambda i: i.addMACD(),
+              "addBollingerBands": lambda i: i.addBollingerBands()}
+EXPRESSION = "Close > Close_sma_20 and Close > Close_sma_150 and Close > max(Close, 20) and " \
+             "Close_sma_20 < Close_sma_150 and Close_rsi < 70"
+
+
+def cases(data: pd.DataFrame, folder: str, csvMax: int, dbMax: int) -> dict:
+    """
+    :param folder: temporary folder for CSV file, columnar store and SQLite database
+    :param csvMax: the longest series for which CSV and columnar store cases are run (writing file is not timed,
+                   but slow)
+    :param dbMax: the longest series for which database cases are run
+    :return: dictionary of case name -> function()
+    """
+    rows = len(data.index)
+    start, end = data.index[rows // 4], data.index[3 * rows // 4]
+    functions = {"StockPrice.applyDateRange": lambda: StockPrice(data).applyDateRange(start, end)}
+
+    if rows <= csvMax:
+        csvPath = os.path.join(folder, "bench.csv")
+        data.to_csv(csvPath)
+        store = ColumnarStore(os.path.join(folder, "columnar"))
+        store.save(data, "BENCH", "1m", csvPath)
+        functions["ColumnarStore.readCsv"] = lambda: ColumnarStore.readCsv(csvPath)
+        functions["ColumnarStore.load"] = lambda: store.load("BENCH", "1m")
+        functions["ColumnarStore.load (date range)"] = lambda: store.load("BENCH", "1m", start, end)
+
+    for name, add in INDICATORS.items():
+        functions[f"Indicators.{name}"] = lambda add=add: add(Indicators(data))
+
+    criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
+    stockPrice = Indicators(data).compute(["Close_sma_20", "Close_sma_150", "Close_rsi"]).getSP()
+    rules, expression = CriteriaPlan(criteria), CriteriaPlan(dict(criteria, buyOn=EXPRESSION))
+    arrays = rules.prepare(stockPrice)
+    functions["CriteriaPlan.evaluate (JSON rules)"] = lambda: rules.evaluate("buyOn", arrays)
+    functions["CriteriaPlan.evaluate (expression)"] = lambda: expression.evaluate("buyOn", arrays)
+    functions["Strategy.executeTrades"] = lambda: Backtesting.Strategy(stockPrice, criteria).executeTrades()
+
+    if rows <= dbMax:
+        engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(folder, f'bench{rows}.sqlite')}")
+        db, saved = StockPriceDb(engine), []
+
+        def save():
+            # every call saves new ticker, the same ticker would be skipped as already stored
+            saved.append(f"BENCH{len(saved)}")
+            db.save(data, saved[-1], "1m")
+
+        functions["StockPriceDb.save"] = save
+        functions["StockPriceDb.find"] = lambda: db.find(saved[0], "1m")
+        functions["StockPriceDb.find (date range)"] = lambda: db.find(saved[0], "1m", start, end)
+
+    return functions
+
+
+def run(sizes: list, repeat: int = 5, seed: int = 0, csvMax: int = 10 ** 6, dbMax: int = 10 ** 6) -> dict:
+    """
+    Runs every case on EURUSD=X 1m bars and on synthesized series of every size
+    :return: results with environment (commit, versions) and list of cases with best and median time in seconds
+    """
+    base = ColumnarStore.readCsv("data/forex/1m/EURUSD=X.csv")
+    datasets = [("EURUSD=X 1m", base)] + [(f"synthetic {size}", synthesize(base, size, seed)) for size in sizes]
+
+    results = []
+    for dataset, data in datasets:
+        rows = len(data.index)
+        print(f"{dataset}, {rows} bars")
+        with tempfile.TemporaryDirectory() as folder:
+            for case, function in cases(data, folder, csvMax, dbMax).items():
+                times = timings(function, repeat=repeat)
+                results.append({"case": case, "dataset": dataset, "rows": rows, "best": min(times),
+                                "median": float(np.median(times)), "times": times})
+                print(f"    {case:<40} {min(times) * 1000:>10.2f} ms {min(times) / rows * 10 ** 9:>8.1f} ns/bar")
+
+    return {"commit": commit(), "date": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "processors": os.cpu_count(), "repeat": repeat, "seed": seed,
+            "results": results}
+
+
+def commit() -> str:
+    """
+    :return: hash of checked out commit, with '-dirty' suffix if tracked files are changed ('' outside git)
+    """
+    try:
+        head = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        changed = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                 text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+    return f"{head}-dirty" if changed else head
+
+
+def scaling(results: dict) -> pd.DataFrame:
+    """
+    :return: best time (ms) of every case (rows) for every dataset size (columns)
+    """
+    frame = pd.DataFrame(results["results"])
+    return frame.pivot_table(index="case", columns="rows", values="best", sort=False) * 1000
+
+
+def compare(old: dict, new: dict, threshold: float = 0.1) -> pd.DataFrame:
+    """
+    Compares best times of cases run in both results
+    :param threshold: relative slow down above which case is marked as regression
+    :return: data frame of case, dataset, old and new time (ms), ratio new / old and regression flag
+    """
+    key = ["case", "dataset"]
+    times = pd.DataFrame(old["results"])[key + ["best"]].merge(pd.DataFrame(new["results"])[key + ["best"]],
+                                                               on=key, suffixes=("Old", "New"))
+    times[["bestOld", "bestNew"]] *= 1000
+    times["ratio"] = times["bestNew"] / times["bestOld"]
+    times["regression"] = times["ratio"] > 1 + threshold
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs benchmark suite and saves results as JSON.")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[10 ** 5, 10 ** 6],
+                        help="numbers of synthesized 1m bars, e.g. 100000 1000000 10000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csvMax", type=int, default=10 ** 6, help="the longest series written to CSV file")
+    parser.add_argument("--dbMax", type=int, default=10 ** 6, help="the longest series saved to database")
+    parser.add_argument("--output", default=None, help="JSON file, benchmarks/results/<commit>.json by default")
+    parser.add_argument("--compare", nargs="+", default=None, metavar="JSON",
+                        help="results to compare with: OLD (compared with new run) or OLD NEW (without running)")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slow down reported as regression")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 1:
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+    else:
+        new = run(args.sizes, args.repeat, args.seed, args.csvMax, args.dbMax)
+        name = new["commit"][:12] + ("-dirty" if new["commit"].endswith("-dirty") else '') or "results"
+        output = args.output or os.path.join("benchmarks", "results", f"{name}.json")
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(new, f, indent=1)
+        print(scaling(new).round(2).to_string())
+        print(f"Saved to {output}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        comparison = compare(old, new, args.threshold)
+        print(f"{old['commit'][:12]} -> {new['commit'][:12]}")
+        print(comparison.round(3).to_string(index=False))
+        sys.exit(1 if comparison["regression"].any() else 0)
@@ -0,0 +1,167 @@
+"""
+File containing binary columnar cache of stock prices. Every (interval, ticker) partition is a folder with one
+.npy file per column: int64 UTC timestamps (nanoseconds), float64 prices/volume and boolean flags. Files are
+memory-mapped (copy-on-write) on load, so only rows from requested date range are read from disk.
+Migrate existing CSV tree with: python -m cache.ColumnarStore
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from pathlib import Path
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+
+import interface
+import stockPrice
+
+if TYPE_CHECKING:
+    from interface import dateType
+
+
+class ColumnarStore(object):
+
+    def __init__(self, folderPath: str = "data/columnar", timeZone: str = "Europe/Warsaw"):
+        """
+        :param folderPath: root folder of the store, partitions are stored in {folderPath}/{interval}/{ticker}/
+        :param timeZone: time zone of loaded index
+        """
+        self.folderPath = Path(folderPath)
+        self.timeZone = timeZone
+
+    def path(self, ticker: str, interval: str) -> Path:
+        return self.folderPath / interval / ticker
+
+    def exists(self, ticker: str, interval: str) -> bool:
+        return (self.path(ticker, interval) / "meta.json").exists()
+
+    def meta(self, ticker: str, interval: str) -> dict:
+        with open(self.path(ticker, interval) / "meta.json", 'r') as f:
+            return json.load(f)
+
+    def isFresh(self, ticker: str, interval: str, sourcePath: str) -> bool:
+        """
+        Checks if partition was saved from current version of source (CSV) file, partition of missing source is stale
+        """
+        if not self.exists(ticker, interval) or not os.path.exists(sourcePath):
+            return False
+        return self.meta(ticker, interval).get("sourceModified") == os.path.getmtime(sourcePath)
+
+    def save(self, data: pd.DataFrame, ticker: str, interval: str, sourcePath: (str | None) = None,
+             extra: (dict | None) = None) -> None:
+        """
+        Saves numeric (as float64) and boolean columns of stock price, other columns (e.g. text) cannot be memory
+        mapped and raise ValueError. Partition is written to temporary folder (unique for every writer, also across
+        processes) first and then renamed, so readers never see partially written partition. If other writer replaces
+        the partition at the same time, one of them raises OSError.
+        :param data: stock price with timezone aware DatetimeIndex
+        :param sourcePath: file from which data was read, its modification time is used by isFresh
+        :param extra: additional (JSON serializable) values stored in meta.json
+        """
+        unsupported = [c for c in data.columns if not pd.api.types.is_numeric_dtype(data[c])]
+        if unsupported:
+            raise ValueError(f"Only numeric and boolean columns can be stored, {unsupported} are not")
+        path = self.path(ticker, interval)
+        unique = f"{os.getpid()}.{uuid.uuid4().hex}"
+        tmpPath, oldPath = path.with_name(f"{ticker}.{unique}.tmp"), path.with_name(f"{ticker}.{unique}.old")
+        tmpPath.mkdir(parents=True)
+        try:
+            self.write(data, tmpPath, sourcePath, extra)
+            if path.exists():
+                path.rename(oldPath)
+            tmpPath.rename(path)
+        finally:
+            shutil.rmtree(tmpPath, ignore_errors=True)
+            shutil.rmtree(oldPath, ignore_errors=True)
+
+    def write(self, data: pd.DataFrame, tmpPath: Path, sourcePath: (str | None), extra: (dict | None)) -> None:
+        """
+        Writes columns and meta.json of partition to (temporary) folder
+        """
+        data = data.sort_index(kind="stable")
+        index = data.index if data.index.tz is not None else data.index.tz_localize(self.timeZone)
+        np.save(tmpPath / "Datetime.npy", ColumnarStore.nanoseconds(index))
+        for c in data.columns:
+            dtype = np.bool_ if pd.api.types.is_bool_dtype(data[c]) else np.float64
+            np.save(tmpPath / f"{c}.npy", data[c].to_numpy(dtype=dtype))
+        meta = {"columns": list(data.columns),
+                "index": data.index.name or "Datetime",
+                "rows": len(data.index),
+                "sourceModified": os.path.getmtime(sourcePath) if sourcePath else None,
+                **(extra or {})}
+        with open(tmpPath / "meta.json", 'w') as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def nanoseconds(index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        UTC timestamps of index in nanoseconds, scaled from index unit with one integer multiplication (faster than
+        as_unit, which checks every value for overflow)
+        """
+        factor = {"s": 10 ** 9, "ms": 10 ** 6, "us": 10 ** 3, "ns": 1}[index.unit]
+        return index.asi8 * factor if factor != 1 else index.asi8
+
+    def load(self, ticker: str, interval: str, startDate: (dateType | None) = None, endDate: (dateType | None) = None,
+             columns: (list | None) = None) -> pd.DataFrame:
+        """
+        Loads stock price from memory-mapped columns. Columns are mapped copy-on-write: returned data frame can be
+        modified like one read from CSV, modified pages are copied in memory and files are not changed.
+        :param startDate: first date to load (inclusive), if empty loads from the beginning
+        :param endDate: last date to load (inclusive), if empty loads to the end
+        :param columns: columns to load, all if not provided
+        :return: stock price data frame
+        """
+        if not self.exists(ticker, interval):
+            raise FileNotFoundError(f"There is no {interval} data for: {ticker} in {self.folderPath}")
+        path = self.path(ticker, interval)
+        meta = self.meta(ticker, interval)
+
+        timestamps = np.load(path / "Datetime.npy", mmap_mode='r')
+        lo, hi = self.rowRange(timestamps, startDate, endDate)
+        columns = meta["columns"] if columns is None else columns
+        values = {c: np.load(path / f"{c}.npy", mmap_mode='c')[lo:hi] for c in columns}
+        index = interface.Utils.fromUtc(timestamps[lo:hi], self.timeZone, meta["index"])
+
+        return pd.DataFrame(values, index=index, copy=False)
+
+    @staticmethod
+    def rowRange(timestamps: np.ndarray, startDate: (dateType | None), endDate: (dateType | None)) -> (int, int):
+        """
+        Finds rows [lo, hi) of sorted timestamps between startDate and endDate (both inclusive)
+        """
+        lo, hi = 0, timestamps.shape[0]
+        if startDate not in [None, '']:
+            lo = np.searchsorted(timestamps, stockPrice.StockPrice.toUtc(startDate).as_unit("ns").value, side="left")
+        if endDate not in [None, '']:
+            hi = np.searchsorted(timestamps, stockPrice.StockPrice.toUtc(endDate).as_unit("ns").value, side="right")
+
+        return int(lo), int(max(lo, hi))
+
+    @staticmethod
+    def readCsv(filePath: str, timeZone: str = "Europe/Warsaw") -> pd.DataFrame:
+        """
+        Reads cached CSV file, timestamps are parsed with vectorized fixed format parser (see Utils.parseDates)
+        """
+        data = pd.read_csv(filePath, index_col=[0])
+        data.index = interface.Utils.parseDates(data.index, timeZone)
+        return data
+
+    def migrate(self, csvFolder: str = "data/forex") -> list:
+        """
+        Converts whole CSV tree ({csvFolder}/{interval}/{ticker}.csv) into columnar store
+        :return: list of migrated (interval, ticker) partitions
+        """
+        migrated = []
+        for filePath in sorted(Path(csvFolder).glob("*/*.csv")):
+            interval, ticker = filePath.parent.name, filePath.stem
+            self.save(self.readCsv(str(filePath), self.timeZone), ticker, interval, str(filePath))
+            migrated.append((interval, ticker))
+
+        return migrated
+
+
+if __name__ == '__main__':
+    for partition in ColumnarStore().migrate():
+        print(f"migrated {partition[0]}/{partition[1]}")
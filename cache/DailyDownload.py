@@ -5,24 +5,37 @@ Script called every day to download and append new data to existing files
 
 import os
 
-os.chdir("/Users/admin/Desktop/TechnicalAnalyzer/TechnicalAnalyzer/")
-
 import cache
 import dataBase
 
+PROJECT_DIR = "/Users/admin/Desktop/TechnicalAnalyzer/TechnicalAnalyzer/"
 FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
-INTERVALS = ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"]
-
-def run():
-    for inter in INTERVALS:
-        y = cache.Yahoo(FOREX, inter)
-        y.downloadData()
-        db = dataBase.StockPriceDb()
-        for f in FOREX:
-            tickData = y.loadData(f)
-            db.save(tickData, f, inter)
+INTERVALS = ["1m", "5m", "1h", "1d"]
+""" Intervals resampled from downloaded ones (60m is the same interval as 1h) """
+DERIVED = {"2m": "1m", "15m": "5m", "30m": "5m", "90m": "5m", "60m": "1h",
+           "5d": "1d", "1wk": "1d", "1mo": "1d", "3mo": "1d"}
+
+def run(**kwargs) -> dict:
+    """
+    Downloads all intervals concurrently, appends them (and intervals resampled from them) to cached CSV files and
+    saves them to database.
+    :param kwargs: passed to DownloadPipeline, e.g. fetch=cache.CsvProvider() to run without network access, db=None
+                   to run without database (MySQL StockPriceDb is created only if db is not passed)
+    :return: pipeline stats
+    """
+    if "db" not in kwargs:
+        kwargs["db"] = dataBase.StockPriceDb()
+    kwargs.setdefault("derived", DERIVED)
+    stats = cache.DownloadPipeline(FOREX, INTERVALS, **kwargs).run()
+    for stage in ["fetch", "persist"]:
+        print(f"{stage}: {stats[stage]}")
+    for error in stats["errors"]:
+        print(error)
+
+    return stats
 
 
 if __name__ == '__main__':
+    os.chdir(PROJECT_DIR)
     run()
 
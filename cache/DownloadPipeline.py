@@ -0,0 +1,168 @@
+"""
+File containing staged pipeline used to download and store new stock price data. Fetch stage downloads intervals
+concurrently, fetched tickers are put on a queue consumed by parallel persist stage (CSV files and database).
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import queue
+import threading
+import time
+import pandas as pd
+
+import stockPrice
+from cache.ColumnarStore import ColumnarStore
+from cache.Yahoo import Yahoo
+
+
+def fetchYahoo(tickers: list, interval: str) -> dict:
+    """
+    Downloads tickers from Yahoo's API
+    :return: dictionary of ticker -> stock price
+    """
+    return Yahoo(tickers, interval).fetchData()
+
+
+class CsvProvider(object):
+    """
+    Fake fetch function serving bundled CSV files, used to run pipeline without network access
+    """
+
+    def __init__(self, folderPath: str = "data/forex", lastRows: int = 100, delay: float = 0.0):
+        """
+        :param folderPath: folder with {interval}/{ticker}.csv files
+        :param lastRows: number of last candles returned for each ticker, as if they were just downloaded
+        :param delay: seconds of simulated network latency per request
+        """
+        self.folderPath = Path(folderPath)
+        self.lastRows = lastRows
+        self.delay = delay
+
+    def __call__(self, tickers: list, interval: str) -> dict:
+        time.sleep(self.delay)
+        return {t: ColumnarStore.readCsv(str(self.folderPath / interval / f"{t}.csv")).iloc[-self.lastRows:]
+                for t in tickers}
+
+
+class DownloadPipeline(object):
+    """ Origins (from UTC midnight) of Yahoo's intraday buckets not aligned to local midnight, derived bars continue
+    downloaded ones on the same grid """
+    origins = {"90m": pd.Timedelta(minutes=30)}
+
+    def __init__(self, tickers: list, intervals: list, **kwargs):
+        """
+        :param tickers: stock price/forex pair codes
+        :param intervals: timeFrames to download
+        :param kwargs: fetch (function(tickers, interval) -> dict of ticker -> stock price), derived (dictionary of
+                       interval -> downloaded interval it is resampled from instead of being downloaded, e.g.
+                       {"15m": "5m"}), folderPath (folder of cached CSV files), db (StockPriceDb or None to skip
+                       saving to database), fetchWorkers, persistWorkers, retries (number of attempts of every stage),
+                       backoff (seconds before first retry, doubled after every next one), queueSize
+        """
+        self.tickers = tickers
+        self.intervals = intervals
+        self.fetch = kwargs.pop("fetch", fetchYahoo)
+        self.derived = kwargs.pop("derived", {})
+        self.folderPath = Path(kwargs.pop("folderPath", "data/forex"))
+        self.db = kwargs.pop("db", None)
+        self.fetchWorkers = kwargs.pop("fetchWorkers", 4)
+        self.persistWorkers = kwargs.pop("persistWorkers", 4)
+        self.retries = kwargs.pop("retries", 3)
+        self.backoff = kwargs.pop("backoff", 1.0)
+        self.queue = queue.Queue(maxsize=kwargs.pop("queueSize", 2 * len(tickers) * self.persistWorkers))
+        self.lock = threading.Lock()
+        self.stats = {}
+
+        if kwargs:
+            raise UserWarning(
+                f"{kwargs} contains not allowed parameters. Please choose from: [fetch, derived, folderPath, db, "
+                f"fetchWorkers, persistWorkers, retries, backoff, queueSize]"
+            )
+        for interval, source in self.derived.items():
+            if not stockPrice.Resampler.nests(source, interval):
+                raise ValueError(f"{interval} cannot be resampled from {source}")
+
+    def retry(self, stage: str, function, *args):
+        """
+        Calls function, retrying it with exponential backoff. Time, calls and retries are added to stage stats.
+        :return: function result, None if all attempts failed
+        """
+        for attempt in range(self.retries):
+            start = time.perf_counter()
+            try:
+                result = function(*args)
+                self.addStats(stage, seconds=time.perf_counter() - start, count=1)
+                return result
+            except Exception as e:
+                self.addStats(stage, seconds=time.perf_counter() - start)
+                if attempt == self.retries - 1:
+                    self.addStats(stage, failures=1)
+                    with self.lock:
+                        self.stats["errors"].append(f"{stage} {args[:2]}: {e!r}")
+                    return None
+                self.addStats(stage, retries=1)
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def addStats(self, stage: str, **values) -> None:
+        with self.lock:
+            for name, value in values.items():
+                self.stats[stage][name] += value
+
+    def fetchInterval(self, interval: str) -> None:
+        tickersData = self.retry("fetch", self.fetch, self.tickers, interval)
+        for ticker, data in (tickersData or {}).items():
+            self.queue.put((ticker, interval, data))
+
+    def persist(self, ticker: str, interval: str, data: pd.DataFrame) -> None:
+        """
+        Appends new candles to cached CSV file and saves them to database, then does the same with intervals derived
+        from them
+        """
+        folderPath = self.folderPath / interval
+        folderPath.mkdir(parents=True, exist_ok=True)
+        Yahoo(ticker, interval).appendToExistingData(data, str(folderPath / f"{ticker}.csv"))
+        if self.db is not None:
+            self.db.save(data.dropna(), ticker, interval)
+        for derived in [i for i, source in self.derived.items() if source == interval]:
+            bars = DownloadPipeline.derive(data, derived)
+            if not bars.empty:
+                self.persist(ticker, derived, bars)
+
+    @staticmethod
+    def derive(data: pd.DataFrame, interval: str) -> pd.DataFrame:
+        """
+        Resamples fetched candles to coarser interval, on the grid of Yahoo's buckets of that interval (see origins).
+        The first bucket may have started before the first fetched candle, so it is kept only if it starts with it (the
+        last one may be partial, as the last downloaded candle).
+        """
+        if data.empty:
+            return data
+        bars = stockPrice.Resampler.resample(data, interval, origin=DownloadPipeline.origins.get(interval))
+        return bars.loc[bars.index >= data.index[0]]
+
+    def persistWorker(self) -> None:
+        while (item := self.queue.get()) is not None:
+            self.retry("persist", self.persist, *item)
+
+    def run(self) -> dict:
+        """
+        Runs pipeline until all intervals are fetched and persisted
+        :return: stats - for every stage number of successful calls, retries, failures and total seconds spent
+        """
+        self.stats = {stage: {"count": 0, "retries": 0, "failures": 0, "seconds": 0.0}
+                      for stage in ["fetch", "persist"]}
+        self.stats["errors"] = []
+        start = time.perf_counter()
+
+        persistThreads = [threading.Thread(target=self.persistWorker) for _ in range(self.persistWorkers)]
+        for t in persistThreads:
+            t.start()
+        with ThreadPoolExecutor(max_workers=self.fetchWorkers) as pool:
+            list(pool.map(self.fetchInterval, self.intervals))
+        for _ in persistThreads:
+            self.queue.put(None)
+        for t in persistThreads:
+            t.join()
+
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.stats
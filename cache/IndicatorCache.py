@@ -0,0 +1,200 @@
+"""
+File containing on-disk cache of calculated indicators. Every entry holds indicator columns of one (ticker, interval,
+indicator specifications) in ColumnarStore format, together with fingerprint of input data it was calculated from and
+state of streaming indicators at its last row. When stock price only gained new bars since entry was saved,
+indicators are extended from that state instead of being calculated from scratch.
+"""
+from __future__ import annotations
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+import stockPrice
+from cache.ColumnarStore import ColumnarStore
+
+
+class IndicatorCache(object):
+
+    def __init__(self, folderPath: str = "data/indicators", maxBytes: int = 512 * 2 ** 20, maxAppend: int = 1000,
+                 timeZone: str = "Europe/Warsaw"):
+        """
+        :param folderPath: root folder of the cache, entries are stored in {folderPath}/{interval}/{key}/
+        :param maxBytes: size limit of all entries, least recently used ones are removed above it
+        :param maxAppend: largest number of appended bars extended incrementally, above it indicators are
+                          calculated from scratch (vectorized calculation is faster for long appends)
+        """
+        self.store = ColumnarStore(folderPath, timeZone)
+        self.maxBytes = maxBytes
+        self.maxAppend = maxAppend
+        self.stats = {"hits": 0, "extensions": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(ticker: str, interval: str, specs: list) -> str:
+        """
+        Content address of entry: hash of ticker, interval, calculation backend and parsed (complete) specifications,
+        so e.g. 'Close_rsi' and {"indicator": "rsi", "length": 14} share an entry
+        """
+        parsed = [stockPrice.Indicators.parseSpec(spec) for spec in specs]
+        content = json.dumps([ticker, interval, stockPrice.Indicators.backend, parsed], sort_keys=True, default=str)
+        return hashlib.sha1(content.encode()).hexdigest()[:20]
+
+    @staticmethod
+    def inputColumns(specs: list) -> list:
+        columns = set()
+        for spec in map(stockPrice.Indicators.parseSpec, specs):
+            columns.update([spec["column"]] if isinstance(spec["column"], str) else spec["column"])
+        return sorted(columns)
+
+    @staticmethod
+    def digests(data: pd.DataFrame, columns: list, lo: int, hi: int, previous: (list | None) = None) -> list:
+        """
+        Hashes of index (UTC timestamps in its own unit) and of every input column. Rows [lo, hi) are added to copies
+        of previous hashes, so hashes of appended data continue from hashes of cached rows.
+        """
+        index = pd.DatetimeIndex(data.index)
+        arrays = [index.asi8] + [data[c].to_numpy(dtype=np.float64) for c in columns]
+        if previous is None:
+            previous = [hashlib.sha1(index.unit.encode())] + [hashlib.sha1(c.encode()) for c in columns]
+        digests = [digest.copy() for digest in previous]
+        for digest, values in zip(digests, arrays):
+            digest.update(np.ascontiguousarray(values[lo:hi]))
+        return digests
+
+    @staticmethod
+    def fingerprint(digests: list) -> str:
+        return hashlib.sha1("".join(digest.hexdigest() for digest in digests).encode()).hexdigest()
+
+    def compute(self, data: pd.DataFrame, ticker: str, interval: str, specs: list) -> pd.DataFrame:
+        """
+        Adds indicators to stock price (like Indicators.compute), reusing cached values:
+        hit - the same data was already calculated, extension - data starts with cached rows and has new bars
+        appended, miss - indicators are calculated from scratch
+        :param specs: list of indicator specifications, see Indicators.compute
+        :return: stock price with indicator columns
+        """
+        key, columns = IndicatorCache.key(ticker, interval, specs), IndicatorCache.inputColumns(specs)
+        rows = len(data.index)
+        meta, cached = self.read(key, interval)
+
+        digests = None
+        if meta is not None and meta["rows"] <= rows and rows - meta["rows"] <= self.maxAppend:
+            digests = IndicatorCache.digests(data, columns, 0, meta["rows"])
+        if digests is not None and IndicatorCache.fingerprint(digests) == meta["fingerprint"]:
+            if meta["rows"] == rows:
+                self.stats["hits"] += 1
+                IndicatorCache.touch(self.store.path(key, interval))
+                return self.join(data, pd.DataFrame(cached, index=data.index))
+
+            self.stats["extensions"] += 1
+            digests = IndicatorCache.digests(data, columns, meta["rows"], rows, digests)
+            indicators = stockPrice.StreamingIndicators.fromJson(meta["state"])
+            appended = data.iloc[meta["rows"]:]
+            values = pd.DataFrame([indicators.update(bar) for bar in appended[columns].to_dict("records")],
+                                  columns=meta["columns"])
+            computed = pd.DataFrame({c: np.concatenate([cached[c], values[c].to_numpy(dtype=np.float64)])
+                                     for c in meta["columns"]}, index=data.index)
+        else:
+            self.stats["misses"] += 1
+            digests = IndicatorCache.digests(data, columns, 0, rows)
+            computed = stockPrice.Indicators(data[columns]).compute(specs).getSP().drop(columns=columns)
+            indicators = stockPrice.StreamingIndicators(specs).seed(data)
+
+        self.save(computed, key, interval, {"fingerprint": IndicatorCache.fingerprint(digests),
+                                            "ticker": ticker, "state": indicators.toJson()})
+        return self.join(data, computed)
+
+    def read(self, key: str, interval: str) -> (dict | None, dict | None):
+        """
+        Reads meta and memory-maps columns of entry. Entry may be replaced or removed by other process at any time,
+        so entry which cannot be read, with columns of other length than its rows or with meta changed while columns
+        were mapped (mapped files stay valid after replacement) is a miss.
+        :return: meta and dictionary of column -> values, (None, None) if entry is missing
+        """
+        path = self.store.path(key, interval)
+        try:
+            meta = self.store.meta(key, interval)
+            cached = {c: np.load(path / f"{c}.npy", mmap_mode='c') for c in meta["columns"]}
+            if any(values.shape != (meta["rows"],) for values in cached.values()) or \
+                    self.store.meta(key, interval) != meta:
+                return None, None
+        except (OSError, ValueError, KeyError):
+            return None, None
+        return meta, cached
+
+    @staticmethod
+    def join(data: pd.DataFrame, computed: pd.DataFrame) -> pd.DataFrame:
+        """
+        Indicator columns replace existing columns with the same name (as in Indicators.compute)
+        """
+        if data.columns.isin(computed.columns).any():
+            data = data.drop(columns=list(computed.columns), errors="ignore")
+        return pd.concat([data, computed], axis=1)
+
+    def save(self, computed: pd.DataFrame, key: str, interval: str, extra: dict) -> None:
+        """
+        Saves entry and evicts least recently used ones. Cache is best effort - entry which cannot be written (e.g.
+        the same entry is written by other process at the same time) is skipped.
+        """
+        try:
+            self.store.save(computed, key, interval, extra=extra)
+        except OSError:
+            return
+        IndicatorCache.touch(self.store.path(key, interval))
+        self.evict(self.store.path(key, interval))
+
+    @staticmethod
+    def touch(path: Path) -> None:
+        """
+        Marks entry as used now, time of last use is kept as modification time of its meta.json (set explicitly, as
+        times set by file system may be too coarse to order entries used one after another). Entry replaced or removed
+        by other process meanwhile is skipped.
+        """
+        now = time.time_ns()
+        try:
+            os.utime(path / "meta.json", ns=(now, now))
+        except FileNotFoundError:
+            pass
+
+    def entries(self) -> list:
+        """
+        :return: list of (last use time, size in bytes, path) of all entries, least recently used first (entries
+                 removed by other process while listed are skipped)
+        """
+        entries = []
+        for metaPath in self.store.folderPath.glob("*/*/meta.json"):
+            path = metaPath.parent
+            if path.suffix in [".tmp", ".old"]:
+                continue
+            try:
+                size = sum(f.stat().st_size for f in path.iterdir())
+                entries.append((metaPath.stat().st_mtime_ns, size, path))
+            except FileNotFoundError:
+                continue
+        return sorted(entries)
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: (Path | None) = None) -> None:
+        """
+        Removes least recently used entries until all of them fit in maxBytes
+        :param keep: entry which is never removed (e.g. just saved one)
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        shutil.rmtree(self.store.folderPath, ignore_errors=True)
@@ -0,0 +1,98 @@
+"""
+File containing in-process cache of stock prices. Series loaded from CSV files, columnar store or database are kept
+in memory (least recently used ones are dropped above memory budget), so the same series is read from disk only once
+per process. Writers (Yahoo.appendToExistingData, StockPriceDb.save) invalidate cached series of written
+(ticker, interval).
+"""
+from __future__ import annotations
+from collections import OrderedDict
+import threading
+import pandas as pd
+
+
+class PriceCache(object):
+
+    def __init__(self, maxBytes: int = 256 * 2 ** 20):
+        """
+        :param maxBytes: memory budget of all cached series
+        """
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "bytes": 0}
+
+    @staticmethod
+    def size(data: pd.DataFrame) -> int:
+        return int(data.memory_usage(index=True, deep=False).sum())
+
+    def get(self, source, ticker: str, interval: str, version=None) -> (pd.DataFrame | None):
+        """
+        :param source: origin of series, e.g. CSV file path or database engine (the same (ticker, interval) may be
+                       cached for many sources)
+        :param version: e.g. modification time of source file, cached series of other version is not returned
+        :return: cached series (shallow copy, so adding columns to it does not change cached one) or None
+        """
+        key = (source, ticker, interval)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] != version:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0].copy(deep=False)
+
+    def put(self, source, ticker: str, interval: str, data: pd.DataFrame, version=None) -> pd.DataFrame:
+        """
+        Caches series and evicts least recently used ones above memory budget. Series larger than the whole budget
+        is not cached.
+        :return: data
+        """
+        key, size = (source, ticker, interval), PriceCache.size(data)
+        with self.lock:
+            self.remove(key)
+            if size > self.maxBytes:
+                return data
+            self.entries[key] = (data.copy(deep=False), version, size)
+            self.stats["bytes"] += size
+            while self.stats["bytes"] > self.maxBytes:
+                self.remove(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+        return data
+
+    def load(self, source, ticker: str, interval: str, loader, version=None) -> pd.DataFrame:
+        """
+        Returns cached series or loads and caches it
+        :param loader: function() -> series, called on miss
+        """
+        data = self.get(source, ticker, interval, version)
+        if data is None:
+            data = self.put(source, ticker, interval, loader(), version).copy(deep=False)
+        return data
+
+    def remove(self, key: tuple) -> None:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.stats["bytes"] -= entry[2]
+
+    def invalidate(self, ticker: str, interval: str) -> None:
+        """
+        Drops series of (ticker, interval) from all sources, called whenever it is written
+        """
+        with self.lock:
+            for key in [k for k in self.entries if k[1:] == (ticker, interval)]:
+                self.remove(key)
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.stats = {name: 0 for name in self.stats}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+""" Cache shared by whole process """
+priceCache = PriceCache()
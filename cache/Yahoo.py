@@ -1,13 +1,16 @@
 """
 File containing classes and methods to interact with Yahoo's API.
 """
-import dateutil.parser
 import pandas as pd
 import datetime as dt
 import yfinance as yf
 import os
+from pathlib import Path
 
+import interface
 import stockPrice
+from cache.ColumnarStore import ColumnarStore
+from cache.PriceCache import priceCache
 
 
 pd.set_option("display.max_columns", None)
@@ -27,15 +30,32 @@ class Yahoo(object):
         self.stockPrice = None
         self.interval = interval
         self.correctIntervals = ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"]
+        self.store = ColumnarStore()
 
     def getSP(self):
         return self.stockPrice
 
+    @interface.timer
     def downloadData(self) -> None:
         """
         Makes API requests and saves ticker data locally.
         :return:
         """
+        tickersData = self.fetchData()
+
+        # create file directory for new time frame
+        if not os.path.exists(f"data/forex/{self.interval}/"):
+            os.mkdir(f"data/forex/{self.interval}/")
+
+        for t, tData in tickersData.items():
+            self.appendToExistingData(tData, f"data/forex/{self.interval}/{t}.csv")
+
+    @interface.timer
+    def fetchData(self) -> dict:
+        """
+        Makes API requests for all tickers, without saving them.
+        :return: dictionary of ticker -> downloaded stock price
+        """
         twoMonthsAgo = (dt.datetime.today() - dt.timedelta(weeks=8)).strftime("%Y-%m-%d")
         twoMonthsAgo = (dt.datetime.today() - dt.timedelta(weeks=1)).strftime("%Y-%m-%d") if "1m" in self.interval else twoMonthsAgo
         maxAvailableStart = self.maxAvailableStartDate()
@@ -48,25 +68,22 @@ class Yahoo(object):
                 f"Please choose one from: {self.correctIntervals}"
             )
 
-        # create file directory for new time frame
-        if not os.path.exists(f"data/forex/{self.interval}/"):
-            os.mkdir(f"data/forex/{self.interval}/")
-
         tickerData = yf.download(self.ticker, start=maxAvailableStart, interval=self.interval)
         tickers = self.ticker.split(' ')
 
         if len(tickers) == 1:
             tickerData.index.tz_localize('Europe/Warsaw')
-            self.appendToExistingData(tickerData, f"data/forex/{self.interval}/{self.ticker}.csv")
-        else:
-            for t in tickers:
-                tData = tickerData.loc[:, (slice(None), t)].droplevel([1], axis=1)
-                try:
-                    tData.index = tData.index.tz_convert('Europe/Warsaw')
-                except TypeError:
-                    tData.index = tData.index.tz_localize('Europe/Warsaw')
-                self.appendToExistingData(tData, f"data/forex/{self.interval}/{t}.csv")
+            return {self.ticker: tickerData}
 
+        tickersData = {}
+        for t in tickers:
+            tData = tickerData.loc[:, (slice(None), t)].droplevel([1], axis=1)
+            tData.index = interface.Utils.convertTZ(tData.index)
+            tickersData[t] = tData
+
+        return tickersData
+
+    @interface.timer
     def loadData(self, ticker: str, **kwargs) -> pd.DataFrame:
         """
         Loads cached stock price data
@@ -79,47 +96,171 @@ class Yahoo(object):
         interval = kwargs.pop('interval', self.interval)
 
         # check if file with correct timeFrame exists, if not getData than proceed
-        try:
-            filePath = f"data/forex/{interval}/{ticker}.csv"
-            self.interval = interval
-            self.stockPrice = pd.read_csv(filePath, index_col=[0], parse_dates=[0])
-        except FileNotFoundError:
+        filePath = f"data/forex/{interval}/{ticker}.csv"
+        self.interval = interval
+        if not os.path.exists(filePath):
             self.ticker = ticker
-            self.interval = interval
             self.downloadData()
-        finally:
-            customDateParser = lambda x: dateutil.parser.parse(x, ignoretz=False)
-            self.stockPrice = pd.read_csv(filePath, index_col=[0], parse_dates=[0], date_parser=customDateParser)
-            try:
-                self.stockPrice.index = self.stockPrice.index.tz_convert('Europe/Warsaw')
-            except TypeError:
-                self.stockPrice.index = self.stockPrice.index.tz_localize('Europe/Warsaw')
+
+        # whole series is read once per process (and version of file), date range is a view of cached series
+        self.stockPrice = priceCache.load(os.path.abspath(filePath), ticker, interval,
+                                          lambda: self.readData(ticker, interval, filePath),
+                                          version=os.path.getmtime(filePath))
 
         # apply date range
         self.stockPrice = stockPrice.StockPrice(self.stockPrice).applyDateRange(starDate, endDate)
 
         return self.stockPrice
 
+    @interface.timer
+    def readData(self, ticker: str, interval: str, filePath: str) -> pd.DataFrame:
+        """
+        Reads whole series from columnar store if it is up to date with CSV file, otherwise from CSV file (which is
+        then saved to columnar store)
+        """
+        if self.store.isFresh(ticker, interval, filePath):
+            return self.store.load(ticker, interval)
+
+        # dates are parsed once, with vectorized fixed format parser, into UTC based index
+        data = pd.read_csv(filePath, index_col=[0])
+        data.index = interface.Utils.parseDates(data.index, 'Europe/Warsaw')
+        try:
+            self.store.save(data, ticker, interval, filePath)
+        except ValueError:
+            # series with columns which cannot be stored (e.g. text) are read from CSV file every time
+            pass
+        return data
+
+    @interface.timer
     def appendToExistingData(self, newData: pd.DataFrame, filePath: str):
         """
-        Appends data to cached stockPrice files
+        Appends data to cached stockPrice files. Only the tail of existing file is read: its last (possibly partial)
+        candle is truncated and replaced with new candles from the same date onwards. Write is crash-safe: rows to
+        append and truncation offset are saved and synced to journal file first (see writeJournal), then replayed on the
+        CSV file. Journal left by interrupted write is replayed on next call.
         :param newData: latest stock price data frame
         :param filePath: path to file where data should be stored
         :return: None
         """
+        # series cached before this write is not returned any more (it is also of older file version)
+        priceCache.invalidate(Path(filePath).stem, Path(filePath).parent.name)
         if not os.path.exists(filePath):
             newData.to_csv(filePath)
-        else:
-            ticker = filePath.split("/")[-1].replace(".csv", "")
-            try:
-                lastFull = newData.index[-4]
-            except IndexError:
-                lastFull = newData.index[-1]
-            oldData = self.loadData(ticker)
-            pd.concat([oldData.iloc[:-1, :],
-                       newData.loc[oldData.index[-1]:, :]])\
-                .dropna()\
-                .to_csv(filePath)
+            return
+
+        self.replayJournal(filePath)
+        columns, lastOffset, lastDate = self.readTail(filePath)
+        newData = newData.copy()
+        newData.index = interface.Utils.convertTZ(newData.index)
+        if lastDate is not None:
+            newData = newData.loc[lastDate:, :]
+        rows = newData.reindex(columns=columns).dropna().to_csv(header=False)
+        if not rows:
+            return
+
+        self.writeJournal(filePath, lastOffset, rows)
+        self.replayJournal(filePath)
+
+    @staticmethod
+    def writeJournal(filePath: str, offset: int, rows: str) -> None:
+        """
+        Saves journal of append: offset at which file is truncated, rows to append and trailer with number of rows
+        and their length in bytes. Journal is written to temporary file, synced and renamed, so journal file is
+        either complete or does not exist.
+        """
+        journalPath, content = f"{filePath}.journal", rows.encode()
+        count = content.count(b"\n")
+        with open(f"{journalPath}.tmp", 'wb') as f:
+            f.write(f"{offset}\n".encode() + content + f"end {count} {len(content)}\n".encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{journalPath}.tmp", journalPath)
+        Yahoo.syncDirectory(journalPath)
+
+    @staticmethod
+    def syncDirectory(filePath: str) -> None:
+        """
+        Syncs directory of file, so its rename (or removal) is durable. Directories cannot be opened on Windows.
+        """
+        try:
+            descriptor = os.open(os.path.dirname(os.path.abspath(filePath)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    @staticmethod
+    def readJournal(journalPath: str) -> (tuple | None):
+        """
+        :return: offset and rows (bytes) of journal, None if journal is incomplete or garbled
+        """
+        with open(journalPath, 'rb') as f:
+            header, _, content = f.read().partition(b"\n")
+        rows, _, trailer = content.rpartition(b"end ")
+        try:
+            offset, (count, length) = int(header), map(int, trailer.decode().split(' '))
+        except (ValueError, UnicodeDecodeError):
+            return None
+        if not trailer.endswith(b"\n") or offset < 0 or length != len(rows) or count != rows.count(b"\n"):
+            return None
+        return offset, rows
+
+    @staticmethod
+    def replayJournal(filePath: str) -> None:
+        """
+        Truncates file at offset saved in journal and appends journal rows. Replaying the same journal again gives the
+        same result, so it is safe to repeat after a crash. Journal which does not pass validation of its trailer (or
+        points beyond end of file) is discarded without changing the file.
+        """
+        journalPath = f"{filePath}.journal"
+        if os.path.exists(f"{journalPath}.tmp"):
+            os.remove(f"{journalPath}.tmp")
+        if not os.path.exists(journalPath):
+            return
+        journal = Yahoo.readJournal(journalPath)
+
+        if journal is not None and journal[0] <= os.path.getsize(filePath):
+            offset, rows = journal
+            with open(filePath, 'r+b') as f:
+                f.truncate(offset)
+                f.seek(offset)
+                f.write(rows)
+                f.flush()
+                os.fsync(f.fileno())
+        os.remove(journalPath)
+        Yahoo.syncDirectory(journalPath)
+
+    @staticmethod
+    def readTail(filePath: str, blockSize: int = 4096) -> (list, int, (pd.Timestamp | None)):
+        """
+        Reads header and last row of CSV file without reading rows in between
+        :return: data columns (without index), offset where last row starts, date of last row (None if no rows)
+        """
+        with open(filePath, 'rb') as f:
+            header = f.readline()
+            headerEnd = f.tell()
+            size = end = f.seek(0, os.SEEK_END)
+            if size > headerEnd:
+                f.seek(size - 1)
+                end = size - 1 if f.read(1) == b"\n" else size
+            if end <= headerEnd:
+                return header.decode().rstrip().split(',')[1:], size, None
+
+            start = end
+            while start > headerEnd:
+                start = max(headerEnd, start - blockSize)
+                f.seek(start)
+                block = f.read(end - start)
+                if (newLine := block.rfind(b"\n")) >= 0:
+                    start += newLine + 1
+                    break
+                blockSize *= 2
+            f.seek(start)
+            lastRow = f.read(end - start).decode()
+
+        return header.decode().rstrip().split(',')[1:], start, pd.Timestamp(lastRow.split(',')[0])
 
     def maxAvailableStartDate(self):
         if self.interval in ["1m"]:
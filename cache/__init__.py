@@ -1,2 +1,6 @@
+from .ColumnarStore import ColumnarStore
+from .IndicatorCache import IndicatorCache
+from .PriceCache import PriceCache, priceCache
 from .Yahoo import *
+from .DownloadPipeline import DownloadPipeline, CsvProvider
 from .DailyDownload import run
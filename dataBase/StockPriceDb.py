@@ -5,11 +5,14 @@ File containing methods for connection to databases for Trade class
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
+import datetime as dt
+import numpy as np
 import pymysql
 import sqlalchemy
 import pandas as pd
 
 import interface.Utils
+import stockPrice
 
 if TYPE_CHECKING:
     from interface import dateType
@@ -17,57 +20,254 @@ if TYPE_CHECKING:
 
 class StockPriceDb(object):
 
-    def __init__(self):
+    def __init__(self, engine: (sqlalchemy.engine.Engine | None) = None, batchSize: int = 10000,
+                 useCache: bool = False):
+        """
+        :param engine: SQLAlchemy engine, local MySQL database is used if not provided (e.g. SQLite engine can be
+                       passed instead)
+        :param batchSize: number of rows inserted with one executemany call
+        :param useCache: if True, find of single ticker reads its whole series once per process (kept in
+                         cache.priceCache) and selects date range and columns from it in memory
+        """
         def conn():
             return pymysql.connect(user='root',
                                    password='root12345',
                                    host='127.0.0.1',
                                    database='technical_analyzer')
         self.connection = conn
-        self.engine = sqlalchemy.create_engine('mysql+pymysql://', creator=self.connection)
+        self.engine = engine if engine is not None else sqlalchemy.create_engine('mysql+pymysql://',
+                                                                                 creator=self.connection)
+        self.batchSize = batchSize
+        self.useCache = useCache
+        self.tables = {}
 
-    def findByTickerInterval(self, ticker: str, interval: str) -> pd.DataFrame:
-        storedData = pd.read_sql(f'''SELECT * FROM {interval}
-                                    WHERE Ticker="{ticker}"''',
-                                 con=self.engine,
-                                 parse_dates=["Datetime"]).set_index("Datetime").drop(columns=["ID"])
+    def table(self, interval: str, columns: (list | None) = None) -> sqlalchemy.Table:
+        """
+        Returns (reflected) table for interval. If it does not exist and columns are provided, it is created.
+        """
+        if interval not in self.tables:
+            if columns is not None and not sqlalchemy.inspect(self.engine).has_table(interval):
+                self.createTable(interval, columns)
+            self.tables[interval] = sqlalchemy.Table(interval, sqlalchemy.MetaData(), autoload_with=self.engine)
+
+        return self.tables[interval]
+
+    def createTable(self, interval: str, columns: list) -> None:
+        table = sqlalchemy.Table(interval, sqlalchemy.MetaData(),
+                                 sqlalchemy.Column("ID", sqlalchemy.Integer, primary_key=True, autoincrement=True),
+                                 sqlalchemy.Column("Datetime", sqlalchemy.DateTime),
+                                 *[sqlalchemy.Column(c, sqlalchemy.Float) for c in columns
+                                   if c not in ["Datetime", "Ticker"]],
+                                 sqlalchemy.Column("Ticker", sqlalchemy.String(16)))
+        table.create(self.engine)
+        self.createIndex(table)
+
+    def createIndex(self, table: sqlalchemy.Table) -> bool:
+        """
+        Creates composite (Ticker, Datetime) index on interval table, if it does not exist yet
+        :return: True if index was created
+        """
+        name = f"ix_{table.name}_ticker_datetime"
+        if name in [i["name"] for i in sqlalchemy.inspect(self.engine).get_indexes(table.name)]:
+            return False
+        sqlalchemy.Index(name, table.c.Ticker, table.c.Datetime).create(self.engine)
+        return True
+
+    def migrate(self, intervals: (list | None) = None) -> list:
+        """
+        Adds composite (Ticker, Datetime) index to existing interval tables.
+        :param intervals: tables to migrate, all existing tables if not provided
+        :return: list of tables on which index was created
+        """
+        intervals = sqlalchemy.inspect(self.engine).get_table_names() if intervals is None else intervals
+        return [interval for interval in intervals if self.createIndex(self.table(interval))]
+
+    def query(self, tickers: (str | list | None), interval: str, startDate: (dateType | None) = None,
+              endDate: (dateType | None) = None, columns: (list | None) = None) -> sqlalchemy.Select:
+        """
+        Builds select of stored candles ordered by ticker and date. Tickers, dates and columns are filtered in
+        database, with bound parameters.
+        :param tickers: ticker or list of tickers, all tickers if None
+        :param interval: table to query
+        :param startDate: first date (inclusive), encoded dates (e.g. 'W-3') are accepted as in StockPrice
+        :param endDate: last date (inclusive)
+        :param columns: columns to select (Datetime is always selected first), all except ID if not provided
+        """
+        table = self.table(interval)
+        columns = [c.name for c in table.columns if c.name not in ["ID", "Datetime"]] if columns is None else columns
+        startDate, endDate = stockPrice.StockPrice(None).interpretDates(startDate or '', endDate or '')
+
+        query = sqlalchemy.select(table.c.Datetime, *[table.c[c] for c in columns])\
+            .order_by(table.c.Ticker, table.c.Datetime)
+        if tickers is not None:
+            query = query.where(table.c.Ticker.in_([tickers] if isinstance(tickers, str) else tickers))
+        if startDate != '':
+            query = query.where(table.c.Datetime >= self.toStoredDate(startDate))
+        if endDate != '':
+            query = query.where(table.c.Datetime <= self.toStoredDate(endDate))
+
+        return query
+
+    @interface.timer
+    def find(self, tickers: (str | list | None), interval: str, startDate: (dateType | None) = None,
+             endDate: (dateType | None) = None, columns: (list | None) = None) -> pd.DataFrame:
+        """
+        Returns stored candles, parameters as in query
+        :return: data frame with DatetimeIndex in Europe/Warsaw time zone
+        """
+        if self.useCache and isinstance(tickers, str):
+            return self.findCached(tickers, interval, startDate, endDate, columns)
+
+        query = self.query(tickers, interval, startDate, endDate, columns)
+        storedData = pd.read_sql(query, con=self.engine, parse_dates=["Datetime"]).set_index("Datetime")
         storedData.index = interface.Utils.convertTZ(storedData.index)
 
         return storedData
 
+    @interface.timer
+    def findCached(self, ticker: str, interval: str, startDate: (dateType | None) = None,
+                   endDate: (dateType | None) = None, columns: (list | None) = None) -> pd.DataFrame:
+        """
+        Selects date range (view) and columns from whole series of ticker cached in process
+        """
+        import cache
+        storedData = cache.priceCache.load(self.engine, ticker, interval,
+                                           lambda: self.find([ticker], interval))
+        startDate, endDate = stockPrice.StockPrice(None).interpretDates(startDate or '', endDate or '')
+        lo, hi = stockPrice.StockPrice.rowRange(storedData.index, startDate, endDate)
+        storedData = storedData.iloc[lo:hi]
+
+        return storedData if columns is None else storedData[columns]
+
+    def stream(self, tickers: (str | list | None), interval: str, startDate: (dateType | None) = None,
+               endDate: (dateType | None) = None, columns: (list | None) = None, chunkSize: int = 50000,
+               overlap: int = 0):
+        """
+        Reads stored candles with server side cursor, so at most chunkSize rows are held in memory at once.
+        Chunks are time-ordered and never mix tickers (tickers are read one after another).
+        :param chunkSize: number of rows fetched from cursor at once
+        :param overlap: number of last rows of previous chunk (of the same ticker) repeated at the beginning of
+                        the next chunk, so window indicators calculated on chunk are correct for its new rows
+        :return: generator of data frames with DatetimeIndex in Europe/Warsaw time zone
+        """
+        for chunk, _ in self._stream(tickers, interval, startDate, endDate, columns, chunkSize, overlap):
+            yield chunk
+
+    def mapChunks(self, function, tickers: (str | list | None), interval: str, startDate: (dateType | None) = None,
+                  endDate: (dateType | None) = None, columns: (list | None) = None, chunkSize: int = 50000,
+                  warmUp: int = 0):
+        """
+        Applies function (e.g. adding indicators) to streamed chunks with bounded memory. Function gets chunk
+        preceded by warmUp rows of the same ticker, only rows of the chunk itself are yielded from its result.
+        :param function: function(data frame) -> data frame with the same index
+        :param warmUp: number of previous rows needed by function, e.g. length - 1 for SMA
+        :return: generator of data frames returned by function
+        """
+        for chunk, newRows in self._stream(tickers, interval, startDate, endDate, columns, chunkSize, warmUp):
+            # span of every chunk, span of whole generator would stay open while consumer runs between chunks
+            with interface.instrumentation.span("StockPriceDb.mapChunks") as span:
+                result = function(chunk).iloc[-newRows:]
+                if interface.instrumentation.enabled:
+                    span.bytes = interface.Instrumentation.sizeOf(result)
+            yield result
+
+    def _stream(self, tickers, interval, startDate, endDate, columns, chunkSize, overlap):
+        """
+        Generator of (chunk, number of rows of chunk not repeated from previous chunk)
+        """
+        columns = [c.name for c in self.table(interval).columns if c.name not in ["ID", "Datetime"]] \
+            if columns is None else columns
+        query = self.query(tickers, interval, startDate, endDate, list(dict.fromkeys(columns + ["Ticker"])))
+        tail = None
+
+        with self.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=chunkSize).execute(query)
+            keys = list(result.keys())
+            for rows in result.partitions():
+                chunk = pd.DataFrame.from_records(rows, columns=keys)
+                chunk.index = interface.Utils.convertTZ(pd.DatetimeIndex(chunk.pop("Datetime"), name="Datetime"))
+                ticker = chunk["Ticker"].to_numpy()
+                bounds = [0, *(np.flatnonzero(ticker[1:] != ticker[:-1]) + 1), len(ticker)]
+                for lo, hi in zip(bounds[:-1], bounds[1:]):
+                    part = chunk.iloc[lo:hi]
+                    if overlap and tail is not None and tail["Ticker"].iloc[-1] == part["Ticker"].iloc[0]:
+                        part = pd.concat([tail, part])
+                    tail = part.iloc[-overlap:]
+                    yield part[columns], hi - lo
+
+    @staticmethod
+    def toStoredDate(date: dateType) -> dt.datetime:
+        """
+        Dates are stored as naive Europe/Warsaw time, provided dates are interpreted as in StockPrice.applyDateRange
+        """
+        return pd.to_datetime(date, utc=True).tz_convert("Europe/Warsaw").tz_localize(None).to_pydatetime()
+
+    def findByTickerInterval(self, ticker: str, interval: str) -> pd.DataFrame:
+        return self.find(ticker, interval)
+
+    @interface.timer
     def deleteByTickerInterval(self, ticker: str, interval: str) -> None:
-        self.engine.execute(f'''DELETE FROM {interval}
-                                WHERE Ticker="{ticker}"''')
+        import cache
+        table = self.table(interval)
+        with self.engine.begin() as connection:
+            connection.execute(sqlalchemy.delete(table).where(table.c.Ticker == ticker))
+        cache.priceCache.invalidate(ticker, interval)
 
+    @interface.timer
     def save(self, newData: pd.DataFrame, ticker: str, interval) -> None:
-        newData.columns = [x.replace(' ', '_') for x in newData.columns]
-        newData["Ticker"] = ticker
+        """
+        Saves new candles of ticker. Only candles from the last stored one onwards are written: the last stored
+        candle (possibly not finished when it was saved) is deleted and replaced together with newer candles.
+        Delete and batched inserts are done in one transaction, after which series of ticker cached in process is
+        invalidated.
+        :param newData: stock price with DatetimeIndex
+        """
+        import cache
+        if newData.empty:
+            return
+        try:
+            self.write(newData, ticker, interval)
+        finally:
+            cache.priceCache.invalidate(ticker, interval)
+
+    def write(self, newData: pd.DataFrame, ticker: str, interval) -> None:
+        """
+        Replaces candles from the last stored one onwards in one transaction, see save
+        """
+        newData = newData.rename(columns=lambda x: x.replace(' ', '_'))
+        newData.index = interface.Utils.convertTZ(newData.index).tz_localize(None).rename("Datetime")
+        table = self.table(interval, list(newData.columns))
+        columns = [c.name for c in table.columns if c.name in newData.columns]
 
-        storedData = self.findByTickerInterval(ticker, interval)
-        newData = pd.concat([storedData.loc[:newData.index[0], :],
-                             newData]).reset_index().rename(columns={"index": "Datetime"})
-        self.deleteByTickerInterval(ticker, interval)
+        with self.engine.begin() as connection:
+            storedMax = connection.execute(sqlalchemy.select(sqlalchemy.func.max(table.c.Datetime))
+                                           .where(table.c.Ticker == ticker)).scalar()
+            cutoff = newData.index[0] if storedMax is None else max(newData.index[0], pd.Timestamp(storedMax))
+            if cutoff > newData.index[-1]:
+                return
+            newData = newData.loc[cutoff:, columns]
+            connection.execute(sqlalchemy.delete(table).where(table.c.Ticker == ticker,
+                                                              table.c.Datetime >= cutoff.to_pydatetime()))
 
-        newData.to_sql(name=interval, con=self.engine, if_exists='append', index=False)
+            records = newData.astype(object).where(newData.notna(), None)
+            records = [{"Datetime": d.to_pydatetime(), "Ticker": ticker, **r}
+                       for d, r in zip(newData.index, records.to_dict("records"))]
+            for i in range(0, len(records), self.batchSize):
+                connection.execute(sqlalchemy.insert(table), records[i:i + self.batchSize])
 
     def findByTicker(self, ticker: str, interval: str) -> pd.DataFrame:
         # returns all data for one ticker and interval
-        return pd.read_sql(f'''SELECT * FROM {interval}
-                                WHERE Ticker="{ticker}"''',
-                           con=self.engine,
-                           parse_dates=["Datetime"]).set_index("Datetime")
+        return self.find(ticker, interval)
 
     def findByDateRange(self, startDate: dateType, endDate: dateType, interval: str):
         # returns all stocks from specified date range and interval
-        return pd.read_sql(f'''SELECT * FROM {interval}
-                                WHERE Datetime BETWEEN {startDate} AND {endDate}''',
-                           con=self.engine,
-                           parse_dates=["Datetime"]).set_index("Datetime")
+        return self.find(None, interval, startDate, endDate)
 
     def findByIntervalOnly(self, interval):
         # return all stock data for interval
-        return pd.read_sql(f'''SELECT * FROM {interval}''',
-                           con=self.engine,
-                           parse_dates=["Datetime"]).set_index("Datetime")
+        return self.find(None, interval)
 
 
+if __name__ == '__main__':
+    for migrated in StockPriceDb().migrate():
+        print(f"created (Ticker, Datetime) index on {migrated}")
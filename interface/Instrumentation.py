@@ -0,0 +1,197 @@
+"""
+File containing low-overhead instrumentation: nested timed spans (e.g. around downloads, loads, database queries,
+indicators and backtests) and counters. It is disabled by default, then span and count return at once without
+reading the clock, and may be switched on at runtime. Recorded spans are aggregated into histograms (count, total,
+p50, p99, bytes) and exported to JSON or Chrome trace file (chrome://tracing, https://ui.perfetto.dev).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+import numpy as np
+
+
+class Span(object):
+    __slots__ = ["instrumentation", "name", "bytes", "start", "parent", "depth"]
+
+    def __init__(self, instrumentation: (Instrumentation | None), name: str, size: int = 0):
+        """
+        :param size: bytes of processed data (e.g. loaded data frame), may be also set inside the span as span.bytes
+        """
+        self.instrumentation = instrumentation
+        self.name = name
+        self.bytes = size
+
+    def __enter__(self) -> Span:
+        if self.instrumentation is not None:
+            self.instrumentation.enter(self)
+        return self
+
+    def __exit__(self, *exception) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.exit(self)
+
+
+class Instrumentation(object):
+    """ Span returned while disabled, it does nothing """
+    noSpan = Span(None, '')
+
+    def __init__(self, enabled: bool = False, maxEvents: int = 10 ** 6):
+        """
+        :param enabled: whether spans and counters are recorded
+        :param maxEvents: number of spans kept for trace export, all spans are always aggregated into histograms
+        """
+        self.enabled = enabled
+        self.maxEvents = maxEvents
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.origin = time.perf_counter_ns()
+        self.events = []
+        self.durations = {}
+        self.bytes = {}
+        self.counters = {}
+        self.dropped = 0
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    @contextmanager
+    def recording(self, reset: bool = True):
+        """
+        Enables instrumentation inside with block, e.g. with instrumentation.recording(): Strategy(...).executeTrades()
+        :param reset: whether spans and counters recorded before are dropped
+        """
+        if reset:
+            self.reset()
+        enabled, self.enabled = self.enabled, True
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+    def reset(self) -> None:
+        with self.lock:
+            self.origin = time.perf_counter_ns()
+            self.events, self.durations, self.bytes, self.counters = [], {}, {}, {}
+            self.dropped = 0
+
+    def span(self, name: str, size: int = 0) -> Span:
+        """
+        Times with block, e.g. with instrumentation.span("Yahoo.downloadData") as span: ...; span.bytes = size.
+        Spans opened inside the block (in the same thread) are its children.
+        """
+        if not self.enabled:
+            return Instrumentation.noSpan
+        return Span(self, name, size)
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def stack(self) -> list:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def enter(self, span: Span) -> None:
+        stack = self.stack()
+        span.parent = stack[-1].name if stack else None
+        span.depth = len(stack)
+        stack.append(span)
+        span.start = time.perf_counter_ns()
+
+    def exit(self, span: Span) -> None:
+        end = time.perf_counter_ns()
+        stack = self.stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self.lock:
+            self.durations.setdefault(span.name, []).append(end - span.start)
+            self.bytes[span.name] = self.bytes.get(span.name, 0) + int(span.bytes or 0)
+            if len(self.events) < self.maxEvents:
+                self.events.append((span.name, span.start - self.origin, end - span.start, threading.get_ident(),
+                                    span.depth, span.parent, span.bytes))
+            else:
+                self.dropped += 1
+
+    @staticmethod
+    def sizeOf(value) -> int:
+        """
+        :return: size in bytes of data frame, series, array or StockPrice (0 for other values)
+        """
+        if hasattr(value, "getSP"):
+            value = value.getSP()
+        if hasattr(value, "memory_usage"):
+            usage = value.memory_usage(index=True, deep=False)
+            return int(usage.sum() if hasattr(usage, "sum") else usage)
+        return int(getattr(value, "nbytes", 0))
+
+    def histograms(self) -> dict:
+        """
+        Aggregates spans of every name. Times are in milliseconds, buckets count spans by power of two microseconds
+        (bucket k holds durations from 2^(k-1) to 2^k us).
+        :return: dictionary of name -> {count, total, mean, p50, p99, max, bytes, buckets}
+        """
+        with self.lock:
+            durations = {name: np.array(values, dtype=np.float64) for name, values in self.durations.items()}
+            sizes = dict(self.bytes)
+
+        histograms = {}
+        for name, values in durations.items():
+            milliseconds = values / 10 ** 6
+            p50, p99 = np.percentile(milliseconds, [50, 99])
+            buckets = np.bincount(np.ceil(np.log2(np.maximum(values / 10 ** 3, 1))).astype(np.int64))
+            histograms[name] = {"count": int(values.size), "total": float(milliseconds.sum()),
+                                "mean": float(milliseconds.mean()), "p50": float(p50), "p99": float(p99),
+                                "max": float(milliseconds.max()), "bytes": sizes.get(name, 0),
+                                "buckets": {f"<={2 ** k}us": int(c) for k, c in enumerate(buckets) if c}}
+        return histograms
+
+    def summary(self) -> dict:
+        return {"histograms": self.histograms(), "counters": dict(self.counters), "dropped": self.dropped}
+
+    def traceEvents(self) -> list:
+        """
+        :return: spans as complete ('X') events of Chrome trace format, times in microseconds
+        """
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        return [{"name": name, "cat": name.split('.')[0], "ph": "X", "ts": start / 10 ** 3, "dur": duration / 10 ** 3,
+                 "pid": pid, "tid": tid, "args": {"depth": depth, "parent": parent, "bytes": size}}
+                for name, start, duration, tid, depth, parent, size in events]
+
+    def toJson(self, filePath: str) -> dict:
+        """
+        Saves histograms, counters and all kept spans to JSON file
+        :return: saved dictionary
+        """
+        result = {**self.summary(), "spans": self.traceEvents()}
+        with open(filePath, 'w') as f:
+            json.dump(result, f, indent=1)
+        return result
+
+    def toChromeTrace(self, filePath: str) -> dict:
+        """
+        Saves spans and counters in Chrome trace format
+        :return: saved dictionary
+        """
+        events = self.traceEvents()
+        if self.counters:
+            events.append({"name": "counters", "ph": "C", "ts": (time.perf_counter_ns() - self.origin) / 10 ** 3,
+                           "pid": os.getpid(), "tid": threading.get_ident(), "args": dict(self.counters)})
+        result = {"traceEvents": events, "displayTimeUnit": "ms"}
+        with open(filePath, 'w') as f:
+            json.dump(result, f)
+        return result
+
+
+""" Instrumentation shared by whole process """
+instrumentation = Instrumentation()
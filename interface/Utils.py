@@ -2,18 +2,90 @@
 Contatins class with tools needed to convert/check/asses types and other general use
 function.
 """
+import numpy as np
 import pandas as pd
 
 
 class Utils(object):
+    """ Positions of separators in fixed format ISO-8601 dates: 'YYYY-MM-DD HH:MM:SS' and optional '+HH:MM' offset """
+    dateSeparators = {4: b'-', 7: b'-', 10: b' ', 13: b':', 16: b':'}
+    offsetSeparators = {22: b':'}
+
     @staticmethod
     def convertTZ(dates: (list[pd.DatetimeIndex] | list), timeZone: str = "Europe/Warsaw"):
         if not isinstance(dates, pd.DatetimeIndex):
             dates = pd.DatetimeIndex(dates)
-        try:
-            return dates.tz_convert(timeZone)
-        except TypeError:
+        if dates.tz is None:
             return dates.tz_localize(timeZone)
+        if str(dates.tz) == timeZone:
+            return dates
+        return dates.tz_convert(timeZone)
+
+    @staticmethod
+    def fromUtc(nanoseconds: np.ndarray, timeZone: str = "Europe/Warsaw", name: (str | None) = None) \
+            -> pd.DatetimeIndex:
+        """
+        Creates timezone aware index from int64 UTC nanoseconds without copying or parsing them
+        """
+        return pd.DatetimeIndex(np.asarray(nanoseconds, dtype=np.int64).view("datetime64[ns]"), name=name)\
+            .tz_localize("UTC").tz_convert(timeZone)
+
+    @staticmethod
+    def parseDates(dates, timeZone: str = "Europe/Warsaw") -> pd.DatetimeIndex:
+        """
+        Parses ISO-8601 dates (e.g. '2022-09-27 00:01:00+02:00', as written to cached CSV files) into index in
+        timeZone. Dates of fixed format 'YYYY-MM-DD HH:MM:SS' with optional '+HH:MM' offset are converted with
+        vectorized arithmetic on their characters, other formats are parsed with pd.to_datetime. Dates without
+        offset are treated as local time of timeZone.
+        """
+        name = getattr(dates, "name", None)
+        parsed = Utils.parseFixedDates(np.asarray(dates))
+        if parsed is not None:
+            nanoseconds, utc = parsed
+            if utc:
+                return Utils.fromUtc(nanoseconds, timeZone, name)
+            return pd.DatetimeIndex(nanoseconds.view("datetime64[ns]"), name=name).tz_localize(timeZone)
+
+        try:
+            index = pd.DatetimeIndex(pd.to_datetime(dates, format="ISO8601"), name=name)
+        except ValueError:
+            # mixed UTC offsets (e.g. both sides of daylight saving time change)
+            index = pd.DatetimeIndex(pd.to_datetime(dates, utc=True, format="ISO8601"), name=name)
+        return Utils.convertTZ(index, timeZone).as_unit("ns")
+
+    @staticmethod
+    def parseFixedDates(dates: np.ndarray) -> (tuple | None):
+        """
+        :return: tuple of int64 nanoseconds and flag if they are UTC (dates had offsets) or local time, None if
+                 dates are not strings of fixed format
+        """
+        if dates.ndim != 1 or not dates.size or dates.dtype.kind not in "OUS":
+            return None
+        try:
+            chars = dates.astype("S")
+        except (UnicodeEncodeError, TypeError, ValueError):
+            return None
+        width = chars.dtype.itemsize
+        if width not in [19, 25]:
+            return None
+
+        codes = chars.view(np.uint8).reshape(-1, width)
+        separators = {**Utils.dateSeparators, **(Utils.offsetSeparators if width == 25 else {})}
+        digits = np.ones(width, dtype=bool)
+        digits[list(separators) + ([19] if width == 25 else [])] = False
+        signs = np.where(codes[:, 19] == ord('-'), -1, np.where(codes[:, 19] == ord('+'), 1, 0)) \
+            if width == 25 else np.ones(1, dtype=np.int64)
+        if not (signs.all() and all((codes[:, i] == ord(c)).all() for i, c in separators.items())
+                and ((codes[:, digits] >= ord('0')) & (codes[:, digits] <= ord('9'))).all()):
+            return None
+
+        numbers = codes.astype(np.int64) - ord('0')
+        number = lambda i: numbers[:, i] * 10 + numbers[:, i + 1]
+        seconds = chars.astype("S10").astype("datetime64[D]").astype(np.int64) * 86400 \
+            + number(11) * 3600 + number(14) * 60 + number(17)
+        if width == 25:
+            seconds -= signs * (number(20) * 3600 + number(23) * 60)
+        return seconds * 10 ** 9, width == 25
 
     @staticmethod
     def isFloat(k: (str | float | int)):
@@ -1,3 +1,4 @@
 from .dataTypes import *
+from .Instrumentation import Instrumentation, instrumentation
 from .decorators import *
 from .Utils import Utils
@@ -1,42 +1,68 @@
 """
-Contains decorators, useful for debugging.
+Contains decorators, useful for debugging and profiling.
 """
+from pathlib import Path
 import datetime as dt
-import time
-import os
+import functools
+import logging
+
+from interface.Instrumentation import Instrumentation, instrumentation
 
 
 def debug(func):
+    """
+    Logs arguments and returned value with DEBUG level of function's module logger
+    """
+    logger = logging.getLogger(func.__module__)
+
+    @functools.wraps(func)
     def _wraper(*args, **kwargs):
-        argType = [[type(a), a] for a in args]
-        kwargType = [[type(v), k, v] for k, v in kwargs.items()]
-        print(f"\n##### {func.__name__} #####\nArgs: {argType}\nKwargs: {kwargType}")
+        if not logger.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
+        logger.debug(f"{func.__qualname__} args: {[type(a) for a in args]}, kwargs: "
+                     f"{ {k: type(v) for k, v in kwargs.items()} }")
         val = func(*args, **kwargs)
-        print(f"Returns: {[type(val), val]}")
+        logger.debug(f"{func.__qualname__} returns: {type(val)}")
         return val
 
     return _wraper
 
 
-def timer(func):
+def timer(func=None, *, name: str = ''):
+    """
+    Records span of every call in interface.instrumentation (only when it is enabled), named after function
+    (e.g. 'Yahoo.loadData'). Size of returned data frame or array is recorded as bytes of the span.
+    Usage: @timer or @timer(name="...")
+    """
+    if func is None:
+        return functools.partial(timer, name=name)
+    spanName = name or func.__qualname__
+
+    @functools.wraps(func)
     def _timer(*args, **kwargs):
-        start = time.perf_counter()
-        print(args)
-        val = func(*args, **kwargs)
-        print(f"\n##### Function {func.__name__} took: {time.perf_counter() - start} s")
+        if not instrumentation.enabled:
+            return func(*args, **kwargs)
+        with instrumentation.span(spanName) as span:
+            val = func(*args, **kwargs)
+            span.bytes = Instrumentation.sizeOf(val)
         return val
 
     return _timer
 
 
 def log(func):
+    """
+    Appends call of function to data/logs/downloadInfo.txt
+    """
+    @functools.wraps(func)
     def _log(*args, **kwargs):
-        argType = [[type(a), a.__name__] for a in args]
-        kwargType = [[type(v), k, v.__name__] for k, v in kwargs.items()]
-        filePath = os.path("data/logs") / "downloadInfo.txt"
+        argType = [type(a).__name__ for a in args]
+        kwargType = {k: type(v).__name__ for k, v in kwargs.items()}
+        filePath = Path("data/logs") / "downloadInfo.txt"
+        filePath.parent.mkdir(parents=True, exist_ok=True)
         now = dt.datetime.today().strftime("%Y-%m-%d %H:%M:%S")
         with open(filePath, 'a') as f:
-            f.write(f"{now}: {func.__name__} with args: {argType}, kwargs: {kwargType}")
+            f.write(f"{now}: {func.__name__} with args: {argType}, kwargs: {kwargType}\n")
 
         return func(*args, **kwargs)
 
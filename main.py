@@ -1,5 +1,5 @@
 from cache import Yahoo
-from stockPrice import Indicators, Backtesting, StockPrice
+from stockPrice import Backtesting, Portfolio
 from visualization import LineChart
 import cache
 import dataBase
@@ -16,28 +16,31 @@ if __name__ == '__main__':
 
 
     breakpoint()
-    data = dataBase.StockPriceDb().findByTicker("EURUSD=X", "5m")
-    data = StockPrice(data).applyDateRange("W-3", "W-0")
-    # Add indicators
-    eurStock = Indicators(data).addSMA('Close', length=20)\
-        .addSMA('Close', length=150)\
-        .addRSI()\
-        .addMACD()
-    eurStock = eurStock.getSP()
+    # series are read from database once per process (see cache.priceCache)
+    db = dataBase.StockPriceDb(useCache=True)
+    data = db.find("EURUSD=X", "5m", "W-3", "W-0")
+    # Add indicators (reused from data/indicators/ and only extended by new bars on the next run)
+    indicatorCache = cache.IndicatorCache()
+    eurStock = indicatorCache.compute(data, "EURUSD=X", "5m",
+                                      ["Close_sma_20", "Close_sma_150", "Close_rsi", "Close_MACD_12_26"])
     print(eurStock.columns)
 
     # backtesting
     criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
     newHigh = Backtesting.Strategy(eurStock, criteria).executeTrades()
 
-    ent = [t.entryDate for t in newHigh]
-    exi = [t.exitDate for t in newHigh]
-    [print(f"entry: {t.entryDate}, exit: {t.exitDate} ====> {t.profit}") for t in newHigh]
-    print(sum([t.profit for t in newHigh]))
+    print(newHigh.toFrame())
+    print(newHigh.summary())
+
+    # backtesting of all tickers at once
+    frames = {t: indicatorCache.compute(db.find(t, "5m", "W-3", "W-0"), t, "5m",
+                                        ["Close_sma_20", "Close_sma_150", "Close_rsi"]) for t in tickers}
+    print(Portfolio.summary(Portfolio(frames, criteria).run()))
+    print(indicatorCache.stats, cache.priceCache.stats)
 
     # graph results
     lc = LineChart(eurStock)
-    lc.draw(y=["Close", "Close_sma_20", "Close_sma_150"], entries=ent, exits=exi)
+    lc.draw(y=["Close", "Close_sma_20", "Close_sma_150"], entries=newHigh.entryDates, exits=newHigh.exitDates)
 
 
 
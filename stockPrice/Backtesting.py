@@ -9,6 +9,7 @@ import pandas as pd
 from pathlib import Path
 import json
 import os
+import re
 import datetime as dt
 
 import interface
@@ -24,16 +25,26 @@ class StrategyUtils:
     Utilities helpful in backtesting
     """
 
+    compiledCriteria: dict = {}  # file path -> (modification time, CriteriaPlan)
+
     @staticmethod
-    def loadCriteria(strategyName: str) -> pd.DataFrame:
+    def loadCriteria(strategyName: str, compiled: bool = False) -> dict:
         """
         Load criteria for specified strategy.
         :param strategyName: strategy's name, the same as file name
-        :return:
+        :param compiled: if True, criteria contain also 'plan' - CriteriaPlan compiled from them. Plans are
+                         memoized by file path and modification time, so file is read and parsed only once.
+                         Every call returns its own copies of criteria data frames.
+        :return: dictionary with criteria
         """
 
         folderPath = Path(f"input/stretegysCriteria/")
         filePath = folderPath / f"{strategyName}.json"
+        if compiled and filePath.exists():
+            path, modified = str(filePath.resolve()), os.path.getmtime(filePath)
+            cachedModified, plan = StrategyUtils.compiledCriteria.get(path, (None, None))
+            if cachedModified == modified:
+                return dict(StrategyUtils.copyCriteria(plan.criteria), plan=plan)
         try:
             with open(filePath, 'r') as f:
                 criteria = json.load(f)[0]
@@ -41,12 +52,55 @@ class StrategyUtils:
             raise FileNotFoundError(f"There is no strategy criteria for: {strategyName}. "
                                     f"Exisitings strategies include: {os.listdir(folderPath)}")
 
-        # change criteria to dataframe
-        criteria['buyOn'] = pd.DataFrame.from_dict(criteria['buyOn'])
-        criteria['sellOn'] = pd.DataFrame.from_dict(criteria['sellOn'])
+        # change criteria to dataframe, expressions (e.g. "Close > max(Close, 20) and Close_rsi < 70") stay strings
+        for side in ['buyOn', 'sellOn']:
+            if not isinstance(criteria[side], str):
+                criteria[side] = pd.DataFrame.from_dict(criteria[side])
+
+        if compiled:
+            plan = stockPrice.CriteriaPlan(criteria)
+            StrategyUtils.compiledCriteria[path] = (modified, plan)
+            criteria = dict(StrategyUtils.copyCriteria(criteria), plan=plan)
 
         return criteria
 
+    @staticmethod
+    def copyCriteria(criteria: dict) -> dict:
+        """
+        Copies criteria data frames, so changing returned criteria does not change memoized ones
+        """
+        return {k: v.copy() if isinstance(v, pd.DataFrame) else v for k, v in criteria.items()}
+
+    @staticmethod
+    def splitValue(value: str) -> list:
+        """
+        Splits criteria value into tokens e.g. '[30:70]' -> ['30', '70']. Columns of other intervals keep their
+        prefix e.g. '1h:Close_sma_150' -> ['1h:Close_sma_150'].
+        """
+        tokens = []
+        for token in str(value).replace('[', '').replace(']', '').split(':'):
+            if tokens and stockPrice.MultiTimeframe.splitName(f"{tokens[-1]}:{token}")[0] == tokens[-1] and \
+                    not interface.Utils.isFloat(token):
+                tokens[-1] = f"{tokens[-1]}:{token}"
+            else:
+                tokens.append(token)
+
+        return tokens
+
+    @staticmethod
+    def calculateTPSL(sellOn: (pd.DataFrame | list | str)) -> list:
+        """
+        Returns numbers of candles of the two anchored values of sellOn criteria, in order of appearance, e.g.
+        [40.0, 20.0] for rules with values 'SL_40', 'TP_20' or for expression 'Low < SL(40) or High > TP_20'
+        """
+        if isinstance(sellOn, str):
+            values = [a or b for a, b in re.findall(r"\b(?:SL|TP)(?:_(\d+)\b|\(\s*(\d+)\s*\))", sellOn)]
+            if len(values) != 2:
+                raise ValueError(f"sellOn expression has to contain two anchored values (SL and TP e.g. SL(40), "
+                                 f"TP_20), got: {sellOn}")
+            return [float(v) for v in values]
+        return [float(v.split('_')[1]) for v in pd.DataFrame(sellOn)["value"]]
+
     @staticmethod
     def loadOperations() -> dict:
         """
@@ -66,13 +120,13 @@ class StrategyUtils:
         return operations
 
     @staticmethod
-    def isInRange(values: pd.Series, valuesRange: pd.DataFrame) -> pd.Series:
+    def isInRange(values: (pd.Series | np.ndarray), valuesRange: (pd.DataFrame | np.ndarray)) -> np.ndarray:
         """
         Checks which elements are in range
-        :return: pandas Series with True element which where in range
+        :return: numpy array with True element which where in range
         """
-        return pd.DataFrame({"range1": np.greater(values.values.reshape(-1), valuesRange.iloc[:, 0]),
-                            "range2": np.less(values.values.reshape(-1), valuesRange.iloc[:, 1])}).all(axis=1).values
+        values, valuesRange = np.asarray(values).reshape(-1), np.asarray(valuesRange)
+        return np.greater(values, valuesRange[:, 0]) & np.less(values, valuesRange[:, 1])
 
 
 
@@ -99,25 +153,31 @@ class Strategy(stockPrice.StockPrice):
     def getSP(self):
         return super().getSP()
 
-    def executeTrades(self, startDate: dateType = '', endDate: dateType = '', profitType: str = 't'):
+    @d.timer
+    def executeTrades(self, startDate: dateType = '', endDate: dateType = '', profitType: str = 't',
+                      engine: str = 'vectorized'):
         """
-        Runs backtesting for strategy: new high after reversal. Adds to stockPrice dataframe boolean
-        columns Buy and Sell. True in these columns means that in these point in time stock should
-        be bought/sold. Criteria should be a dictionary that consists of at least two keys:
-        ['buyOn', 'sellOn'], values assigned to those keys are data frames with criteria, when all
-        of them are fulfilled than a sign to buy/sell is added.
-        :param criteria:
+        Runs backtesting for strategy: new high after reversal. Criteria should be a dictionary that consists of
+        at least two keys: ['buyOn', 'sellOn'], values assigned to those keys are data frames with criteria, when
+        all of them are fulfilled than a sign to buy/sell is added.
         :param startDate:
         :param endDate:
         :param profitType:
-        :return: self
+        :param engine: 'vectorized' for single pass Simulator, 'loop' for legacy loop which adds to stockPrice
+                       dataframe boolean columns Buy and Sell
+        :return: log of trades
         """
-
+        assert engine in ['vectorized', 'loop']
+        if engine == 'loop' and isinstance(self.criteria['buyOn'], str):
+            raise ValueError("Criteria expressions are supported only by 'vectorized' engine")
         tp, sl = self.calculateTPSL()
         super().applyDateRange(startDate, endDate)
+        if engine == 'vectorized':
+            return stockPrice.Simulator(self).run(profitType, tp, sl)
+
         self.stockPrice = self.applyBuyCriteria(self.criteria['buyOn'], self.stockPrice)
         strategySignals = self.stockPrice.copy()
-        trades = []
+        entries, exits = [], []
 
         while True in strategySignals["Buy"].values:
             self.firstBuyIdx = self.getFirstBuyIndex(strategySignals)
@@ -131,17 +191,12 @@ class Strategy(stockPrice.StockPrice):
                 if self.firstBuyIdx == self.firstSellIdx:
                     strategySignals = strategySignals.iloc[1:, :]
                     continue
-                trades.append(stockPrice.Trade(
-                    self.firstBuyIdx,
-                    self.firstSellIdx,
-                    strategySignals,
-                    profitType,
-                    tp,
-                    sl))
+                entries.append(self.firstBuyIdx)
+                exits.append(self.firstSellIdx)
             strategySignals = strategySignals.loc[self.firstSellIdx:, :]
             strategySignals = self.applyBuyCriteria(self.criteria["buyOn"], strategySignals)
 
-        return trades
+        return stockPrice.TradeLog.fromDates(self.stockPrice, entries, exits, profitType, tp, sl)
 
     def applyBuyCriteria(self, criteria: pd.DataFrame, stockData: pd.DataFrame):
         """
@@ -243,7 +298,7 @@ class Strategy(stockPrice.StockPrice):
             "TP": self.takeProfit
         }
         valueColumns = pd.DataFrame(index=stockPrice.index)
-        values = value.replace('[', '').replace(']', '').split(':')
+        values = StrategyUtils.splitValue(value)
 
         for v in values:
             if isinstance(v, (int | float)) or interface.Utils.isFloat(v):
@@ -262,21 +317,13 @@ class Strategy(stockPrice.StockPrice):
         return valueColumns
 
     def average(self, inputCol: pd.Series, k: int) -> np.array:
-        outputCol = np.repeat(np.nan, k)
-        outputCol = np.append(outputCol, [np.mean(inputCol[i-k: i]) for i in range(k, len(inputCol))])
-        return outputCol
+        return stockPrice.Rolling.mean(inputCol.to_numpy(dtype=float), k)
 
     def minLast(self, inputCol: pd.Series, k: int) -> np.array:
-        k = min(k, inputCol.shape[0])  # prevents returning outputColumn longer than left stockPrice
-        outputCol = np.repeat(np.nan, k)
-        outputCol = np.append(outputCol, [np.min(inputCol[i-k: i]) for i in range(k, len(inputCol))])
-        return outputCol
+        return stockPrice.Rolling.min(inputCol.to_numpy(dtype=float), k)
 
     def maxLast(self, inputCol: pd.Series, k: int) -> np.array:
-        k = min(k, inputCol.shape[0])  # prevents returning outputColumn longer than left stockPrice
-        outputCol = np.repeat(np.nan, k)
-        outputCol = np.append(outputCol, [np.max(inputCol[i-k: i]) for i in range(k, len(inputCol))])
-        return outputCol
+        return stockPrice.Rolling.max(inputCol.to_numpy(dtype=float), k)
 
     def stopLoss(self, inputCol: pd.Series, k: int) -> np.array:
         # get entry price (next candle's open after buy signal)
@@ -290,6 +337,6 @@ class Strategy(stockPrice.StockPrice):
         return outputCol
 
     def calculateTPSL(self):
-        return [float(v.split('_')[1]) for v in self.criteria["sellOn"]["value"]]
+        return StrategyUtils.calculateTPSL(self.criteria["sellOn"])
 
 
@@ -0,0 +1,226 @@
+"""
+File containing compiled strategy criteria. Criteria (JSON rules or expression, see Expression) are parsed once into
+expression tree with resolved operation functions and operands, then evaluated directly over numpy arrays into one
+boolean array.
+"""
+from __future__ import annotations
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+import interface
+import stockPrice
+
+
+Rule = namedtuple("Rule", ["statistic", "operation", "function", "operands", "name"])
+Operand = namedtuple("Operand", ["kind", "name", "value", "param"])
+
+
+class CriteriaPlan(object):
+    """
+    Compiled buyOn/sellOn criteria. Every side is either list of rules (all buyOn rules have to be fulfilled to
+    signal an entry, one sellOn rule is enough to signal an exit) or expression e.g.
+    'Close > max(Close, 20) and Close_rsi < 70'. Operand kinds:
+        - 'const': number e.g. '70'
+        - 'column': existing column e.g. 'Close_sma_20', or column of other interval e.g. '1h:Close_sma_150'
+        - 'window': value calculated over k previous candles e.g. 'max_20', 'avg_10', 'min_5'
+        - 'anchored': value calculated from the candle where evaluated frame starts e.g. 'SL_40', 'TP_20'
+    """
+    sides = {"buyOn": True, "sellOn": False}
+    windowCalculations = {"avg": stockPrice.Rolling.mean,
+                          "max": stockPrice.Rolling.max,
+                          "min": stockPrice.Rolling.min}
+    anchoredCalculations = ["SL", "TP"]
+
+    def __init__(self, criteria: dict, column: str = "Close", chunkSize: int = 65536):
+        """
+        :param criteria: dictionary with 'buyOn' and 'sellOn' criteria (data frames, lists of dicts or expressions)
+        :param column: column from which window/anchored values are calculated
+        :param chunkSize: number of rows evaluated at once by evaluate
+        """
+        self.criteria = criteria
+        self.column = column
+        self.chunkSize = chunkSize
+        self.operations = stockPrice.StrategyUtils.loadOperations()
+        self.rules = {side: [] if isinstance(criteria[side], str) else self.compileRules(pd.DataFrame(criteria[side]))
+                      for side in self.sides}
+        self.expressions = {side: self.compileExpression(side) for side in self.sides}
+        self.dependencies = self.findDependencies()
+
+    def compileRules(self, criteria: pd.DataFrame) -> list:
+        if criteria.empty:
+            return []
+        return [Rule(statistic, operation, self.operations[operation],
+                     tuple(self.compileOperand(v) for v in stockPrice.StrategyUtils.splitValue(value)),
+                     f"{statistic}_{operation}_{value}")
+                for statistic, operation, value in zip(criteria["statistic"], criteria["operation"], criteria["value"])]
+
+    def compileOperand(self, v: str) -> Operand:
+        """
+        Parses single value token. Tokens which are neither numbers nor calculations are treated as column names.
+        """
+        if interface.Utils.isFloat(v):
+            return Operand("const", v, float(v), 0)
+
+        calculation, _, param = v.partition('_')
+        if calculation in self.windowCalculations and param.isdigit():
+            return Operand("window", v, self.windowCalculations[calculation], int(param))
+        if calculation in self.anchoredCalculations and param.isdigit():
+            return Operand("anchored", v, calculation, int(param))
+
+        return Operand("column", v, None, 0)
+
+    def compileExpression(self, side: str) -> stockPrice.Expression:
+        expression = stockPrice.Expression(self.compileOperand, self.column)
+        if isinstance(self.criteria[side], str):
+            return expression.parse(self.criteria[side])
+        return expression.fromRules(self.rules[side], self.sides[side])
+
+    def operands(self, side: (str | None) = None) -> list:
+        """
+        Returns operands (statistics included) of side, or of both sides, in order of appearance
+        """
+        sides = [side] if side else list(self.sides)
+        return [o for s in sides for o in self.expressions[s].operands]
+
+    def findDependencies(self) -> list:
+        """
+        Returns names of columns and window series needed to evaluate the plan
+        """
+        dependencies = []
+        for operand in self.operands():
+            names = [operand.name] if operand.kind in ["column", "window"] else []
+            names += [self.column] if operand.kind in ["window", "anchored"] else []
+            dependencies += [n for n in names if n not in dependencies]
+
+        return dependencies
+
+    def prepare(self, stockPrice: pd.DataFrame) -> dict:
+        """
+        Calculates all dependencies of the plan over whole stock price.
+        :return: dictionary of numpy arrays, one for every dependency
+        """
+        data = {name: stockPrice[name].to_numpy(dtype=float) for name in self.dependencies
+                if name not in self.windowOperands()}
+        return self.addWindows(data)
+
+    def windowOperands(self) -> dict:
+        return {o.name: o for o in self.operands() if o.kind == "window"}
+
+    def addWindows(self, data: dict) -> dict:
+        """
+        Adds window series calculated from data[column], arrays may be 1-D or 2-D (bars x tickers)
+        :return: data
+        """
+        for name, operand in self.windowOperands().items():
+            data[name] = operand.value(data[self.column], operand.param)
+
+        return data
+
+    def operandValues(self, operand: Operand, data: dict, lo: int, hi: int, anchor: int) -> (np.ndarray | float):
+        """
+        Returns operand values for rows [lo, hi), as if they were calculated on frame starting at anchor row.
+        Window values are NaN for k rows after anchor.
+        """
+        if operand.kind == "const":
+            return operand.value
+        if operand.kind == "column":
+            return data[operand.name][lo:hi]
+        if operand.kind == "window":
+            values = data[operand.name][lo:hi]
+            warmUp = min(anchor + operand.param, hi) - lo
+            if warmUp > 0:
+                values = values.copy()
+                values[:warmUp] = np.nan
+            return values
+
+        close = data[self.column]
+        if operand.value == "SL":
+            return close[anchor] - operand.param / 10000
+        return close[anchor + 1] + operand.param / 10000 if anchor + 1 < close.shape[0] else np.nan
+
+    def evaluate(self, side: str, data: dict, lo: int = 0, hi: (int | None) = None, anchor: int = 0) -> np.ndarray:
+        """
+        Evaluates buyOn or sellOn criteria for rows [lo, hi), in chunks of chunkSize rows.
+        :param side: 'buyOn' or 'sellOn'
+        :param data: dictionary returned by prepare
+        :return: boolean array of length hi - lo
+        """
+        hi = len(data[self.dependencies[0]]) if hi is None else hi
+        shape = (hi - lo,) + data[self.dependencies[0]].shape[1:]
+        if hi - lo <= self.chunkSize:
+            result = self.expressions[side].evaluate(lambda o: self.operandValues(o, data, lo, hi, anchor))
+            return result if result.shape == shape else np.full(shape, result)
+
+        result = np.empty(shape, dtype=bool)
+        for start in range(lo, hi, self.chunkSize):
+            end = min(start + self.chunkSize, hi)
+            result[start - lo:end - lo] = self.expressions[side].evaluate(
+                lambda o: self.operandValues(o, data, start, end, anchor))
+
+        return result
+
+    def evaluateAt(self, side: str, data: dict, rows: np.ndarray, columns: np.ndarray, anchors: np.ndarray) \
+            -> np.ndarray:
+        """
+        Evaluates criteria of many tickers at once, every ticker at its own rows and anchor.
+        :param data: dictionary returned by prepare/addWindows with C-ordered 2-D arrays (bars x tickers)
+        :param rows: array of row positions (smaller than number of bars), e.g. tickers x m
+        :param columns: array of ticker (column) positions, broadcastable to rows (e.g. tickers x 1)
+        :param anchors: array of anchor rows, broadcastable to rows (e.g. tickers x 1 for one anchor per ticker)
+        :return: boolean array of the same shape as rows
+        """
+        bars, tickers = data[self.column].shape
+        # every series is gathered once, with flat positions shared by all of them
+        positions, gathered = rows * tickers + columns, {}
+        result = self.expressions[side].evaluate(
+            lambda o: self.operandValuesAt(o, data, rows, columns, anchors, positions, gathered))
+
+        return result if result.shape == rows.shape else np.broadcast_to(result, rows.shape).copy()
+
+    @staticmethod
+    def gather(data: dict, name: str, positions: np.ndarray, gathered: dict) -> np.ndarray:
+        if name not in gathered:
+            gathered[name] = np.take(data[name].ravel(), positions)
+        return gathered[name]
+
+    def operandValuesAt(self, operand: Operand, data: dict, rows: np.ndarray, columns: np.ndarray,
+                        anchors: np.ndarray, positions: np.ndarray, gathered: dict) -> (np.ndarray | float):
+        """
+        Counterpart of operandValues for evaluateAt
+        """
+        if operand.kind == "const":
+            return operand.value
+        if operand.kind == "column":
+            return self.gather(data, operand.name, positions, gathered)
+        if operand.kind == "window":
+            values = self.gather(data, operand.name, positions, gathered)
+            return np.where(rows < anchors + operand.param, np.nan, values)
+
+        close = data[self.column]
+        bars, tickers = close.shape
+        if operand.value == "SL":
+            return np.take(close.ravel(), anchors * tickers + columns) - operand.param / 10000
+        nextClose = np.take(close.ravel(), np.minimum(anchors + 1, bars - 1) * tickers + columns)
+        return np.where(anchors + 1 < bars, nextClose + operand.param / 10000, np.nan)
+
+    def evaluateBar(self, side: str, values: dict) -> bool:
+        """
+        Evaluates buyOn or sellOn criteria for single bar.
+        :param values: dictionary of statistic and operand name (column, window or anchored value, e.g. 'Close',
+                       'Close_sma_20', 'max_20', 'SL_40') -> value at this bar
+        """
+        return bool(self.expressions[side].evaluate(lambda o: o.value if o.kind == "const" else values[o.name]))
+
+    def warmUp(self, side: str) -> (int | None):
+        """
+        Number of rows after anchor, for which criteria values differ from values calculated on whole frame.
+        None if criteria depend on anchor for all rows.
+        """
+        warmUp = 0
+        for operand in self.operands(side):
+            if operand.kind == "anchored":
+                return None
+            warmUp = max(warmUp, operand.param) if operand.kind == "window" else warmUp
+
+        return warmUp
@@ -0,0 +1,262 @@
+"""
+File containing criteria expressions e.g. 'Close > max(Close, 20) and Close_rsi < 70'. Expression is parsed once into
+a tree of nodes, identical subexpressions (e.g. the same comparison used by two rules or window used twice) are
+merged into one node, so they are calculated only once. Tree is evaluated over chunks of rows (temporary arrays of
+a chunk stay in CPU cache), 'and'/'or' skip remaining operands of a chunk once its result is already known.
+Tree is compiled into generated Python function of NumPy calls. JSON criteria rules ('statistic', 'operation',
+'value') are compiled into the same tree.
+"""
+from __future__ import annotations
+from collections import namedtuple
+import ast
+import re
+import numpy as np
+
+import stockPrice
+
+
+Node = namedtuple("Node", ["kind", "function", "children", "operand"])
+
+
+class Expression(object):
+    """
+    Node kinds:
+        - 'operand': leaf with CriteriaPlan Operand (const, column, window or anchored value)
+        - 'compare', 'arithmetic': binary NumPy function of two children
+        - 'not', 'neg': unary NumPy function of one child
+        - 'and', 'or': any number of children
+    """
+    comparisons = {ast.Gt: ">", ast.GtE: ">=", ast.Lt: "<", ast.LtE: "<=", ast.Eq: "=", ast.NotEq: "!="}
+    arithmetic = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+    """ Functions calculated over previous candles of plan column, and values calculated from anchor candle """
+    windowFunctions = ["max", "min", "avg"]
+    anchoredFunctions = ["SL", "TP"]
+    timeframeName = re.compile(r"(?<![\w.])(\d+(?:m|h|d|wk|mo)):([A-Za-z_]\w*)")
+    compiled: dict = {}  # generated source -> function
+
+    def __init__(self, compileOperand, column: str = "Close"):
+        """
+        :param compileOperand: function(token) -> Operand, e.g. CriteriaPlan.compileOperand
+        :param column: column from which window/anchored values are calculated
+        """
+        self.compileOperand = compileOperand
+        self.column = column
+        self.operations = stockPrice.StrategyUtils.loadOperations()
+        self.nodes = []
+        self.ids = {}
+        self.root = None
+        self.function = None
+
+    def node(self, kind: str, function=None, children: tuple = (), operand=None) -> int:
+        """
+        Adds node to the tree, identical node added before is reused
+        :return: node id
+        """
+        node = Node(kind, function, tuple(children), operand)
+        if node not in self.ids:
+            self.ids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return self.ids[node]
+
+    def leaf(self, token: str) -> int:
+        return self.node("operand", operand=self.compileOperand(token))
+
+    def compare(self, operation: str, left: int, right: int) -> int:
+        if operation not in self.operations or operation == "inRange":
+            raise ValueError(f"{operation} is not supported. Please choose from: {list(self.operations)}")
+        return self.node("compare", self.operations[operation], (left, right))
+
+    def combine(self, kind: str, children: list) -> int:
+        """
+        Joins children with 'and'/'or', nested nodes of the same kind are flattened. No children gives constant
+        (True for 'and', False for 'or').
+        """
+        flat = []
+        for child in children:
+            flat += self.nodes[child].children if self.nodes[child].kind == kind else [child]
+        flat = list(dict.fromkeys(flat))
+        if not flat:
+            return self.leaf("1" if kind == "and" else "0")
+        return flat[0] if len(flat) == 1 else self.node(kind, children=tuple(flat))
+
+    def inRange(self, statistic: int, lower: int, upper: int) -> int:
+        return self.combine("and", [self.compare(">", statistic, lower), self.compare("<", statistic, upper)])
+
+    @property
+    def operands(self) -> list:
+        """
+        Operands of all leaves, in order of appearance
+        """
+        return [node.operand for node in self.nodes if node.kind == "operand"]
+
+    def parse(self, text: str) -> Expression:
+        """
+        Parses expression built of: column names (e.g. Close_sma_20, 1h:Close_sma_150), numbers, window values
+        (max(Close, 20) or max_20, also min and avg), anchored values (SL(40) or SL_40, TP(20) or TP_20),
+        inRange(x, lower, upper), arithmetic (+, -, *, /), comparisons (>, >=, <, <=, ==, !=, chained e.g.
+        30 < Close_rsi < 70), 'and', 'or', 'not' and parentheses
+        :return: self
+        """
+        timeframes = {}
+
+        def rename(match: re.Match) -> str:
+            name = f"_timeframe{len(timeframes)}"
+            timeframes[name] = f"{match.group(1)}:{match.group(2)}"
+            return name
+
+        try:
+            tree = ast.parse(Expression.timeframeName.sub(rename, text).strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Incorrect criteria expression: {text}") from e
+        self.root = self.parseNode(tree.body, timeframes)
+        return self.compile()
+
+    def parseNode(self, node: ast.AST, timeframes: dict) -> int:
+        match node:
+            case ast.BoolOp(op=ast.And(), values=values):
+                return self.combine("and", [self.parseNode(v, timeframes) for v in values])
+            case ast.BoolOp(op=ast.Or(), values=values):
+                return self.combine("or", [self.parseNode(v, timeframes) for v in values])
+            case ast.UnaryOp(op=ast.Not(), operand=operand):
+                return self.node("not", np.logical_not, (self.parseNode(operand, timeframes),))
+            case ast.UnaryOp(op=ast.USub(), operand=ast.Constant(value=value)) if isinstance(value, (int, float)):
+                return self.leaf(str(-value))
+            case ast.UnaryOp(op=ast.USub(), operand=operand):
+                return self.node("neg", np.negative, (self.parseNode(operand, timeframes),))
+            case ast.Compare(left=left, ops=ops, comparators=comparators):
+                terms = [self.parseNode(t, timeframes) for t in [left] + comparators]
+                if any(type(op) not in Expression.comparisons for op in ops):
+                    raise ValueError(f"Comparison {ast.unparse(node)} is not supported")
+                return self.combine("and", [self.compare(Expression.comparisons[type(op)], a, b)
+                                            for op, a, b in zip(ops, terms, terms[1:])])
+            case ast.BinOp(left=left, op=op, right=right) if type(op) in Expression.arithmetic:
+                return self.node("arithmetic", Expression.arithmetic[type(op)],
+                                 (self.parseNode(left, timeframes), self.parseNode(right, timeframes)))
+            case ast.Constant(value=value) if isinstance(value, (bool, int, float)):
+                return self.leaf(str(int(value)) if isinstance(value, bool) else str(value))
+            case ast.Name(id=name):
+                return self.leaf(timeframes.get(name, name))
+            case ast.Call(func=ast.Name(id=function), args=args, keywords=[]):
+                return self.parseCall(function, args, timeframes)
+
+        raise ValueError(f"{ast.unparse(node)} is not supported in criteria expression")
+
+    def parseCall(self, function: str, args: list, timeframes: dict) -> int:
+        if function == "inRange" and len(args) == 3:
+            return self.inRange(*[self.parseNode(a, timeframes) for a in args])
+
+        param = args[-1] if args else None
+        if not isinstance(param, ast.Constant) or not isinstance(param.value, int):
+            raise ValueError(f"{function}(...) requires number of candles as the last argument")
+        if function in Expression.windowFunctions and len(args) <= 2:
+            if len(args) == 2 and not (isinstance(args[0], ast.Name) and args[0].id == self.column):
+                raise ValueError(f"Window values are calculated over {self.column}, e.g. {function}({self.column}, "
+                                 f"{param.value})")
+            return self.leaf(f"{function}_{param.value}")
+        if function in Expression.anchoredFunctions and len(args) == 1:
+            return self.leaf(f"{function}_{param.value}")
+
+        raise ValueError(f"{function} is not supported. Please choose from: "
+                         f"{Expression.windowFunctions + Expression.anchoredFunctions + ['inRange']}")
+
+    def fromRules(self, rules: list, allRequired: bool) -> Expression:
+        """
+        Compiles JSON criteria rules, joined with 'and' (allRequired) or 'or'
+        :param rules: list of CriteriaPlan Rule
+        :return: self
+        """
+        checks = []
+        for rule in rules:
+            statistic = self.leaf(rule.statistic)
+            values = [self.node("operand", operand=o) for o in rule.operands]
+            if rule.operation == "inRange" and len(values) == 2:
+                checks.append(self.inRange(statistic, *values))
+            elif len(values) == 1:
+                checks.append(self.compare(rule.operation, statistic, values[0]))
+            else:
+                raise ValueError(f"{rule.name}: {rule.operation} requires "
+                                 f"{'two values' if rule.operation == 'inRange' else 'single value'}")
+        self.root = self.combine("and" if allRequired else "or", checks)
+        return self.compile()
+
+    def generate(self) -> str:
+        """
+        Generates source of function evaluating the tree, as straight-line NumPy calls without walking the tree on
+        every evaluation. Subexpressions used more than once are calculated first into local variables, operands of
+        'and'/'or' are evaluated in nested blocks skipped once result is known.
+        :return: source of function evaluate(value, o, f), where o and f are operands and functions of nodes,
+                 returning boolean array (0-d if all leaves are numbers)
+        """
+        parents = [0] * len(self.nodes)
+        for node in self.nodes:
+            for child in node.children:
+                parents[child] += 1
+        lines, names = [], {}
+
+        def fresh(i: int) -> bool:
+            return self.nodes[i].kind in ["compare", "not", "and", "or"] and parents[i] == 1 and i not in names
+
+        def expression(i: int, indent: str) -> str:
+            if i in names:
+                return names[i]
+            node = self.nodes[i]
+            if node.kind == "operand":
+                return f"value(o[{i}])"
+            if node.kind not in ["and", "or"]:
+                return f"f[{i}]({', '.join(expression(c, indent) for c in node.children)})"
+
+            # first operand is combined in place (while it has the shape of result, a number or anchored values of
+            # one column are not), it is copied unless it is a new boolean array used only here
+            name, check, first = f"n{i}", "any" if node.kind == "and" else "all", node.children[0]
+            copy = "asarray" if fresh(first) else "array"
+            lines.append(f"{indent}{name} = {copy}({expression(first, indent)}, dtype=bool)")
+            for child in node.children[1:]:
+                # remaining operands cannot change result of 'and' without any True ('or' without any False)
+                lines.append(f"{indent}if {'' if check == 'any' else 'not '}{name}.{check}():")
+                indent += "    "
+                value = expression(child, indent)
+                lines.append(f"{indent}{name} = accumulate(logical_{node.kind}, {name}, {value})")
+            return name
+
+        for i in range(len(self.nodes)):
+            if parents[i] > 1:
+                names[i] = code = expression(i, "    ")
+                if code != f"n{i}":
+                    lines.append(f"    n{i} = {code}")
+                    names[i] = f"n{i}"
+        result = expression(self.root, "    ")
+        return "\n".join(["def evaluate(value, o, f):"] + lines + [f"    return asarray({result}, dtype=bool)"])
+
+    @staticmethod
+    def accumulate(function, result: np.ndarray, value) -> np.ndarray:
+        """
+        Combines result with value, in place if result already has shape of both of them (broadcast)
+        """
+        if result.shape == np.broadcast_shapes(result.shape, np.shape(value)):
+            return function(result, value, out=result)
+        return function(result, value)
+
+    def compile(self) -> Expression:
+        """
+        Compiles function evaluating the tree (see generate), functions are memoized by their source, so criteria
+        differing only in operands or operations share compiled function
+        :return: self
+        """
+        source = self.generate()
+        if source not in Expression.compiled:
+            namespace = {"array": np.array, "asarray": np.asarray, "logical_and": np.logical_and,
+                         "logical_or": np.logical_or, "accumulate": Expression.accumulate}
+            exec(source, namespace)
+            Expression.compiled[source] = namespace["evaluate"]
+        operands, functions = [n.operand for n in self.nodes], [n.function for n in self.nodes]
+        evaluate = Expression.compiled[source]
+        self.function = lambda value: evaluate(value, operands, functions)
+        return self
+
+    def evaluate(self, value) -> (np.ndarray | np.bool_):
+        """
+        Evaluates expression, every node at most once
+        :param value: function(Operand) -> array or number, values of leaves
+        :return: new boolean array (0-d if all leaves are numbers)
+        """
+        return self.function(value)
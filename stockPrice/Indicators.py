@@ -1,22 +1,120 @@
 """
 File containing methods for calculating indicator values over time series
 """
+from __future__ import annotations
+import re
+import numpy as np
 import pandas as pd
 from ta.trend import SMAIndicator, EMAIndicator, MACD
 from ta.momentum import RSIIndicator
 from ta.volatility import BollingerBands
 
+import interface
 import stockPrice.StockPrice
+from stockPrice.Kernels import Kernels
+from stockPrice.Rolling import Rolling
+
+
+class Intermediates(object):
+    """
+    Values shared between indicators calculated in one Indicators.compute call, e.g. rolling mean of SMA and
+    Bollinger Bands or EMAs of EMA and MACD are calculated only once. Values are calculated with NumPy kernels
+    ('numpy' backend) or with the same pandas operations as in ta library ('ta' backend).
+    """
+
+    def __init__(self, stockPrice: pd.DataFrame, backend: str = "numpy"):
+        self.stockPrice = stockPrice
+        self.backend = backend
+        self.columns = {}
+        self.values = {}
+
+    def get(self, key: tuple, function) -> np.ndarray:
+        if key not in self.values:
+            self.values[key] = function()
+        return self.values[key]
+
+    def column(self, column: str) -> np.ndarray:
+        """
+        Returns input column, or column derived by other indicator (e.g. MACD line used by MACD signal)
+        """
+        if column not in self.columns:
+            self.columns[column] = self.stockPrice[column].to_numpy(dtype=np.float64)
+        return self.columns[column]
+
+    def sma(self, column: str, length: int) -> np.ndarray:
+        if self.backend == "numpy":
+            return self.get(("sma", column, length), lambda: Kernels.sma(self.column(column), length))
+        return self.get(("sma", column, length),
+                        lambda: pd.Series(self.column(column)).rolling(length, min_periods=length).mean().to_numpy())
+
+    def std(self, column: str, length: int) -> np.ndarray:
+        if self.backend == "numpy":
+            return self.get(("std", column, length), lambda: Kernels.std(self.column(column), length))
+        return self.get(("std", column, length),
+                        lambda: pd.Series(self.column(column)).rolling(length, min_periods=length).std(ddof=0)
+                        .to_numpy())
+
+    def ema(self, column: str, length: int) -> np.ndarray:
+        if self.backend == "numpy":
+            return self.get(("ema", column, length),
+                            lambda: Kernels.ema(self.column(column), 2 / (length + 1), length))
+        return self.get(("ema", column, length),
+                        lambda: pd.Series(self.column(column)).ewm(span=length, min_periods=length, adjust=False)
+                        .mean().to_numpy())
+
+    def wilder(self, column: str, length: int) -> (np.ndarray, np.ndarray):
+        """
+        Wilder's smoothing (EMA with alpha 1/length) of upward and downward moves, used by RSI
+        """
+        def calculate():
+            diff = np.diff(self.column(column), prepend=np.nan)
+            up, down = np.where(diff > 0, diff, 0.0), np.where(diff < 0, -diff, 0.0)
+            if self.backend == "numpy":
+                return tuple(Kernels.ema(d, 1 / length, length) for d in (up, down))
+            return tuple(pd.Series(d).ewm(alpha=1 / length, min_periods=length, adjust=False).mean().to_numpy()
+                         for d in (up, down))
+
+        return self.get(("wilder", column, length), calculate)
 
 
 class Indicators(stockPrice.StockPrice):
+    """ Default parameters of indicators in compute specifications, the same as in add* methods """
+    specDefaults = {"sma": {"length": 20},
+                    "ema": {"length": 10},
+                    "rsi": {"length": 14},
+                    "macd": {"shortMACD": 12, "longMACD": 26, "signalMACD": 9},
+                    "bollinger": {"length": 20, "sdFactor": 2},
+                    "max": {"length": 20},
+                    "min": {"length": 20}}
+    """ Output column names of indicators, mapped back to specifications by parseSpec """
+    namePatterns = [
+        (re.compile(r"^(?P<column>.+)_sma_(?P<length>\d+)$"), "sma"),
+        (re.compile(r"^(?P<column>.+)_ema_(?P<length>\d+)$"), "ema"),
+        (re.compile(r"^(?P<column>.+)_rsi$"), "rsi"),
+        (re.compile(r"^(?P<column>.+)_MACD(_sign|_diff)?_(?P<shortMACD>\d+)_(?P<longMACD>\d+)$"), "macd"),
+        (re.compile(r"^(?P<column>.+)_(mavg|lband|hband|bbiwband|bbihband|bbilband)$"), "bollinger"),
+        (re.compile(r"^(?P<column>.+)_max_(?P<length>\d+)$"), "max"),
+        (re.compile(r"^(?P<column>.+)_min_(?P<length>\d+)$"), "min"),
+    ]
+
+    """ Indicator calculation backends, 'numpy' uses stockPrice.Kernels and 'ta' uses ta library """
+    backends = ["numpy", "ta"]
+    backend = "numpy"
 
-    def __init__(self, stockPrice: pd.DataFrame):
+    def __init__(self, stockPrice: pd.DataFrame, backend: (str | None) = None):
+        """
+        :param stockPrice: stock price data frame
+        :param backend: one of Indicators.backends, Indicators.backend is used if not provided
+        """
         super().__init__(stockPrice)
+        self.backend = backend or Indicators.backend
+        if self.backend not in Indicators.backends:
+            raise ValueError(f"{self.backend} is not supported. Please choose from: {Indicators.backends}")
 
     def getSP(self):
         return super().getSP()
 
+    @interface.timer
     def addSMA(self, column: (str | list) = "Close", length: int = 20, ) -> pd.DataFrame:
         """
         Adds column with SMA values to provided StockPrice DataFrame. SMA is calculated on values from specified
@@ -25,6 +123,8 @@ class Indicators(stockPrice.StockPrice):
         :param length: number of periods used to calculate moving average
         :return: self
         """
+        if self.backend == "numpy":
+            return self.compute([{"indicator": "sma", "column": column, "length": length}])
         column = [column] if isinstance(column, str) else column
         smaInput = self.stockPrice.loc[:, column]
         for s in smaInput:
@@ -34,6 +134,7 @@ class Indicators(stockPrice.StockPrice):
 
         return self
 
+    @interface.timer
     def addEMA(self, column: (str | list) = "Close", length: int = 10) -> pd.DataFrame:
         """
         Adds column with EMA values to provided StockPrice DataFrame. EMA is calculated on values from specified
@@ -42,6 +143,8 @@ class Indicators(stockPrice.StockPrice):
         :param length: number of periods used to calculate moving average
         :return: self
         """
+        if self.backend == "numpy":
+            return self.compute([{"indicator": "ema", "column": column, "length": length}])
         column = [column] if isinstance(column, str) else column
         emaInput = self.stockPrice.loc[:, column]
         for e in emaInput:
@@ -51,6 +154,7 @@ class Indicators(stockPrice.StockPrice):
 
         return self
 
+    @interface.timer
     def addRSI(self, column: (str | list) = "Close", length: int = 14) -> pd.DataFrame:
         """
         Adds columns with RSI values
@@ -58,6 +162,8 @@ class Indicators(stockPrice.StockPrice):
         :param length: number of periods used to calculate RSI (more -> smoother)
         :return: self
         """
+        if self.backend == "numpy":
+            return self.compute([{"indicator": "rsi", "column": column, "length": length}])
         column = [column] if isinstance(column, str) else column
         rsiInput = self.stockPrice.loc[:, column]
         for r in rsiInput:
@@ -67,6 +173,7 @@ class Indicators(stockPrice.StockPrice):
 
         return self
 
+    @interface.timer
     def addMACD(self, column: (str | list) = "Close", **kwargs) -> pd.DataFrame:
         """
         Adds Moving Average Convergence Divergence values
@@ -81,6 +188,9 @@ class Indicators(stockPrice.StockPrice):
                 f"{kwargs} contains not allowed parameters. Please choose from: [longMACD, shortMACD, signalMACD]"
             )
 
+        if self.backend == "numpy":
+            return self.compute([{"indicator": "macd", "column": column, "shortMACD": shortMACD,
+                                  "longMACD": longMACD, "signalMACD": signalMACD}])
         column = [column] if isinstance(column, str) else column
         macdInput = self.stockPrice.loc[:, column]
         for m in macdInput:
@@ -92,21 +202,152 @@ class Indicators(stockPrice.StockPrice):
 
         return self
 
+    @interface.timer
     def addBollingerBands(self, column: (str | list) = "Close", length: int = 20, sdFactor: int = 2):
         """
         Adds Boligner Bands values to data frame. They represent 'price + sd' and 'price - sd'.
         :return:
         """
+        if self.backend == "numpy":
+            return self.compute([{"indicator": "bollinger", "column": column, "length": length, "sdFactor": sdFactor}])
         column = [column] if isinstance(column, str) else column
         bbInput = self.stockPrice.loc[:, column]
         for b in bbInput:
             bOutput = BollingerBands(bbInput[b], window=length, window_dev=sdFactor)
-            bMid = bOutput.bollinger_mavg().rename(f"{b}_{bOutput.bollinger_mavg()}")
-            bHigh = bOutput.bollinger_hband().rename(f"{b}_{bOutput.bollinger_hband()}")
-            bLow = bOutput.bollinger_lband().rename(f"{b}_{bOutput.bollinger_lband()}")
-            bWidth = bOutput.bollinger_wband().rename(f"{b}_{bOutput.bollinger_wband()}")
-            bHighIndic = bOutput.bollinger_hband_indicator().rename(f"{b}_{bOutput.bollinger_hband_indicator()}")
-            bLowIndic = bOutput.bollinger_lband_indicator().rename(f"{b}_{bOutput.bollinger_lband_indicator()}")
+            bMid = bOutput.bollinger_mavg().rename(f"{b}_{bOutput.bollinger_mavg().name}")
+            bHigh = bOutput.bollinger_hband().rename(f"{b}_{bOutput.bollinger_hband().name}")
+            bLow = bOutput.bollinger_lband().rename(f"{b}_{bOutput.bollinger_lband().name}")
+            bWidth = bOutput.bollinger_wband().rename(f"{b}_{bOutput.bollinger_wband().name}")
+            bHighIndic = bOutput.bollinger_hband_indicator().rename(f"{b}_{bOutput.bollinger_hband_indicator().name}")
+            bLowIndic = bOutput.bollinger_lband_indicator().rename(f"{b}_{bOutput.bollinger_lband_indicator().name}")
             self.stockPrice = pd.concat([self.stockPrice, bMid, bLow, bHigh, bWidth, bHighIndic, bLowIndic], axis=1)
 
         return self
+
+    @staticmethod
+    def parseSpec(spec: (dict | str)) -> dict:
+        """
+        Completes indicator specification with default parameters. Output column name (e.g. 'Close_sma_20',
+        'Close_MACD_12_26') can be used instead of dictionary.
+        :return: dictionary with 'indicator', 'column' and all parameters of indicator
+        """
+        if isinstance(spec, str):
+            for pattern, indicator in Indicators.namePatterns:
+                if (match := pattern.match(spec)) is not None:
+                    spec = {"indicator": indicator, **{k: v for k, v in match.groupdict().items() if k != "column"},
+                            "column": match["column"]}
+                    break
+            else:
+                raise ValueError(f"{spec} is not a name of indicator column")
+
+        spec = dict(spec)
+        indicator = spec.pop("indicator").lower()
+        if indicator not in Indicators.specDefaults:
+            raise ValueError(f"{indicator} is not supported. Please choose from: {list(Indicators.specDefaults)}")
+        column = spec.pop("column", "Close")
+        params = {**Indicators.specDefaults[indicator],
+                  **{k: int(v) if isinstance(v, str) else v for k, v in spec.items()}}
+        if params.keys() != Indicators.specDefaults[indicator].keys():
+            raise UserWarning(
+                f"{spec} contains not allowed parameters. "
+                f"Please choose from: {list(Indicators.specDefaults[indicator])}"
+            )
+
+        return {"indicator": indicator, "column": column, **params}
+
+    @staticmethod
+    def outputs(spec: dict, intermediates: Intermediates) -> dict:
+        """
+        Returns functions calculating output columns of single (parsed) specification and single input column
+        :return: dictionary of output column name -> function() -> array
+        """
+        c, i = spec["column"], intermediates
+        match spec["indicator"]:
+            case "sma":
+                return {f"{c}_sma_{spec['length']}": lambda: i.sma(c, spec["length"])}
+            case "ema":
+                return {f"{c}_ema_{spec['length']}": lambda: i.ema(c, spec["length"])}
+            case "rsi":
+                def rsi():
+                    up, down = i.wilder(c, spec["length"])
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        return np.where(down == 0, 100, 100 - (100 / (1 + up / down)))
+                return {f"{c}_rsi": rsi}
+            case "macd":
+                suffix = f"{spec['shortMACD']}_{spec['longMACD']}"
+
+                def macd():
+                    if f"{c}_MACD_{suffix}" not in i.columns:
+                        i.columns[f"{c}_MACD_{suffix}"] = i.ema(c, spec["shortMACD"]) - i.ema(c, spec["longMACD"])
+                    return i.column(f"{c}_MACD_{suffix}")
+
+                def signal():
+                    macd()
+                    return i.ema(f"{c}_MACD_{suffix}", spec["signalMACD"])
+
+                return {f"{c}_MACD_{suffix}": macd,
+                        f"{c}_MACD_sign_{suffix}": signal,
+                        f"{c}_MACD_diff_{suffix}": lambda: macd() - signal()}
+            case "bollinger":
+                def band(sign: int):
+                    return i.sma(c, spec["length"]) + sign * spec["sdFactor"] * i.std(c, spec["length"])
+
+                def width():
+                    return (band(1) - band(-1)) / i.sma(c, spec["length"]) * 100
+
+                def crossing(sign: int):
+                    with np.errstate(invalid="ignore"):
+                        return np.where(sign * i.column(c) > sign * band(sign), 1.0, 0.0)
+
+                return {f"{c}_mavg": lambda: i.sma(c, spec["length"]),
+                        f"{c}_lband": lambda: band(-1),
+                        f"{c}_hband": lambda: band(1),
+                        f"{c}_bbiwband": width,
+                        f"{c}_bbihband": lambda: crossing(1),
+                        f"{c}_bbilband": lambda: crossing(-1)}
+            case "max" | "min":
+                # extremum of previous length values, as max/min statistics of criteria (Rolling)
+                function = Rolling.max if spec["indicator"] == "max" else Rolling.min
+                return {f"{c}_{spec['indicator']}_{spec['length']}": lambda: function(i.column(c), spec["length"])}
+
+    @interface.timer
+    def compute(self, specs: list) -> Indicators:
+        """
+        Adds many indicators at once. Output columns are calculated (with selected backend) into one preallocated
+        array, sharing intermediate values (rolling means, EMAs), and joined with stock price once. Output columns
+        replace existing columns with the same name.
+        :param specs: list of indicator specifications - dictionaries with 'indicator' (sma, ema, rsi, macd,
+                      bollinger, max, min), 'column' (name or list of names, Close by default) and parameters of
+                      matching add* method (length for max/min of previous values), e.g. {"indicator": "macd",
+                      "shortMACD": 12, "longMACD": 26}, or output column names, e.g. 'Close_sma_20', 'Close_rsi',
+                      'Close_MACD_12_26', 'Close_max_20'
+        :return: self
+        """
+        intermediates = Intermediates(self.stockPrice, self.backend)
+        outputs = {}
+        for spec in map(self.parseSpec, specs):
+            for column in [spec["column"]] if isinstance(spec["column"], str) else spec["column"]:
+                outputs.update(self.outputs({**spec, "column": column}, intermediates))
+
+        # rows of values are columns of data frame, pandas keeps them in this layout without copying
+        values = np.empty((len(outputs), len(self.stockPrice.index)), dtype=np.float64)
+        for j, function in enumerate(outputs.values()):
+            values[j] = function()
+
+        computed = pd.DataFrame(values.T, index=self.stockPrice.index, columns=list(outputs), copy=False)
+        self.stockPrice = pd.concat([self.stockPrice.drop(columns=list(outputs), errors="ignore"), computed], axis=1)
+
+        return self
+
+    @interface.timer
+    def addTimeframes(self, names: list, interval: str = '', frames: (dict | None) = None) -> Indicators:
+        """
+        Adds columns of coarser intervals e.g. '1h:Close_sma_150', each of them has value of the last coarser bar
+        closed before (or together with) every bar (see MultiTimeframe)
+        :param names: column names '{interval}:{column}'
+        :param interval: interval of stock price, inferred if not provided
+        :param frames: dictionary of interval -> stock price, intervals not provided are resampled from stock price
+        :return: self
+        """
+        self.stockPrice = stockPrice.MultiTimeframe(self.stockPrice, interval, frames).join(names)
+        return self
@@ -0,0 +1,166 @@
+"""
+File containing NumPy kernels of indicators, used by Indicators with 'numpy' backend. Results are the same (within
+floating point tolerance) as calculated by ta library, including NaN values at the beginning of series.
+Exponential moving average is JIT compiled with Numba when it is installed.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def emaLoop(values: np.ndarray, alpha: float, minPeriods: int, out: np.ndarray) -> None:
+    """
+    Exponential moving average calculated in the same way as pandas ewm(alpha, min_periods, adjust=False), also for
+    series with NaN values. Compiled with Numba if available, without it Kernels.ema uses vectorized version.
+    """
+    weighted, oldWeight, observations = values[0], 1.0, 0
+    for i in range(values.shape[0]):
+        current = values[i]
+        isObservation = current == current
+        observations += isObservation
+        if i > 0:
+            if weighted == weighted:
+                oldWeight *= 1 - alpha
+                if isObservation:
+                    if weighted != current:
+                        weighted = (oldWeight * weighted + alpha * current) / (oldWeight + alpha)
+                    oldWeight = 1.0
+            elif isObservation:
+                weighted = current
+        out[i] = weighted if observations >= max(minPeriods, 1) else np.nan
+
+
+if numba is not None:
+    emaLoop = numba.njit(cache=True)(emaLoop)
+
+
+class Kernels(object):
+    """ Number of output rows calculated from one cumulative sum, limits accumulated rounding error """
+    chunkSize = 4096
+
+    @staticmethod
+    def windowSums(values: np.ndarray, length: int, powers: tuple = (1,)) -> (list, np.ndarray):
+        """
+        Sums of (values - offset) ** power over windows of length ending at every row >= length - 1. Rows are split
+        into chunks, cumulative sum is restarted in every chunk with offset equal to the mean of its values, which
+        keeps sums accurate also for long series.
+        :return: (list of sums for every power, offsets) - arrays of shape (chunks, chunkSize), rows of output are
+                 in row-major order (first len(values) - length + 1 of them are valid)
+        """
+        n = values.shape[0] - length + 1
+        size = max(Kernels.chunkSize, length)
+        chunks = -(-n // size)
+        padded = np.concatenate([values, np.repeat(values[-1], chunks * size - n)])
+        windows = np.lib.stride_tricks.sliding_window_view(padded, size + length - 1)[::size]
+        offsets = windows.mean(axis=1, keepdims=True)
+        deviations = windows - offsets
+
+        sums = []
+        for power in powers:
+            cumulative = np.cumsum(deviations if power == 1 else deviations ** power, axis=1)
+            windowSum = np.empty((chunks, size))
+            windowSum[:, 0] = cumulative[:, length - 1]
+            np.subtract(cumulative[:, length:], cumulative[:, :size - 1], out=windowSum[:, 1:])
+            sums.append(windowSum)
+
+        return sums, offsets
+
+    @staticmethod
+    def rolling(values: np.ndarray, length: int, function) -> np.ndarray:
+        """
+        Applies function(filledValues, length) -> (chunks, chunkSize) array to windows (see windowSums). Rows whose
+        window has less than length values or any NaN value are NaN (as in pandas rolling(length, min_periods=length))
+        """
+        out = np.full(values.shape[0], np.nan)
+        if values.shape[0] < length:
+            return out
+        isNan = np.isnan(values)
+        if not isNan.any():
+            out[length - 1:] = function(values, length).ravel()[:values.shape[0] - length + 1]
+            return out
+        nanCount = np.concatenate([[0], np.cumsum(isNan)])
+        complete = (nanCount[length:] - nanCount[:-length]) == 0
+        calculated = function(np.where(isNan, 0.0, values), length).ravel()[:values.shape[0] - length + 1]
+        out[length - 1:] = np.where(complete, calculated, np.nan)
+
+        return out
+
+    @staticmethod
+    def sma(values: np.ndarray, length: int) -> np.ndarray:
+        def mean(filled, k):
+            (sums,), offsets = Kernels.windowSums(filled, k)
+            sums /= k
+            sums += offsets
+            return sums
+
+        return Kernels.rolling(values, length, mean)
+
+    @staticmethod
+    def std(values: np.ndarray, length: int) -> np.ndarray:
+        """
+        Rolling population standard deviation (ddof=0)
+        """
+        def std(filled, k):
+            (first, second), _ = Kernels.windowSums(filled, k, (1, 2))
+            first /= k
+            second /= k
+            second -= first * first
+            return np.sqrt(np.maximum(second, 0.0, out=second), out=second)
+
+        return Kernels.rolling(values, length, std)
+
+    @staticmethod
+    def ema(values: np.ndarray, alpha: float, minPeriods: int) -> np.ndarray:
+        """
+        Exponential moving average as in pandas ewm(alpha, min_periods, adjust=False), e.g. alpha 2 / (length + 1)
+        for ta's EMA and 1 / length for Wilder's smoothing
+        """
+        out = np.full(values.shape[0], np.nan)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return out
+        if numba is not None:
+            emaLoop(values, alpha, minPeriods, out)
+            return out
+
+        first = int(np.argmax(valid))
+        if not valid[first:].all():
+            # NaN gaps change weights of older values, calculated by pandas
+            return pd.Series(values).ewm(alpha=alpha, min_periods=minPeriods, adjust=False).mean().to_numpy()
+        x = values[first:]
+        start = max(minPeriods, 1) - 1
+        out[first + start:] = Kernels.linearFilter(alpha * x, 1 - alpha, x[0])[start:]
+
+        return out
+
+    @staticmethod
+    def linearFilter(b: np.ndarray, gamma: float, initial: float) -> np.ndarray:
+        """
+        Vectorized first order recursion y[t] = gamma * y[t-1] + b[t], where y[-1] = initial. Series is split into
+        blocks of B rows, inside of which y is cumulative sum scaled by powers of gamma (B is chosen so that
+        gamma ** -B does not exceed 1e12). Values carried between blocks follow the same recursion with gamma ** B,
+        which is solved recursively.
+        """
+        n = b.shape[0]
+        if n == 0 or gamma < 1e-100:
+            return b.copy()
+        size = int(min(max(2, 12 * np.log(10) / -np.log(gamma)), 8192))
+        blocks = -(-n // size)
+        padded = np.zeros(blocks * size)
+        padded[:n] = b
+        padded = padded.reshape(blocks, size)
+
+        powers = gamma ** np.arange(size + 1)
+        local = np.multiply(padded, 1 / powers[:-1], out=padded)
+        np.cumsum(local, axis=1, out=local)
+        local *= powers[:-1]
+        carried = Kernels.linearFilter(local[:, -1], powers[-1], initial) if blocks > 1 else np.empty(0)
+        previous = np.concatenate([[initial], carried[:-1]])
+        local += previous[:, None] * powers[1:]
+
+        return local.ravel()[:n]
@@ -0,0 +1,120 @@
+"""
+File containing multi-timeframe view of stock price. Columns of coarser intervals, named '{interval}:{column}' (e.g.
+'1h:Close_sma_150' - SMA 150 of hourly closes), are calculated once on stock price of that interval and projected
+onto bars of base interval with as-of join: every base bar gets values of the last coarser bar closed not later than
+itself, so no value is taken from the future.
+"""
+from __future__ import annotations
+import re
+import numpy as np
+import pandas as pd
+
+import stockPrice
+
+
+class MultiTimeframe(object):
+    separator = ':'
+
+    def __init__(self, data: pd.DataFrame, interval: str = '', frames: (dict | None) = None,
+                 timeZone: str = "Europe/Warsaw"):
+        """
+        :param data: stock price of base interval
+        :param interval: interval of data (e.g. '5m'), inferred from distance between bars if not provided
+        :param frames: dictionary of interval -> stock price of coarser interval (e.g. loaded from database),
+                       intervals which are not provided are resampled from data
+        :param timeZone: time zone to which buckets of intervals are aligned
+        """
+        self.data = data
+        self.interval = interval or MultiTimeframe.inferInterval(data.index)
+        self.frames = dict(frames or {})
+        self.timeZone = timeZone
+        self.positions = {}
+
+    @staticmethod
+    def splitName(name: str) -> (str, str):
+        """
+        Splits column name into interval and column of that interval e.g. '1h:Close_sma_150' -> ('1h', 'Close_sma_150')
+        :return: ('', name) for columns of base interval
+        """
+        interval, separator, column = name.partition(MultiTimeframe.separator)
+        if separator and column and re.fullmatch(r"\d+(m|h|d|wk|mo)", interval):
+            return interval, column
+        return '', name
+
+    @staticmethod
+    def inferInterval(index: pd.DatetimeIndex) -> str:
+        """
+        Returns interval from the most common distance between consecutive bars e.g. '5m', '1h', '1d' (the shortest
+        one is not used, as there may be irregular bars, e.g. the last, not finished one)
+        """
+        distances = np.diff(pd.DatetimeIndex(index).as_unit("s").asi8)
+        distances = distances[distances > 0]
+        if distances.size == 0:
+            raise ValueError("Interval cannot be inferred from less than two bars, please provide it")
+
+        values, counts = np.unique(distances, return_counts=True)
+        seconds = int(values[np.argmax(counts)])
+        if seconds < 86400:
+            return f"{seconds // 3600}h" if seconds % 3600 == 0 else f"{seconds // 60}m"
+        if seconds < 7 * 86400:
+            return "1d"
+        return "1wk" if seconds < 28 * 86400 else "1mo"
+
+    def frame(self, interval: str) -> pd.DataFrame:
+        """
+        Returns stock price of interval, resampled from base one if it was not provided
+        """
+        if interval not in self.frames:
+            if not stockPrice.Resampler.nests(self.interval, interval):
+                raise ValueError(f"{interval} cannot be resampled from {self.interval}, please provide it in frames")
+            self.frames[interval] = stockPrice.Resampler.resample(self.data, interval, self.timeZone)
+        return self.frames[interval]
+
+    def position(self, interval: str) -> np.ndarray:
+        """
+        As-of join of bars: for every base bar, position of the last bar of interval closed at or before base bar
+        is closed (-1 if there is none). Bars are closed interval after their start (see Resampler.barEnds), so
+        provided frames do not have to be aligned to local midnight.
+        """
+        if interval not in self.positions:
+            frame = self.frame(interval)
+            ends = stockPrice.Resampler.barEnds(frame.index, interval, self.timeZone)
+            baseEnds = stockPrice.Resampler.barEnds(self.data.index, self.interval, self.timeZone)
+            self.positions[interval] = np.searchsorted(ends, baseEnds, side="right") - 1
+        return self.positions[interval]
+
+    def columns(self, names: list) -> pd.DataFrame:
+        """
+        Calculates columns of coarser intervals, indicators missing in stock price of an interval are added to it
+        (all at once, and only once)
+        :param names: column names e.g. ['1h:Close_sma_150', '1h:Close_rsi', '1d:High']
+        :return: data frame with base index and one column for every name
+        """
+        byInterval = {}
+        for name in names:
+            interval, column = MultiTimeframe.splitName(name)
+            if not interval:
+                raise ValueError(f"{name} is not a column of other interval, use '{{interval}}:{{column}}'")
+            byInterval.setdefault(interval, []).append(column)
+
+        columns = {}
+        for interval, intervalColumns in byInterval.items():
+            frame = self.frame(interval)
+            missing = [c for c in dict.fromkeys(intervalColumns) if c not in frame.columns]
+            if missing:
+                frame = self.frames[interval] = stockPrice.Indicators(frame).compute(missing).getSP()
+            position = self.position(interval)
+            for column in intervalColumns:
+                values = frame[column].to_numpy(dtype=np.float64)
+                columns[f"{interval}{MultiTimeframe.separator}{column}"] = \
+                    np.where(position >= 0, values[np.maximum(position, 0)], np.nan) if values.size \
+                    else np.full(position.shape, np.nan)
+
+        return pd.DataFrame(columns, index=self.data.index)
+
+    def join(self, names: list) -> pd.DataFrame:
+        """
+        :return: base stock price with columns of coarser intervals added (replacing existing ones)
+        """
+        columns = self.columns(names)
+        return pd.concat([self.data.drop(columns=list(columns.columns), errors="ignore"), columns], axis=1)
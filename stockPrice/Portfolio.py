@@ -0,0 +1,241 @@
+"""
+File containing backtest of one strategy over many tickers at once. Criteria are evaluated on 2-D arrays
+(bars x tickers) and entries/exits of all tickers are searched in lockstep, so cost of the whole portfolio grows with
+the largest number of trades of a single ticker rather than with the sum of them.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import numpy as np
+import pandas as pd
+
+import stockPrice
+
+if TYPE_CHECKING:
+    from interface import dateType
+
+
+class Portfolio(object):
+    """
+    Produces the same trades for every ticker as Strategy.executeTrades run separately. Column of every 2-D array
+    holds bars of one ticker in order (shorter histories are padded with NaN at the end), so window values and
+    anchors count bars of that ticker only. Results of all tickers are aligned on shared index (union of their
+    dates) - see aggregate and equity.
+    """
+
+    def __init__(self, stockPrices: dict, criteria: dict, **kwargs):
+        """
+        :param stockPrices: dictionary of ticker -> stock price with columns required by criteria
+        :param criteria: dictionary with 'buyOn' and 'sellOn' criteria (and optionally compiled 'plan')
+        :param kwargs: chunkSize - number of rows checked at once when looking for a signal, doubled after every miss
+        """
+        self.stockPrices = stockPrices
+        self.tickers = list(stockPrices.keys())
+        self.criteria = criteria
+        self.plan = criteria.get("plan") or stockPrice.CriteriaPlan(criteria)
+        self.takeProfit, self.stopLoss = stockPrice.StrategyUtils.calculateTPSL(criteria["sellOn"])
+        self.chunkSize = kwargs.pop("chunkSize", 64)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.data = {}
+        self.entryRows = None
+        self.buyTables = []
+
+        if kwargs:
+            raise UserWarning(f"{kwargs} contains not allowed parameters. Please choose from: [chunkSize]")
+
+    @staticmethod
+    def sharedIndex(stockPrices: dict) -> pd.DatetimeIndex:
+        """
+        Union of dates of all tickers
+        """
+        index = None
+        for data in stockPrices.values():
+            index = data.index if index is None else index.union(data.index)
+        return index
+
+    def prepare(self, frames: dict) -> dict:
+        """
+        Builds 2-D arrays (bars x tickers) of criteria dependencies and window values
+        """
+        self.lengths = np.array([len(f.index) for f in frames.values()], dtype=np.int64)
+        bars = int(self.lengths.max(initial=0))
+        windows = self.plan.windowOperands()
+        data = {}
+        for name in self.plan.dependencies:
+            if name in windows:
+                continue
+            data[name] = np.full((bars, len(frames)), np.nan)
+            for j, frame in enumerate(frames.values()):
+                data[name][:self.lengths[j], j] = frame[name].to_numpy(dtype=float)
+
+        return self.plan.addWindows(data)
+
+    def run(self, startDate: dateType = '', endDate: dateType = '', profitType: str = 't') -> dict:
+        """
+        Runs backtest for all tickers
+        :return: dictionary of ticker -> TradeLog
+        """
+        frames = {t: stockPrice.StockPrice(self.stockPrices[t]).applyDateRange(startDate, endDate)
+                  for t in self.tickers}
+        self.data = self.prepare(frames)
+        entries, exits = self.walk()
+
+        return {t: stockPrice.TradeLog.fromPositions(frames[t], entries[j], exits[j], profitType, self.takeProfit,
+                                                     self.stopLoss)
+                for j, t in enumerate(self.tickers)}
+
+    def walk(self) -> (list, list):
+        """
+        Walks entries and exits of all tickers in lockstep, every step finds next trade of every active ticker
+        :return: lists (one per ticker) of entry and exit rows
+        """
+        tickers = len(self.tickers)
+        warmUp = self.plan.warmUp("buyOn")
+        self.entryRows = self.sellOnEntry()
+        if warmUp is not None and self.lengths.size:
+            self.buyTables = self.nextBuyTables()
+
+        position, anchor = np.zeros(tickers, dtype=np.int64), np.zeros(tickers, dtype=np.int64)
+        active = self.lengths > 0
+        steps = []
+        while active.any():
+            columns = np.flatnonzero(active)
+            entry = self.nextBuy(columns, position[columns], anchor[columns], warmUp is None)
+            found = entry < self.lengths[columns]
+            active[columns[~found]] = False
+            columns, entry = columns[found], entry[found]
+
+            exit = self.search("sellOn", columns, entry + 1, entry, self.lengths[columns])
+            sold = (exit < self.lengths[columns]) & (exit != entry)
+            position[columns[~sold]] = entry[~sold] + 1
+            position[columns[sold]] = anchor[columns[sold]] = exit[sold]
+            steps.append((columns[sold], entry[sold], exit[sold]))
+
+        if not steps:
+            return [np.zeros(0, dtype=np.int64)] * tickers, [np.zeros(0, dtype=np.int64)] * tickers
+        columns, entries, exits = (np.concatenate(parts) for parts in zip(*steps))
+        return [entries[columns == j] for j in range(tickers)], [exits[columns == j] for j in range(tickers)]
+
+    def sellOnEntry(self) -> np.ndarray:
+        """
+        Sell criteria anchored at the same row are evaluated for all rows at once. Buy signal sold on the same candle
+        is skipped, so only rows where it is not, and which belong to ticker's history, can be entries.
+        :return: boolean array (bars x tickers) of rows which can be entries
+        """
+        bars, tickers = int(self.lengths.max(initial=0)), len(self.lengths)
+        rows = np.broadcast_to(np.arange(bars)[:, None], (bars, tickers))
+        sold = self.plan.evaluateAt("sellOn", self.data, rows, np.arange(tickers)[None, :], rows)
+        return ~sold & (rows < self.lengths)
+
+    def nextBuyTables(self) -> list:
+        """
+        Window values of buy criteria are NaN for k bars after anchor, so rows following anchor are split into
+        segments by distinct window lengths. For every segment buy criteria are evaluated once over all rows, with
+        windows longer than segment's offset replaced by NaN.
+        :return: list of (first offset, last offset (exclusive), next buy row for every row and ticker) tuples
+        """
+        windows = {o.name: o.param for o in self.plan.operands("buyOn") if o.kind == "window"}
+        bounds = sorted({0, *windows.values()}) + [np.iinfo(np.int64).max]
+        tables = []
+        for lo, hi in zip(bounds, bounds[1:]):
+            data = dict(self.data)
+            for name, length in windows.items():
+                if length > lo:
+                    data[name] = np.full_like(self.data[name], np.nan)
+            buy = self.plan.evaluate("buyOn", data)
+            buy &= self.entryRows
+            tables.append((lo, hi, Portfolio.nextTrue(buy)))
+
+        return tables
+
+    def nextBuy(self, columns: np.ndarray, starts: np.ndarray, anchors: np.ndarray, searched: bool) -> np.ndarray:
+        """
+        Returns rows of first buy signal at or after starts (row >= length of ticker if there is none)
+        :param searched: if True, criteria depend on anchor in other way than windows (nextBuyTables cannot be used)
+                         and rows are searched in chunks
+        """
+        lengths = self.lengths[columns]
+        if searched:
+            return self.search("buyOn", columns, starts, anchors, lengths)
+
+        entries = lengths.copy()
+        for lo, hi, table in self.buyTables:
+            first = np.minimum(np.maximum(starts, anchors + np.minimum(lo, lengths)), lengths)
+            found = table[first, columns]
+            found[found - anchors >= hi] = lengths[found - anchors >= hi]
+            np.minimum(entries, found, out=entries)
+
+        return entries
+
+    def search(self, side: str, columns: np.ndarray, starts: np.ndarray, anchors: np.ndarray, ends: np.ndarray) \
+            -> np.ndarray:
+        """
+        Finds first row in [starts, ends) of every ticker where side criteria are fulfilled, rows are checked in
+        chunks doubled after every miss
+        :return: array of found rows (ends where there is none)
+        """
+        found, lo = ends.copy(), starts.copy()
+        bars = self.lengths.max()
+        pending = np.flatnonzero(lo < ends)
+        size = self.chunkSize
+        while pending.size:
+            rows = lo[pending, None] + np.arange(size)
+            clipped = np.minimum(rows, bars - 1)
+            signals = self.plan.evaluateAt(side, self.data, clipped, columns[pending, None], anchors[pending, None])
+            signals &= rows < ends[pending, None]
+            if side == "buyOn":
+                signals &= self.entryRows[clipped, columns[pending, None]]
+            hit = signals.any(axis=1)
+            found[pending[hit]] = rows[hit, np.argmax(signals[hit], axis=1)]
+            lo[pending] += size
+            pending = pending[~hit]
+            pending = pending[lo[pending] < ends[pending]]
+            size *= 2
+
+        return found
+
+    @staticmethod
+    def nextTrue(signals: np.ndarray) -> np.ndarray:
+        """
+        For every row and column returns first row at or after it where signal is True (number of rows if there is
+        none)
+        :return: array with one more row than signals
+        """
+        bars = signals.shape[0]
+        rows = np.where(signals, np.arange(bars)[:, None], bars)
+        rows = np.concatenate([rows, np.full((1,) + signals.shape[1:], bars)])
+        return np.minimum.accumulate(rows[::-1], axis=0)[::-1]
+
+    @staticmethod
+    def aggregate(logs: dict) -> stockPrice.TradeLog:
+        """
+        Joins trade logs of all tickers into one ordered by exit date
+        """
+        logs = [log for log in logs.values() if len(log)]
+        if not logs:
+            return stockPrice.TradeLog()
+        records = np.concatenate([log.records for log in logs])
+        records = records[np.argsort(records["exitDate"], kind="stable")]
+        first = logs[0]
+        return stockPrice.TradeLog(records, None, first.profitType, first.takeProfit, first.stopLoss, first.timeZone)
+
+    def equity(self, logs: dict) -> pd.DataFrame:
+        """
+        Cumulative profit of every ticker and of whole portfolio, aligned on shared index (profit of trade is added
+        at its exit date)
+        :return: data frame with column for every ticker and 'portfolio' column
+        """
+        index = Portfolio.sharedIndex(self.stockPrices)
+        profits = pd.DataFrame({ticker: pd.Series(log.profits, index=log.exitDates).groupby(level=0).sum()
+                                for ticker, log in logs.items()})
+        equity = profits.reindex(index, fill_value=0.0).fillna(0.0).cumsum()
+        equity["portfolio"] = equity.sum(axis=1)
+        return equity
+
+    @staticmethod
+    def summary(logs: dict) -> pd.DataFrame:
+        """
+        Summary of every ticker and of whole portfolio (last row)
+        """
+        rows = {ticker: log.summary() for ticker, log in logs.items()}
+        rows["portfolio"] = Portfolio.aggregate(logs).summary()
+        return pd.DataFrame.from_dict(rows, orient="index")
@@ -0,0 +1,249 @@
+"""
+File containing resampling of stock price to coarser intervals (e.g. 1m -> 5m, 1h, 1d). Every bar is assigned to its
+bucket with vectorized arithmetic on timestamps, aligned to local time of Europe/Warsaw (intraday buckets start at
+local midnight, days at local midnight, weeks on Monday, months on first day of month), and buckets are aggregated
+at once with NumPy reduceat. Resampled series are kept in memory and updated incrementally when new base bars arrive.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import re
+import numpy as np
+import pandas as pd
+
+import interface
+import stockPrice
+
+if TYPE_CHECKING:
+    from interface import dateType
+
+
+class Resampler(object):
+    """ Aggregation of columns, other columns take last value of bucket """
+    aggregations = {"Open": "first", "High": "max", "Low": "min", "Volume": "sum"}
+    """ Intervals stored by DailyDownload, other intervals are derived from them """
+    stored = ["1m", "5m", "1h", "1d"]
+    units = {"m": 60, "h": 3600, "d": 86400, "wk": 7 * 86400, "mo": 31 * 86400}
+    hour, day = 3600 * 10 ** 9, 86400 * 10 ** 9
+
+    def __init__(self, loader=None, stored: (list | None) = None, timeZone: str = "Europe/Warsaw"):
+        """
+        :param loader: function(ticker, interval) -> stock price of stored interval, Yahoo.loadData by default
+        :param stored: intervals which can be loaded, the coarsest one nested in requested interval is resampled
+        :param timeZone: time zone to which buckets are aligned
+        """
+        self.loader = loader or Resampler.loadYahoo
+        self.stored = Resampler.stored if stored is None else stored
+        self.timeZone = timeZone
+        self.materialized = {}
+        self.stats = {"hits": 0, "updates": 0, "misses": 0}
+
+    @staticmethod
+    def loadYahoo(ticker: str, interval: str) -> pd.DataFrame:
+        import cache
+        return cache.Yahoo(ticker, interval).loadData(ticker)
+
+    @staticmethod
+    def parseInterval(interval: str) -> (int, str):
+        """
+        :return: number and unit (m, h, d, wk, mo) of interval, e.g. (90, 'm') for '90m'
+        """
+        match = re.fullmatch(r"(\d+)(m|h|d|wk|mo)", interval)
+        if match is None or int(match.group(1)) == 0:
+            raise ValueError(f"Incorrect interval: {interval}. Use number followed by one of: {list(Resampler.units)}")
+        number, unit = int(match.group(1)), match.group(2)
+        if unit in ["m", "h"] and 86400 % (number * Resampler.units[unit]):
+            raise ValueError(f"Intraday interval {interval} has to divide a day")
+        return number, unit
+
+    @staticmethod
+    def nests(source: str, interval: str) -> bool:
+        """
+        Checks if every bucket of interval consists of whole buckets of source
+        """
+        (n, unit), (m, target) = Resampler.parseInterval(source), Resampler.parseInterval(interval)
+        if unit in ["m", "h"]:
+            return target not in ["m", "h"] or (m * Resampler.units[target]) % (n * Resampler.units[unit]) == 0
+        if unit == "d":
+            return n == 1 and target in ["d", "wk", "mo"] or target == "d" and m % n == 0
+        return unit == target and m % n == 0
+
+    @staticmethod
+    def source(interval: str, stored: list) -> str:
+        """
+        Chooses the coarsest stored interval nested in interval (the fewest bars to resample)
+        """
+        nested = [s for s in stored if Resampler.nests(s, interval)]
+        if not nested:
+            raise ValueError(f"{interval} cannot be derived from any of: {stored}")
+        return max(nested, key=lambda s: Resampler.parseInterval(s)[0] * Resampler.units[Resampler.parseInterval(s)[1]])
+
+    @staticmethod
+    def runs(values: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Like np.unique(values, return_inverse=True), but for sorted values (e.g. dates of stock price) distinct values
+        are found where consecutive ones differ, without sorting
+        """
+        if values.size and np.all(values[1:] >= values[:-1]):
+            changes = np.concatenate([[True], values[1:] != values[:-1]])
+            return values[changes], np.cumsum(changes) - 1
+        return np.unique(values, return_inverse=True)
+
+    @staticmethod
+    def localTime(index: pd.DatetimeIndex, timeZone: str) -> (np.ndarray, np.ndarray):
+        """
+        :return: UTC and local (wall clock of timeZone) int64 nanoseconds of dates, naive dates are treated as local.
+                 UTC offset changes only at full hours, so it is looked up once per distinct hour.
+        """
+        index = pd.DatetimeIndex(index)
+        if index.tz is None:
+            index = index.tz_localize(timeZone)
+        utc = index.asi8 * {"s": 10 ** 9, "ms": 10 ** 6, "us": 10 ** 3, "ns": 1}[index.unit]
+        hours, inverse = Resampler.runs(utc // Resampler.hour)
+        firsts = hours * Resampler.hour
+        offsets = interface.Utils.fromUtc(firsts, timeZone, None).tz_localize(None).asi8 - firsts
+        return utc, utc + offsets[inverse]
+
+    @staticmethod
+    def bucketStarts(index: pd.DatetimeIndex, interval: str, timeZone: str = "Europe/Warsaw",
+                     origin: (str | pd.Timedelta | None) = None) -> np.ndarray:
+        """
+        Calculates start of bucket of every date. Intraday buckets are aligned to local time, but shifted by UTC offset
+        of every date, so hour repeated at the end of daylight saving time is not merged into one bucket.
+        :param origin: if provided, intraday buckets are aligned to UTC midnight moved by origin instead (e.g. '30min'
+                       for Yahoo's 90m bars, which start at 00:30, 02:00, ... UTC in both winter and summer time)
+        :return: int64 UTC nanoseconds
+        """
+        return Resampler.buckets(index, interval, timeZone, 0, origin)
+
+    @staticmethod
+    def bucketEnds(index: pd.DatetimeIndex, interval: str, timeZone: str = "Europe/Warsaw") -> np.ndarray:
+        """
+        Calculates end (exclusive) of bucket (aligned to local midnight) of every date
+        :return: int64 UTC nanoseconds
+        """
+        return Resampler.buckets(index, interval, timeZone, 1)
+
+    @staticmethod
+    def barEnds(index: pd.DatetimeIndex, interval: str, timeZone: str = "Europe/Warsaw") -> np.ndarray:
+        """
+        Calculates time when every bar labeled with its start is closed. Intraday bars end interval after their own
+        start, so bars not aligned to local midnight (e.g. Yahoo's 90m bars starting at 23:30, 01:00, ...) are not
+        taken as closed before they are. Daily and longer bars end with their calendar bucket.
+        :return: int64 UTC nanoseconds
+        """
+        number, unit = Resampler.parseInterval(interval)
+        if unit in ["m", "h"]:
+            return Resampler.localTime(index, timeZone)[0] + number * Resampler.units[unit] * 10 ** 9
+        return Resampler.bucketEnds(index, interval, timeZone)
+
+    @staticmethod
+    def buckets(index: pd.DatetimeIndex, interval: str, timeZone: str, shift: int,
+                origin: (str | pd.Timedelta | None) = None) -> np.ndarray:
+        """
+        Calculates start of bucket of every date, moved by shift buckets
+        :param origin: offset of intraday buckets from UTC midnight, buckets are aligned to local midnight if empty
+        :return: int64 UTC nanoseconds
+        """
+        number, unit = Resampler.parseInterval(interval)
+        if origin is not None and unit not in ["m", "h"]:
+            raise ValueError(f"Origin can be set only for intraday intervals, not for {interval}")
+        utc, local = Resampler.localTime(index, timeZone)
+        if unit in ["m", "h"]:
+            width = number * Resampler.units[unit] * 10 ** 9
+            if origin is not None:
+                return utc - (utc - pd.Timedelta(origin).value) % width + shift * width
+            return utc - local % width + shift * width
+
+        days, inverse = Resampler.runs(local // Resampler.day)
+        if unit == "d":
+            days = days - days % number + shift * number
+        elif unit == "wk":
+            # 1970-01-01 was Thursday, weeks start on Monday
+            weeks = (days + 3) // 7
+            days = (weeks - weeks % number + shift * number) * 7 - 3
+        else:
+            months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+            months = months - months % number + shift * number
+            days = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+        starts = pd.DatetimeIndex(days.astype("datetime64[D]")).as_unit("ns").tz_localize(timeZone).asi8
+        return starts[inverse]
+
+    @staticmethod
+    def resample(data: pd.DataFrame, interval: str, timeZone: str = "Europe/Warsaw",
+                 origin: (str | pd.Timedelta | None) = None) -> pd.DataFrame:
+        """
+        Aggregates bars into buckets of interval: Open - first, High - max, Low - min, Volume - sum (NaN are
+        skipped), other columns (Close, Adj Close, ...) - last value. Buckets are labeled with their start.
+        :param data: stock price with DatetimeIndex
+        :param origin: offset of intraday buckets from UTC midnight, see bucketStarts
+        :return: resampled stock price with index in timeZone
+        """
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index(kind="stable")
+        if data.empty:
+            return data.iloc[0:0]
+
+        labels = Resampler.bucketStarts(data.index, interval, timeZone, origin)
+        starts = np.flatnonzero(np.concatenate([[True], labels[1:] != labels[:-1]]))
+        lasts = np.concatenate([starts[1:], [labels.shape[0]]]) - 1
+
+        columns = {}
+        for c in data.columns:
+            values = data[c].to_numpy()
+            match Resampler.aggregations.get(c.replace('_', ' '), "last"):
+                case "first":
+                    columns[c] = values[starts]
+                case "max":
+                    columns[c] = np.fmax.reduceat(values.astype(np.float64), starts)
+                case "min":
+                    columns[c] = np.fmin.reduceat(values.astype(np.float64), starts)
+                case "sum":
+                    columns[c] = np.add.reduceat(np.nan_to_num(values.astype(np.float64)), starts)
+                case _:
+                    columns[c] = values[lasts]
+
+        index = interface.Utils.fromUtc(labels[starts], timeZone, data.index.name)
+        return pd.DataFrame(columns, index=index)
+
+    def load(self, ticker: str, interval: str, startDate: dateType = '', endDate: dateType = '') -> pd.DataFrame:
+        """
+        Loads stock price of any interval. Stored intervals are loaded directly, other ones are resampled from the
+        coarsest nested stored interval.
+        """
+        source = Resampler.source(interval, self.stored)
+        data = self.loader(ticker, source)
+        if source != interval:
+            data = self.update(ticker, interval, data, source)
+        return stockPrice.StockPrice(data).applyDateRange(startDate, endDate)
+
+    def update(self, ticker: str, interval: str, base: pd.DataFrame, source: str = '') -> pd.DataFrame:
+        """
+        Returns base resampled to interval, reusing series resampled before. Base bars are expected to only be
+        appended (the last one may be replaced, as done by Yahoo.appendToExistingData), then only the last bucket
+        of previous result and new buckets are calculated. Otherwise base is resampled from scratch.
+        :param base: stock price of finer interval
+        :param source: interval of base (part of cache key)
+        """
+        key = (ticker, interval, source)
+        rows = len(base.index)
+        previous = self.materialized.get(key)
+        lastRow = base.iloc[-1:].to_numpy() if rows else None
+
+        if previous is not None and 0 < previous["rows"] <= rows \
+                and base.index[0] == previous["first"] and base.index[previous["rows"] - 1] == previous["last"]:
+            if previous["rows"] == rows and np.array_equal(previous["lastRow"], lastRow):
+                self.stats["hits"] += 1
+                return previous["data"]
+            self.stats["updates"] += 1
+            resampled = previous["data"]
+            lo = base.index.searchsorted(resampled.index[-1])
+            data = pd.concat([resampled.iloc[:-1], Resampler.resample(base.iloc[lo:], interval, self.timeZone)])
+        else:
+            self.stats["misses"] += 1
+            data = Resampler.resample(base, interval, self.timeZone)
+
+        if rows:
+            self.materialized[key] = {"data": data, "rows": rows, "first": base.index[0],
+                                      "last": base.index[-1], "lastRow": lastRow}
+        return data
@@ -0,0 +1,76 @@
+"""
+File containing O(n) rolling window calculations over numpy arrays. Window for i-th element consists of k elements
+preceding it (current element is excluded), so first k elements of output are NaN. NaN values inside window are
+skipped, the same way pandas Series.mean/max/min do. 2-D arrays (bars x tickers) are rolled along first axis, every
+column independently.
+"""
+import numpy as np
+
+
+class Rolling(object):
+
+    @staticmethod
+    def mean(values: np.ndarray, k: int) -> np.ndarray:
+        """
+        Rolling mean of previous k values, calculated as difference of cumulative sums. Values are shifted by
+        first valid value before summing, which keeps cumulative sums small and rounding errors negligible.
+        :param values: input array
+        :param k: window length
+        :return: array of the same length as values
+        """
+        values = np.asarray(values, dtype=float)
+        n = values.shape[0]
+        output = np.full(values.shape, np.nan)
+        if k >= n:
+            return output
+
+        valid = ~np.isnan(values)
+        first = np.take_along_axis(values, np.argmax(valid, axis=0, keepdims=True), axis=0)
+        shift = np.where(valid.any(axis=0, keepdims=True), first, 0.0)
+        zeros = np.zeros((1,) + values.shape[1:])
+        sums = np.concatenate([zeros, np.cumsum(np.where(valid, values - shift, 0.0), axis=0)])
+        counts = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+        windowSums = sums[k:n] - sums[:n - k]
+        windowCounts = counts[k:n] - counts[:n - k]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            output[k:] = np.where(windowCounts > 0, windowSums / windowCounts + shift, np.nan)
+
+        return output
+
+    @staticmethod
+    def max(values: np.ndarray, k: int) -> np.ndarray:
+        """
+        Rolling max of previous k values
+        """
+        return Rolling.extremum(values, k, np.fmax)
+
+    @staticmethod
+    def min(values: np.ndarray, k: int) -> np.ndarray:
+        """
+        Rolling min of previous k values
+        """
+        return Rolling.extremum(values, k, np.fmin)
+
+    @staticmethod
+    def extremum(values: np.ndarray, k: int, function: np.ufunc) -> np.ndarray:
+        """
+        Rolling max/min calculated with van Herk/Gil-Werman algorithm - vectorized counterpart of monotonic deque.
+        Array is split into blocks of length k and prefix/suffix extremum is accumulated inside each block, then every
+        window is covered by suffix of one block and prefix of the next one.
+        :param values: input array
+        :param k: window length
+        :param function: np.fmax or np.fmin (ignore NaN values)
+        :return: array of the same length as values
+        """
+        values = np.asarray(values, dtype=float)
+        n = values.shape[0]
+        output = np.full(values.shape, np.nan)
+        if k >= n:
+            return output
+        columns = values.shape[1:]
+        padded = np.concatenate([values, np.full((-n % k,) + columns, np.nan)]).reshape((-1, k) + columns)
+        prefix = function.accumulate(padded, axis=1).reshape((-1,) + columns)
+        suffix = function.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape((-1,) + columns)
+        output[k:] = function(suffix[:n - k], prefix[k - 1:n - 1])
+
+        return output
@@ -0,0 +1,100 @@
+"""
+File containing single pass trade simulator. It reproduces trades generated by the legacy Strategy.executeTrades
+loop, but evaluates criteria over NumPy arrays instead of re-slicing stock price data frame after every trade.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import numpy as np
+
+import stockPrice
+
+if TYPE_CHECKING:
+    from stockPrice.Backtesting import Strategy
+
+
+class Simulator(object):
+    """
+    Walks entries and exits in one forward pass. Window values (avg/max/min) are calculated once over the whole
+    stock price, values depending on entry point (SL/TP) are calculated only for the rows which are checked.
+    Legacy loop recalculates criteria on a frame starting at last exit (buy) or last entry (sell), so first k rows
+    of every k-window value are NaN there - this is reproduced by anchoring window values at the same rows.
+    """
+
+    def __init__(self, strategy: Strategy, chunkSize: int = 64, data: (dict | None) = None,
+                 buySignals: (np.ndarray | None) = None):
+        """
+        :param strategy: strategy with stock price (already truncated to date range) and criteria. If criteria
+                         contain compiled 'plan' (StrategyUtils.loadCriteria(..., compiled=True)) it is reused.
+        :param chunkSize: number of rows checked at once when looking for sell signal, doubled after every miss
+        :param data: arrays returned by plan.prepare for rows of strategy's stock price, e.g. slices of arrays
+                     prepared once over longer history (window values of first rows are anchored anyway)
+        :param buySignals: buyOn criteria evaluated over data (plan.evaluate("buyOn", data)), reused if provided
+        """
+        self.strategy = strategy
+        self.stockPrice = strategy.stockPrice
+        self.chunkSize = chunkSize
+        self.length = len(self.stockPrice.index)
+        self.plan = strategy.criteria.get("plan") or stockPrice.CriteriaPlan(strategy.criteria)
+        self.data = self.plan.prepare(self.stockPrice) if data is None else data
+        self.buySignals = buySignals
+
+    def nextBuy(self, start: int, anchor: int) -> (int | None):
+        """
+        Returns position of first buy signal at or after start, when buy criteria are anchored at anchor row
+        """
+        if self.buyWarmUp is None:
+            found = np.flatnonzero(self.plan.evaluate("buyOn", self.data, start, self.length, anchor))
+            return start + found[0] if found.size else None
+
+        warmEnd = min(anchor + self.buyWarmUp, self.length)
+        if start < warmEnd:
+            found = np.flatnonzero(self.plan.evaluate("buyOn", self.data, start, warmEnd, anchor))
+            if found.size:
+                return start + found[0]
+        i = np.searchsorted(self.buyIdx, max(start, warmEnd))
+
+        return self.buyIdx[i] if i < self.buyIdx.size else None
+
+    def nextSell(self, entry: int) -> (int | None):
+        """
+        Returns position of first sell signal at or after entry
+        """
+        lo, size = entry, self.chunkSize
+        while lo < self.length:
+            hi = min(lo + size, self.length)
+            found = np.flatnonzero(self.plan.evaluate("sellOn", self.data, lo, hi, entry))
+            if found.size:
+                return lo + found[0]
+            lo, size = hi, size * 2
+
+        return None
+
+    def run(self, profitType: str = 't', takeProfit: (float | int) = 30, stopLoss: (float | int) = 30) -> list:
+        """
+        Simulates trades. Buy signal that has no sell signal after it, or is sold on the same candle, is skipped.
+        :return: log of trades
+        """
+        if self.length == 0:
+            return stockPrice.TradeLog(stockPrice=self.stockPrice, profitType=profitType, takeProfit=takeProfit,
+                                       stopLoss=stopLoss)
+        self.buyWarmUp = self.plan.warmUp("buyOn")
+        if self.buyWarmUp is not None:
+            if self.buySignals is None:
+                self.buySignals = self.plan.evaluate("buyOn", self.data, 0, self.length, 0)
+            self.buyIdx = np.flatnonzero(self.buySignals)
+
+        index = self.stockPrice.index
+        entries, exits = [], []
+        position, anchor = 0, 0
+        while (entry := self.nextBuy(position, anchor)) is not None:
+            exit = self.nextSell(entry)
+            self.strategy.firstBuyIdx = index[entry]
+            self.strategy.firstSellIdx = index[entry] if exit is None else index[exit]
+            if exit is None or exit == entry:
+                position = entry + 1
+                continue
+            entries.append(entry)
+            exits.append(exit)
+            position, anchor = exit, exit
+
+        return stockPrice.TradeLog.fromPositions(self.stockPrice, entries, exits, profitType, takeProfit, stopLoss)
@@ -2,6 +2,7 @@
 File containing classes and methods to perform operation over stock prices.
 """
 import datetime as dt
+import re
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
@@ -11,6 +12,8 @@ dateType = (str | dt.datetime | pd.DatetimeIndex)
 
 
 class StockPrice(object):
+    """ Encoded dates supported by interpretDates: H-k, W-k, W+k, Y-k """
+    encodedDate = re.compile(r"H-|W-|W\+|Y")
 
     def __init__(self, stockPrice: pd.DataFrame):
         self.stockPrice = stockPrice
@@ -21,27 +24,44 @@ class StockPrice(object):
     def applyDateRange(self, startDate: dateType = '', endDate: dateType = '') -> pd.DataFrame:
         """
         Applies provided date range. Truncates stock price dataframe to only those that are from [startDate:endDate]
-        period.
+        period. Rows are found with binary search on sorted index and returned as a view of stock price (not a copy).
         :param startDate: date form which to extract data
         :param endDate: to which to extract data
         :return: Data from selected data range.
         """
 
         startDate, endDate = self.interpretDates(startDate, endDate)
-
-        if startDate == '':
-            startDate = self.stockPrice.index[0]
-        if endDate == '':
-            endDate = self.stockPrice.index[-1]
-
-        # format to datetime if start/end is still string
-        startDate = pd.to_datetime(startDate, utc=True)
-        endDate = pd.to_datetime(endDate, utc=True)
-
-        self.stockPrice = self.stockPrice.loc[startDate:endDate, :]
+        lo, hi = StockPrice.rowRange(self.stockPrice.index, startDate, endDate)
+        self.stockPrice = self.stockPrice.iloc[lo:hi]
 
         return self.stockPrice
 
+    @staticmethod
+    def rowRange(index: pd.DatetimeIndex, startDate: dateType = '', endDate: dateType = '') -> (int, int):
+        """
+        Finds rows [lo, hi) of index between startDate and endDate (both inclusive). Dates without time zone are
+        treated as UTC.
+        """
+        lo, hi = 0, len(index)
+        if not index.is_monotonic_increasing:
+            selected = index.slice_indexer(StockPrice.toUtc(startDate or index.min()),
+                                           StockPrice.toUtc(endDate or index.max()))
+            return selected.start or 0, selected.stop if selected.stop is not None else hi
+        if startDate not in [None, '']:
+            lo = index.searchsorted(StockPrice.toUtc(startDate), side="left")
+        if endDate not in [None, '']:
+            hi = index.searchsorted(StockPrice.toUtc(endDate), side="right")
+
+        return int(lo), int(max(lo, hi))
+
+    @staticmethod
+    def toUtc(date: dateType) -> pd.Timestamp:
+        """
+        Same as pd.to_datetime(date, utc=True) for single date, without guessing format of string
+        """
+        date = pd.Timestamp(date)
+        return date.tz_localize("UTC") if date.tz is None else date.tz_convert("UTC")
+
     def interpretDates(self, startDate: dateType = '', endDate: dateType = '') -> (dt.datetime, dt.datetime):
         """
         Interprets dats from short encoded to datetime. E.g. Y-1 represents today's date from one year before,
@@ -58,6 +78,10 @@ class StockPrice(object):
         # if endDate and str(endDate)[:2] not in correctPrefix:
         #     raise AttributeError(f"Provide encoded start date is incorrect. Choose one from {correctPrefix} and try again")
 
+        # dates which are not encoded are returned as they are (parsed later with pd.to_datetime)
+        if not StockPrice.encodedDate.search(f"{startDate} {endDate}"):
+            return startDate, endDate
+
         start, end = str(startDate), str(endDate)
         startDate, endDate = str(startDate), str(endDate)
 
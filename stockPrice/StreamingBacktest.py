@@ -0,0 +1,186 @@
+"""
+File containing event driven backtest. Bars are consumed one by one from any iterator (CSV cache, database stream,
+replay of data frame), indicators and criteria window values are updated incrementally and trades are yielded as soon
+as they are closed, so memory does not grow with length of history.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import time
+import numpy as np
+import pandas as pd
+
+import interface
+import stockPrice
+from stockPrice.StreamingIndicators import ExtremumState, PreviousMeanState
+
+if TYPE_CHECKING:
+    from stockPrice.CriteriaPlan import CriteriaPlan
+
+
+class StreamingBacktest(object):
+    """
+    Produces the same trades as Strategy.executeTrades on the same bars. Criteria take profit (TP_k) is calculated
+    from close of the candle following the entry, so every bar is evaluated when the next one arrives (one bar is
+    buffered). Position which is still open when bars run out is not returned.
+    """
+    windowStates = {"max": lambda c, k: ExtremumState(c, k, "max"),
+                    "min": lambda c, k: ExtremumState(c, k, "min"),
+                    "avg": lambda c, k: PreviousMeanState(c, k)}
+
+    def __init__(self, criteria: dict, profitType: str = 't'):
+        """
+        :param criteria: dictionary with 'buyOn' and 'sellOn' criteria (and optionally compiled 'plan'), indicator
+                         columns used by criteria (e.g. Close_sma_20) are calculated from bars
+        :param profitType: 'r' for real/'t' for theoretical
+        """
+        self.plan: CriteriaPlan = criteria.get("plan") or stockPrice.CriteriaPlan(criteria)
+        self.profitType = profitType
+        self.takeProfit, self.stopLoss = stockPrice.StrategyUtils.calculateTPSL(criteria["sellOn"])
+
+        operands = self.plan.operands()
+        self.windows = {o.name: self.windowStates[o.name.split('_')[0]](self.plan.column, o.param)
+                        for o in operands if o.kind == "window"}
+        self.anchored = {o.name: o for o in operands if o.kind == "anchored"}
+        self.indicators = stockPrice.StreamingIndicators(
+            [n for n in self.plan.dependencies if n not in self.windows and self.isIndicator(n)])
+        self.barColumns = [n for n in self.plan.dependencies
+                           if n not in self.windows and n not in self.indicators.names]
+
+        self.position, self.anchor = 0, 0
+        self.entry = None
+        self.pending = None
+        self.stats = {"bars": 0, "trades": 0, "seconds": 0.0}
+
+    @staticmethod
+    def isIndicator(name: str) -> bool:
+        """
+        Columns of other intervals (e.g. 1h:Close_sma_150) are not calculated from bars, they have to be provided
+        """
+        return not stockPrice.MultiTimeframe.splitName(name)[0] and \
+            any(pattern.match(name) for pattern, _ in stockPrice.Indicators.namePatterns)
+
+    def seed(self, history: pd.DataFrame) -> StreamingBacktest:
+        """
+        Warms up indicators and window values with historical bars, no trades are made on them
+        :return: self
+        """
+        self.indicators.seed(history)
+        for state in self.windows.values():
+            state.seed(history[state.column].to_numpy(dtype=np.float64))
+        self.position = len(history.index)
+        return self
+
+    def run(self, bars, speed: (float | None) = None):
+        """
+        Runs backtest over bars
+        :param bars: iterator of (date, bar) pairs, where bar is mapping of column name -> value (see frameBars,
+                     csvBars, chunkBars)
+        :param speed: if provided, bars are replayed in real time multiplied by speed (paper trading), e.g. 60 replays
+                      one hour of 1m bars in one minute
+        :return: generator of trades, yielded when they are closed
+        """
+        start, previousDate = time.perf_counter(), None
+        for date, bar in bars:
+            if speed and previousDate is not None:
+                time.sleep(max((date - previousDate).total_seconds() / speed, 0.0))
+            previousDate = date
+            yield from self.update(date, bar)
+        yield from self.flush()
+        self.stats["seconds"] += time.perf_counter() - start
+
+    def update(self, date: pd.Timestamp, bar) -> list:
+        """
+        Adds single bar
+        :return: list of trades closed by previous bar (evaluated now, when its next close is known)
+        """
+        values = {name: float(bar[name]) for name in self.barColumns}
+        values.update(self.indicators.update(bar))
+        for name, state in self.windows.items():
+            values[name], = state.update(float(bar[state.column]))
+
+        trades = self.flush(values[self.plan.column])
+        self.pending = (self.position, date, bar, values)
+        self.position += 1
+        self.stats["bars"] += 1
+        return trades
+
+    def flush(self, nextClose: float = np.nan) -> list:
+        """
+        Evaluates buffered bar
+        """
+        if self.pending is None:
+            return []
+        position, date, bar, values = self.pending
+        self.pending = None
+        trades = []
+
+        if self.entry is not None:
+            if not self.isSignal("sellOn", position, values):
+                return trades
+            trades.append(self.closeTrade(position, date, bar))
+            self.anchor, self.entry = position, None
+
+        if self.isSignal("buyOn", position, values):
+            self.entry = (position, date, bar, values[self.plan.column], nextClose)
+            if self.isSignal("sellOn", position, values):
+                # sold on the same candle - buy signal is skipped
+                self.entry = None
+
+        return trades
+
+    def isSignal(self, side: str, position: int, values: dict) -> bool:
+        """
+        Window values are NaN for k bars after anchor (last exit for buyOn, entry for sellOn), stop loss and take
+        profit levels are calculated from entry candle
+        """
+        anchor = self.anchor if side == "buyOn" else self.entry[0]
+        values = dict(values)
+        for name, state in self.windows.items():
+            if position < anchor + state.length:
+                values[name] = np.nan
+        if side == "sellOn":
+            _, _, _, entryClose, nextClose = self.entry
+            for name, operand in self.anchored.items():
+                values[name] = entryClose - operand.param / 10000 if operand.value == "SL" \
+                    else nextClose + operand.param / 10000
+
+        return self.plan.evaluateBar(side, values)
+
+    def closeTrade(self, exitIdx: int, exitDate: pd.Timestamp, exitBar) -> stockPrice.Trade:
+        entryIdx, entryDate, entryBar, _, _ = self.entry
+        entryPrice = float(entryBar["Close"])
+        exitPrice = stockPrice.Trade.exitPrices(entryPrice, float(exitBar["High"]), float(exitBar["Open"])).item()
+        profit = stockPrice.Trade.profits(entryPrice, exitPrice, self.profitType, self.takeProfit,
+                                          self.stopLoss).item()
+        self.stats["trades"] += 1
+        return stockPrice.Trade.fromValues(entryDate, exitDate, entryIdx, exitIdx, entryPrice, exitPrice,
+                                           profit, self.profitType, self.takeProfit, self.stopLoss)
+
+    @staticmethod
+    def frameBars(data: pd.DataFrame):
+        """
+        Replays bars of data frame
+        :return: generator of (date, bar) pairs
+        """
+        columns = list(data.columns)
+        for date, row in zip(data.index, data.to_numpy(dtype=np.float64).tolist()):
+            yield date, dict(zip(columns, row))
+
+    @staticmethod
+    def chunkBars(chunks):
+        """
+        Bars from iterator of data frames, e.g. StockPriceDb.stream
+        :return: generator of (date, bar) pairs
+        """
+        for chunk in chunks:
+            yield from StreamingBacktest.frameBars(chunk.select_dtypes("number"))
+
+    @staticmethod
+    def csvBars(filePath: str, chunkSize: int = 10000, timeZone: str = "Europe/Warsaw"):
+        """
+        Reads cached CSV file in chunks of chunkSize rows
+        :return: generator of (date, bar) pairs
+        """
+        for chunk in pd.read_csv(filePath, index_col=[0], chunksize=chunkSize):
+            chunk.index = interface.Utils.parseDates(chunk.index, timeZone)
+            yield from StreamingBacktest.frameBars(chunk)
@@ -0,0 +1,409 @@
+"""
+File containing incremental indicators, updated bar by bar in O(1) time. Every state can be seeded from historical
+values (with vectorized kernels, without replaying bars one by one) and serialized to JSON, so live updates resume
+after restart without recalculating whole history. Values are the same as calculated by Indicators.compute.
+"""
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import deque
+import json
+import numpy as np
+import pandas as pd
+
+from stockPrice.Indicators import Indicators
+from stockPrice.Kernels import Kernels
+
+
+class IndicatorState(ABC):
+    """
+    Base class of incremental indicators. Subclasses define names of output columns, update(value) returning tuple of
+    outputs and seed(values) setting state as if all values were passed to update.
+    """
+
+    def __init__(self, column: str = "Close"):
+        self.column = column
+
+    @property
+    @abstractmethod
+    def names(self) -> list:
+        pass
+
+    @abstractmethod
+    def update(self, value: float) -> tuple:
+        pass
+
+    @abstractmethod
+    def seed(self, values: np.ndarray) -> IndicatorState:
+        pass
+
+    def toDict(self) -> dict:
+        """
+        Returns JSON serializable state
+        """
+        def encode(value):
+            if isinstance(value, IndicatorState):
+                return value.toDict()
+            if isinstance(value, deque):
+                return {"deque": [encode(v) for v in value], "maxlen": value.maxlen}
+            if isinstance(value, (tuple, list)):
+                return [encode(v) for v in value]
+            return value.item() if isinstance(value, np.generic) else value
+
+        return {"type": type(self).__name__, **{k: encode(v) for k, v in self.__dict__.items()}}
+
+    @staticmethod
+    def fromDict(state: dict) -> IndicatorState:
+        """
+        Restores state saved by toDict
+        """
+        def decode(value):
+            if isinstance(value, dict) and "type" in value:
+                return IndicatorState.fromDict(value)
+            if isinstance(value, dict) and "deque" in value:
+                return deque([decode(v) for v in value["deque"]], maxlen=value["maxlen"])
+            if isinstance(value, list):
+                return tuple(decode(v) for v in value)
+            return value
+
+        state = dict(state)
+        name = state.pop("type")
+        cls = next(c for c in IndicatorState.subclasses() if c.__name__ == name)
+        restored = cls.__new__(cls)
+        restored.__dict__.update({k: decode(v) for k, v in state.items()})
+        return restored
+
+    @staticmethod
+    def subclasses(cls: type = None) -> list:
+        cls = cls or IndicatorState
+        return [s for c in cls.__subclasses__() for s in [c, *IndicatorState.subclasses(c)]]
+
+
+class EMAState(IndicatorState):
+    """
+    Exponential moving average, updated the same way as pandas ewm(alpha, min_periods, adjust=False)
+    """
+
+    def __init__(self, column: str = "Close", alpha: float = 2 / 11, minPeriods: int = 10, name: str = ""):
+        super().__init__(column)
+        self.alpha = alpha
+        self.minPeriods = minPeriods
+        self.name = name
+        self.weighted, self.oldWeight, self.observations = np.nan, 1.0, 0
+
+    @property
+    def names(self) -> list:
+        return [self.name]
+
+    @property
+    def value(self) -> float:
+        return self.weighted if self.observations >= max(self.minPeriods, 1) else np.nan
+
+    def update(self, value: float) -> tuple:
+        isObservation = value == value
+        self.observations += isObservation
+        if self.weighted == self.weighted:
+            self.oldWeight *= 1 - self.alpha
+            if isObservation:
+                if self.weighted != value:
+                    self.weighted = (self.oldWeight * self.weighted + self.alpha * value) / \
+                        (self.oldWeight + self.alpha)
+                self.oldWeight = 1.0
+        elif isObservation:
+            self.weighted = value
+
+        return self.value,
+
+    def seed(self, values: np.ndarray) -> EMAState:
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        self.observations = int(valid.sum())
+        if not self.observations:
+            self.weighted, self.oldWeight = np.nan, 1.0
+            return self
+        self.weighted = float(Kernels.ema(values, self.alpha, 1)[-1])
+        self.oldWeight = (1 - self.alpha) ** int(np.argmax(valid[::-1]))
+        return self
+
+
+class WindowState(IndicatorState):
+    """
+    Window of last length values with sums of their deviations from offset. Sums are recalculated every length
+    updates (with offset equal to mean of window), so rounding errors do not accumulate and update is O(1) amortized.
+    """
+
+    def __init__(self, column: str = "Close", length: int = 20):
+        super().__init__(column)
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.offset, self.sum, self.squares, self.nanCount, self.updates = 0.0, 0.0, 0.0, 0, 0
+
+    def push(self, value: float) -> None:
+        if len(self.window) == self.length:
+            removed = self.window[0]
+            if removed != removed:
+                self.nanCount -= 1
+            else:
+                self.sum -= removed - self.offset
+                self.squares -= (removed - self.offset) ** 2
+        self.window.append(value)
+        if value != value:
+            self.nanCount += 1
+        else:
+            self.sum += value - self.offset
+            self.squares += (value - self.offset) ** 2
+
+        self.updates += 1
+        if self.updates >= self.length:
+            self.recalculate()
+
+    def recalculate(self) -> None:
+        values = np.array(self.window, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.offset = float(values.mean()) if values.size else 0.0
+        self.sum = float(np.sum(values - self.offset))
+        self.squares = float(np.sum((values - self.offset) ** 2))
+        self.nanCount = len(self.window) - values.size
+        self.updates = 0
+
+    @property
+    def complete(self) -> bool:
+        return len(self.window) == self.length and self.nanCount == 0
+
+    def mean(self) -> float:
+        return self.offset + self.sum / self.length if self.complete else np.nan
+
+    def std(self) -> float:
+        if not self.complete:
+            return np.nan
+        return float(np.sqrt(max(self.squares / self.length - (self.sum / self.length) ** 2, 0.0)))
+
+    def seed(self, values: np.ndarray) -> WindowState:
+        self.window = deque(np.asarray(values, dtype=np.float64)[-self.length:].tolist(), maxlen=self.length)
+        self.recalculate()
+        return self
+
+
+class SMAState(WindowState):
+
+    @property
+    def names(self) -> list:
+        return [f"{self.column}_sma_{self.length}"]
+
+    def update(self, value: float) -> tuple:
+        self.push(value)
+        return self.mean(),
+
+
+class BollingerState(WindowState):
+
+    def __init__(self, column: str = "Close", length: int = 20, sdFactor: int = 2):
+        super().__init__(column, length)
+        self.sdFactor = sdFactor
+        self.last = np.nan
+
+    @property
+    def names(self) -> list:
+        return [f"{self.column}_{n}" for n in ["mavg", "lband", "hband", "bbiwband", "bbihband", "bbilband"]]
+
+    def update(self, value: float) -> tuple:
+        self.push(value)
+        self.last = value
+        return self.bands()
+
+    def bands(self) -> tuple:
+        mean, std = self.mean(), self.std()
+        low, high = mean - self.sdFactor * std, mean + self.sdFactor * std
+        width = (high - low) / mean * 100 if mean == mean and mean != 0 else np.nan
+        return mean, low, high, width, float(self.last > high), float(self.last < low)
+
+    def seed(self, values: np.ndarray) -> BollingerState:
+        super().seed(values)
+        self.last = float(values[-1]) if len(values) else np.nan
+        return self
+
+
+class RSIState(IndicatorState):
+    """
+    Relative Strength Index with Wilder's smoothing (EMA with alpha 1/length) of upward and downward moves
+    """
+
+    def __init__(self, column: str = "Close", length: int = 14):
+        super().__init__(column)
+        self.length = length
+        self.previous = np.nan
+        self.up = EMAState(column, 1 / length, length)
+        self.down = EMAState(column, 1 / length, length)
+
+    @property
+    def names(self) -> list:
+        return [f"{self.column}_rsi"]
+
+    def update(self, value: float) -> tuple:
+        diff = value - self.previous
+        self.previous = value
+        up, = self.up.update(diff if diff > 0 else 0.0)
+        down, = self.down.update(-diff if diff < 0 else 0.0)
+        return self.rsi(up, down),
+
+    @staticmethod
+    def rsi(up: float, down: float) -> float:
+        if down == 0:
+            return 100.0
+        return 100 - (100 / (1 + up / down))
+
+    def seed(self, values: np.ndarray) -> RSIState:
+        values = np.asarray(values, dtype=np.float64)
+        diff = np.diff(values, prepend=np.nan)
+        self.up.seed(np.where(diff > 0, diff, 0.0))
+        self.down.seed(np.where(diff < 0, -diff, 0.0))
+        self.previous = float(values[-1]) if values.size else np.nan
+        return self
+
+
+class MACDState(IndicatorState):
+
+    def __init__(self, column: str = "Close", shortMACD: int = 12, longMACD: int = 26, signalMACD: int = 9):
+        super().__init__(column)
+        self.suffix = f"{shortMACD}_{longMACD}"
+        self.fast = EMAState(column, 2 / (shortMACD + 1), shortMACD)
+        self.slow = EMAState(column, 2 / (longMACD + 1), longMACD)
+        self.signal = EMAState(column, 2 / (signalMACD + 1), signalMACD)
+
+    @property
+    def names(self) -> list:
+        return [f"{self.column}_MACD_{self.suffix}", f"{self.column}_MACD_sign_{self.suffix}",
+                f"{self.column}_MACD_diff_{self.suffix}"]
+
+    def update(self, value: float) -> tuple:
+        macd = self.fast.update(value)[0] - self.slow.update(value)[0]
+        signal, = self.signal.update(macd)
+        return macd, signal, macd - signal
+
+    def seed(self, values: np.ndarray) -> MACDState:
+        values = np.asarray(values, dtype=np.float64)
+        self.fast.seed(values)
+        self.slow.seed(values)
+        self.signal.seed(Kernels.ema(values, self.fast.alpha, self.fast.minPeriods) -
+                         Kernels.ema(values, self.slow.alpha, self.slow.minPeriods))
+        return self
+
+
+class ExtremumState(IndicatorState):
+    """
+    Max/min of previous length values (current one is excluded, NaN values are skipped) as in Rolling.max/min,
+    kept in monotonic deque of (position, value)
+    """
+
+    def __init__(self, column: str = "Close", length: int = 20, function: str = "max"):
+        super().__init__(column)
+        self.length = length
+        self.function = function
+        self.candidates = deque()
+        self.position = 0
+
+    @property
+    def names(self) -> list:
+        return [f"{self.column}_{self.function}_{self.length}"]
+
+    def update(self, value: float) -> tuple:
+        while self.candidates and self.candidates[0][0] < self.position - self.length:
+            self.candidates.popleft()
+        output = self.candidates[0][1] if self.candidates and self.position >= self.length else np.nan
+
+        if value == value:
+            dominated = (lambda v: v <= value) if self.function == "max" else (lambda v: v >= value)
+            while self.candidates and dominated(self.candidates[-1][1]):
+                self.candidates.pop()
+            self.candidates.append((self.position, value))
+        self.position += 1
+
+        return output,
+
+    def seed(self, values: np.ndarray) -> ExtremumState:
+        values = np.asarray(values, dtype=np.float64)
+        self.candidates, self.position = deque(), 0
+        start = max(0, values.size - self.length)
+        self.position = start
+        for value in values[start:]:
+            self.update(value)
+        return self
+
+
+class PreviousMeanState(WindowState):
+    """
+    Mean of previous length values (current one is excluded, NaN values are skipped) as in Rolling.mean
+    """
+
+    def __init__(self, column: str = "Close", length: int = 20):
+        super().__init__(column, length)
+        self.position = 0
+
+    @property
+    def names(self) -> list:
+        return [f"{self.column}_avg_{self.length}"]
+
+    def update(self, value: float) -> tuple:
+        count = len(self.window) - self.nanCount
+        output = self.offset + self.sum / count if self.position >= self.length and count else np.nan
+        self.push(value)
+        self.position += 1
+        return output,
+
+    def seed(self, values: np.ndarray) -> PreviousMeanState:
+        super().seed(values)
+        self.position = len(values)
+        return self
+
+
+class StreamingIndicators(object):
+    """
+    Set of incremental indicators, created from the same specifications as Indicators.compute
+    """
+    states = {"sma": lambda c, p: SMAState(c, p["length"]),
+              "ema": lambda c, p: EMAState(c, 2 / (p["length"] + 1), p["length"], f"{c}_ema_{p['length']}"),
+              "rsi": lambda c, p: RSIState(c, p["length"]),
+              "macd": lambda c, p: MACDState(c, p["shortMACD"], p["longMACD"], p["signalMACD"]),
+              "bollinger": lambda c, p: BollingerState(c, p["length"], p["sdFactor"]),
+              "max": lambda c, p: ExtremumState(c, p["length"], "max"),
+              "min": lambda c, p: ExtremumState(c, p["length"], "min")}
+
+    def __init__(self, specs: list):
+        """
+        :param specs: list of indicator specifications, see Indicators.compute
+        """
+        self.indicators = []
+        for spec in map(Indicators.parseSpec, specs):
+            for column in [spec["column"]] if isinstance(spec["column"], str) else spec["column"]:
+                self.indicators.append(self.states[spec["indicator"]](column, spec))
+
+    @property
+    def names(self) -> list:
+        return [name for indicator in self.indicators for name in indicator.names]
+
+    def seed(self, stockPrice: pd.DataFrame) -> StreamingIndicators:
+        """
+        Sets state of every indicator as if all rows of stock price were passed to update
+        :return: self
+        """
+        for indicator in self.indicators:
+            indicator.seed(stockPrice[indicator.column].to_numpy(dtype=np.float64))
+        return self
+
+    def update(self, bar: (dict | pd.Series)) -> dict:
+        """
+        Adds new bar (row of stock price)
+        :return: dictionary of indicator column name -> value at this bar
+        """
+        values = {}
+        for indicator in self.indicators:
+            values.update(zip(indicator.names, indicator.update(float(bar[indicator.column]))))
+        return values
+
+    def toJson(self) -> str:
+        return json.dumps([indicator.toDict() for indicator in self.indicators])
+
+    @staticmethod
+    def fromJson(state: str) -> StreamingIndicators:
+        restored = StreamingIndicators([])
+        restored.indicators = [IndicatorState.fromDict(s) for s in json.loads(state)]
+        return restored
@@ -0,0 +1,181 @@
+"""
+File containing parameter sweep (grid search) over strategy criteria. Every combination of parameters is backtested
+for every ticker and interval, combinations are spread across worker processes.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import itertools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import stockPrice
+
+
+""" State of worker process: loader, indicator cache and stock prices (with indicators) loaded by this process """
+_worker = {"loader": None, "indicatorCache": None, "frames": {}}
+
+
+def loadYahoo(ticker: str, interval: str) -> pd.DataFrame:
+    import cache
+    return cache.Yahoo(ticker, interval).loadData(ticker)
+
+
+def initWorker(loader, indicatorCache=None) -> None:
+    _worker["loader"] = loader
+    _worker["indicatorCache"] = indicatorCache
+    _worker["frames"] = {}
+
+
+def runCombination(task: tuple) -> dict:
+    """
+    Backtests single combination of parameters. Stock price for (ticker, interval) is loaded only once per process,
+    indicators required by criteria are added to it lazily.
+    :param task: (ticker, interval, params, template, startDate, endDate, profitType)
+    :return: dictionary with parameters and backtest summary
+    """
+    ticker, interval, params, template, startDate, endDate, profitType = task
+    start = time.perf_counter()
+    criteria = Sweep.formatCriteria(template, params)
+    criteria["plan"] = stockPrice.CriteriaPlan(criteria)
+
+    key = (ticker, interval)
+    if key not in _worker["frames"]:
+        _worker["frames"][key] = _worker["loader"](ticker, interval)
+    _worker["frames"][key] = Sweep.addIndicators(_worker["frames"][key], criteria["plan"].dependencies,
+                                                 _worker["indicatorCache"], ticker, interval)
+
+    trades = stockPrice.Strategy(_worker["frames"][key], criteria).executeTrades(startDate, endDate, profitType)
+
+    return {"ticker": ticker, "interval": interval, **params,
+            "totalProfit": trades.totalProfit(),
+            "tradeCount": len(trades),
+            "winRate": trades.winRate(),
+            "maxDrawdown": trades.maxDrawdown(),
+            "seconds": time.perf_counter() - start}
+
+
+class Sweep(object):
+    """
+    Grid search over criteria template. Template is a criteria dictionary where statistics/values may contain
+    placeholders, e.g. "max_{window}" or "Close_sma_{slow}", which are filled with every combination from grid.
+    """
+    def __init__(self, template: dict, grid: dict, tickers: list, intervals: list, **kwargs):
+        """
+        :param template: criteria template with 'buyOn' and 'sellOn' lists of rules
+        :param grid: dictionary of parameter name -> list of values
+        :param tickers: stock price/forex pair codes
+        :param intervals: timeFrames
+        :param kwargs: loader (function(ticker, interval) -> stock price, must be picklable), workers (number of
+                       processes, 1 runs in current process), startDate, endDate, profitType, indicatorCache
+                       (cache.IndicatorCache shared by workers through its folder)
+        """
+        self.template = {side: pd.DataFrame(template[side]).to_dict("records") for side in ["buyOn", "sellOn"]}
+        self.grid = grid
+        self.tickers = [tickers] if isinstance(tickers, str) else tickers
+        self.intervals = [intervals] if isinstance(intervals, str) else intervals
+        self.loader = kwargs.pop("loader", loadYahoo)
+        self.workers = kwargs.pop("workers", None) or os.cpu_count()
+        self.startDate = kwargs.pop("startDate", '')
+        self.endDate = kwargs.pop("endDate", '')
+        self.profitType = kwargs.pop("profitType", 't')
+        self.indicatorCache = kwargs.pop("indicatorCache", None)
+
+        if kwargs:
+            raise UserWarning(
+                f"{kwargs} contains not allowed parameters. "
+                f"Please choose from: [loader, workers, startDate, endDate, profitType, indicatorCache]"
+            )
+
+    @staticmethod
+    def loadTemplate(strategyName: str) -> dict:
+        """
+        Loads criteria template for specified strategy from input/stretegysTemplates/
+        """
+        folderPath = Path("input/stretegysTemplates/")
+        try:
+            with open(folderPath / f"{strategyName}.json", 'r') as f:
+                return json.load(f)[0]
+        except FileNotFoundError:
+            raise FileNotFoundError(f"There is no strategy template for: {strategyName}. "
+                                    f"Exisitings templates include: {os.listdir(folderPath)}")
+
+    @staticmethod
+    def formatCriteria(template: dict, params: dict) -> dict:
+        """
+        Fills template placeholders with params
+        :return: criteria dictionary with 'buyOn' and 'sellOn' data frames (or expressions)
+        """
+        return {side: template[side].format(**params) if isinstance(template[side], str)
+                else pd.DataFrame([{k: str(v).format(**params) for k, v in rule.items()} for rule in template[side]])
+                for side in ["buyOn", "sellOn"]}
+
+    @staticmethod
+    def addIndicators(data: pd.DataFrame, columns: list, indicatorCache=None, ticker: str = '', interval: str = '') \
+            -> pd.DataFrame:
+        """
+        Adds indicator columns (e.g. Close_sma_150, Close_rsi, Close_MACD_12_26) and columns of coarser intervals
+        (e.g. 1h:Close_sma_150, see MultiTimeframe) which are missing in stock price
+        :param indicatorCache: cache.IndicatorCache, if provided indicators of (ticker, interval) are taken from it
+        """
+        timeframes = [name for name in columns
+                      if name not in data.columns and stockPrice.MultiTimeframe.splitName(name)[0]]
+        if timeframes:
+            data = stockPrice.MultiTimeframe(data, interval).join(timeframes)
+        missing = [name for name in columns if name not in data.columns and any(
+            pattern.match(name) for pattern, _ in stockPrice.Indicators.namePatterns)]
+        if not missing:
+            return data
+        if indicatorCache is not None:
+            return indicatorCache.compute(data, ticker, interval, missing)
+
+        return stockPrice.Indicators(data).compute(missing).getSP()
+
+    @staticmethod
+    def maxDrawdown(profits: np.ndarray) -> float:
+        """
+        Largest drop of cumulative profit from its running maximum (starting from 0)
+        """
+        records = np.zeros(len(profits), dtype=stockPrice.TradeLog.dtype)
+        records["profit"] = profits
+        return stockPrice.TradeLog(records).maxDrawdown()
+
+    def combinations(self) -> list:
+        """
+        Returns list of tasks, grouped by ticker and interval, so one process tends to reuse loaded stock price
+        """
+        names = list(self.grid.keys())
+        params = [dict(zip(names, values)) for values in itertools.product(*[self.grid[n] for n in names])]
+        return [(ticker, interval, p, self.template, self.startDate, self.endDate, self.profitType)
+                for ticker in self.tickers for interval in self.intervals for p in params]
+
+    def run(self):
+        """
+        Runs all combinations and yields their results in order
+        :return: generator of dictionaries
+        """
+        tasks = self.combinations()
+        if self.workers == 1:
+            initWorker(self.loader, self.indicatorCache)
+            yield from map(runCombination, tasks)
+            return
+
+        chunkSize = max(1, len(tasks) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=initWorker,
+                                 initargs=(self.loader, self.indicatorCache)) as pool:
+            yield from pool.map(runCombination, tasks, chunksize=chunkSize)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Runs all combinations and collects results into columns
+        :return: data frame with one row per combination
+        """
+        columns = {}
+        for result in self.run():
+            for name, value in result.items():
+                columns.setdefault(name, []).append(value)
+
+        return pd.DataFrame(columns)
@@ -4,6 +4,7 @@ Contains class representing single trade.
 from __future__ import annotations
 from typing import TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
 import datetime as dt
 
@@ -12,6 +13,12 @@ if TYPE_CHECKING:
 
 
 class Trade:
+    """
+    Compact trade record. Only entry/exit positions and prices are stored, prices during trade are sliced from stock
+    price (kept by reference, not copied) when stockPriceDuringTrade is accessed.
+    """
+    __slots__ = ("entryDate", "exitDate", "entryIdx", "exitIdx", "entryPrice", "exitPrice", "profitType",
+                 "takeProfit", "stopLoss", "duration", "profit", "stockPrice")
 
     def __init__(self,
                  entryDate: dateType,
@@ -26,25 +33,64 @@ class Trade:
         :param stockPrice: dataframe with stock price
         :param profitType: 'r' for real/'t' for theoretical
         """
+        assert profitType in ['r', 't']
         self.entryDate: dateType = entryDate
         self.exitDate: dateType = exitDate
-        self.stockPriceDuringTrade = stockPrice.loc[entryDate:exitDate, ["Open", "High", "Low", "Close"]]
+        self.entryIdx: int = stockPrice.index.get_loc(entryDate)
+        self.exitIdx: int = stockPrice.index.get_loc(exitDate)
+        self.stockPrice = stockPrice
         self.profitType = profitType
         self.takeProfit = takeProfit
         self.stopLoss = stopLoss
+        self.entryPrice: float = float(stockPrice["Close"].iat[self.entryIdx])
+        self.exitPrice: float = Trade.exitPrices(self.entryPrice, stockPrice["High"].iat[self.exitIdx],
+                                                 stockPrice["Open"].iat[self.exitIdx]).item()
         self.duration: dateType = self.setDuration()
         self.profit: float = self.setProfit()
 
-    def setProfit(self):
-        assert self.profitType in ['r', 't']
-        entryClose = self.stockPriceDuringTrade.at[self.entryDate, "Close"]
-        exitHigh = self.stockPriceDuringTrade.at[self.exitDate, "High"]
-        exitLow = self.stockPriceDuringTrade.at[self.exitDate, "Open"]
+    @staticmethod
+    def exitPrices(entryPrice, exitHigh, exitOpen) -> np.ndarray:
+        """
+        Trade is won when High of exit candle is above entry Close, then it is closed at High, otherwise at Open
+        """
+        return np.where(np.asarray(exitHigh) > entryPrice, exitHigh, exitOpen)
+
+    @staticmethod
+    def profits(entryPrice, exitPrice, profitType: str, takeProfit: (float | int), stopLoss: (float | int)) \
+            -> np.ndarray:
+        """
+        Real profit is difference of exit and entry prices (rounded to 4 digits), theoretical one is equal to take
+        profit for won trades and minus stop loss for lost ones
+        """
+        difference = np.asarray(exitPrice, dtype=float) - entryPrice
+        if profitType == 'r':
+            return np.round(difference, 4)
+        return np.where(difference > 0, takeProfit / 10000, -stopLoss / 10000)
 
-        if exitHigh > entryClose:
-            return round(exitHigh - entryClose, 4) if self.profitType == 'r' else self.takeProfit/10000
-        else:
-            return round(exitLow - entryClose, 4) if self.profitType == 'r' else -self.stopLoss/10000
+    @staticmethod
+    def fromValues(entryDate: dateType, exitDate: dateType, entryIdx: int, exitIdx: int, entryPrice: float,
+                   exitPrice: float, profit: float, profitType: str = 't', takeProfit: (float | int) = 30,
+                   stopLoss: (float | int) = 30, stockPrice: (pd.DataFrame | None) = None) -> Trade:
+        """
+        Creates trade from already calculated values (e.g. row of TradeLog), without any lookups in stock price
+        """
+        trade = Trade.__new__(Trade)
+        trade.entryDate, trade.exitDate = entryDate, exitDate
+        trade.entryIdx, trade.exitIdx = entryIdx, exitIdx
+        trade.entryPrice, trade.exitPrice, trade.profit = entryPrice, exitPrice, profit
+        trade.profitType, trade.takeProfit, trade.stopLoss = profitType, takeProfit, stopLoss
+        trade.stockPrice = stockPrice
+        trade.duration = exitDate - entryDate
+        return trade
+
+    @property
+    def stockPriceDuringTrade(self) -> pd.DataFrame:
+        if self.stockPrice is None:
+            raise ValueError("Trade has no stock price attached")
+        return self.stockPrice.iloc[self.entryIdx:self.exitIdx + 1][["Open", "High", "Low", "Close"]]
+
+    def setProfit(self):
+        return Trade.profits(self.entryPrice, self.exitPrice, self.profitType, self.takeProfit, self.stopLoss).item()
 
     def setDuration(self):
         if isinstance(self.entryDate, str):
@@ -53,3 +99,6 @@ class Trade:
             self.exitDate = dt.datetime.strptime(self.exitDate, "%Y-%m-%d %H:%M:%S")
 
         return self.exitDate - self.entryDate
+
+    def __repr__(self):
+        return f"Trade(entry: {self.entryDate}, exit: {self.exitDate}, profit: {self.profit})"
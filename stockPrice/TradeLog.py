@@ -0,0 +1,198 @@
+"""
+File containing columnar container of trades. Trades are kept in one structured NumPy array (entry/exit positions,
+dates, prices, profit and duration), aggregates are calculated on its columns and Trade objects are created only when
+log is iterated or indexed.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from stockPrice.Trade import Trade
+
+
+class TradeLog(object):
+    dtype = np.dtype([("entryIdx", np.int64), ("exitIdx", np.int64),
+                      ("entryDate", np.int64), ("exitDate", np.int64),
+                      ("entryPrice", np.float64), ("exitPrice", np.float64),
+                      ("profit", np.float64), ("duration", np.int64)])
+
+    def __init__(self, records: (np.ndarray | None) = None, stockPrice: (pd.DataFrame | None) = None,
+                 profitType: str = 't', takeProfit: (float | int) = 30, stopLoss: (float | int) = 30,
+                 timeZone: (str | None) = None):
+        """
+        :param records: structured array of TradeLog.dtype, dates are int64 nanoseconds (UTC for timezone aware
+                        dates) and duration is in nanoseconds
+        :param stockPrice: stock price which entry/exit positions refer to, used to materialize prices during trades
+        :param profitType: 'r' for real/'t' for theoretical
+        :param timeZone: time zone of entry/exit dates, taken from stockPrice index if not provided
+        """
+        self.records = np.empty(0, dtype=TradeLog.dtype) if records is None else records
+        self.stockPrice = stockPrice
+        self.profitType = profitType
+        self.takeProfit = takeProfit
+        self.stopLoss = stopLoss
+        if timeZone is None and stockPrice is not None:
+            timeZone = stockPrice.index.tz
+        self.timeZone = timeZone
+
+    @staticmethod
+    def fromPositions(stockPrice: pd.DataFrame, entries, exits, profitType: str = 't',
+                      takeProfit: (float | int) = 30, stopLoss: (float | int) = 30) -> TradeLog:
+        """
+        Creates log of trades entered and exited on given row positions of stock price, prices and profits of all
+        trades are calculated at once
+        """
+        entries, exits = np.asarray(entries, dtype=np.int64), np.asarray(exits, dtype=np.int64)
+        records = np.empty(entries.shape[0], dtype=TradeLog.dtype)
+        records["entryIdx"], records["exitIdx"] = entries, exits
+
+        records["entryDate"] = TradeLog.nanoseconds(stockPrice.index[entries])
+        records["exitDate"] = TradeLog.nanoseconds(stockPrice.index[exits])
+        records["duration"] = records["exitDate"] - records["entryDate"]
+
+        records["entryPrice"] = stockPrice["Close"].to_numpy(dtype=np.float64)[entries]
+        records["exitPrice"] = Trade.exitPrices(records["entryPrice"],
+                                                stockPrice["High"].to_numpy(dtype=np.float64)[exits],
+                                                stockPrice["Open"].to_numpy(dtype=np.float64)[exits])
+        records["profit"] = Trade.profits(records["entryPrice"], records["exitPrice"], profitType, takeProfit,
+                                          stopLoss)
+
+        return TradeLog(records, stockPrice, profitType, takeProfit, stopLoss)
+
+    @staticmethod
+    def fromDates(stockPrice: pd.DataFrame, entryDates: list, exitDates: list, profitType: str = 't',
+                  takeProfit: (float | int) = 30, stopLoss: (float | int) = 30) -> TradeLog:
+        return TradeLog.fromPositions(stockPrice, stockPrice.index.get_indexer(pd.Index(entryDates)),
+                                      stockPrice.index.get_indexer(pd.Index(exitDates)), profitType,
+                                      takeProfit, stopLoss)
+
+    @staticmethod
+    def fromTrades(trades: list) -> TradeLog:
+        """
+        Creates log from Trade objects (e.g. yielded by StreamingBacktest), profit settings are taken from first trade
+        """
+        if not trades:
+            return TradeLog()
+        first = trades[0]
+        records = np.empty(len(trades), dtype=TradeLog.dtype)
+        for name in ["entryIdx", "exitIdx", "entryPrice", "exitPrice", "profit"]:
+            records[name] = [getattr(t, name) for t in trades]
+        records["entryDate"] = TradeLog.nanoseconds(pd.DatetimeIndex([t.entryDate for t in trades]))
+        records["exitDate"] = TradeLog.nanoseconds(pd.DatetimeIndex([t.exitDate for t in trades]))
+        records["duration"] = records["exitDate"] - records["entryDate"]
+
+        return TradeLog(records, first.stockPrice, first.profitType, first.takeProfit, first.stopLoss,
+                        getattr(first.entryDate, "tz", None))
+
+    @staticmethod
+    def nanoseconds(index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Dates as int64 nanoseconds, UTC for timezone aware index
+        """
+        return pd.DatetimeIndex(index).as_unit("ns").asi8
+
+    def dates(self, name: str) -> pd.DatetimeIndex:
+        dates = pd.DatetimeIndex(self.records[name].view("datetime64[ns]"))
+        return dates if self.timeZone is None else dates.tz_localize("UTC").tz_convert(self.timeZone)
+
+    @property
+    def entryDates(self) -> pd.DatetimeIndex:
+        return self.dates("entryDate")
+
+    @property
+    def exitDates(self) -> pd.DatetimeIndex:
+        return self.dates("exitDate")
+
+    @property
+    def profits(self) -> np.ndarray:
+        return self.records["profit"]
+
+    @property
+    def durations(self) -> pd.TimedeltaIndex:
+        return pd.TimedeltaIndex(self.records["duration"].view("timedelta64[ns]"))
+
+    def totalProfit(self) -> float:
+        return float(self.profits.sum())
+
+    def winRate(self) -> float:
+        """
+        Fraction of trades with positive profit, NaN for empty log
+        """
+        return float((self.profits > 0).mean()) if len(self) else np.nan
+
+    def expectancy(self) -> float:
+        """
+        Expected profit of one trade: win rate * average win - loss rate * average loss, NaN for empty log
+        """
+        return float(self.profits.mean()) if len(self) else np.nan
+
+    def equity(self) -> np.ndarray:
+        """
+        Cumulative profit after every trade, starting from 0
+        """
+        return np.concatenate([[0.0], np.cumsum(self.profits)])
+
+    def maxDrawdown(self) -> float:
+        """
+        Largest drop of cumulative profit from its running maximum (starting from 0)
+        """
+        if not len(self):
+            return 0.0
+        equity = self.equity()
+        return float(np.max(np.maximum.accumulate(equity) - equity))
+
+    def summary(self) -> dict:
+        return {"totalProfit": self.totalProfit(),
+                "tradeCount": len(self),
+                "winRate": self.winRate(),
+                "expectancy": self.expectancy(),
+                "maxDrawdown": self.maxDrawdown()}
+
+    def toFrame(self) -> pd.DataFrame:
+        return pd.DataFrame({"entryDate": self.entryDates, "exitDate": self.exitDates,
+                             "entryPrice": self.records["entryPrice"], "exitPrice": self.records["exitPrice"],
+                             "profit": self.profits, "duration": self.durations})
+
+    def trade(self, i: int) -> Trade:
+        """
+        Materializes i-th trade
+        """
+        record = self.records[i]
+        entryDate, exitDate = (pd.Timestamp(int(record[name])) for name in ["entryDate", "exitDate"])
+        if self.timeZone is not None:
+            entryDate, exitDate = entryDate.tz_localize("UTC").tz_convert(self.timeZone), \
+                exitDate.tz_localize("UTC").tz_convert(self.timeZone)
+        return Trade.fromValues(entryDate, exitDate, int(record["entryIdx"]), int(record["exitIdx"]),
+                                float(record["entryPrice"]), float(record["exitPrice"]), float(record["profit"]),
+                                self.profitType, self.takeProfit, self.stopLoss, self.stockPrice)
+
+    def __len__(self) -> int:
+        return self.records.shape[0]
+
+    def __iter__(self):
+        return (self.trade(i) for i in range(len(self)))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return TradeLog(self.records[item], self.stockPrice, self.profitType, self.takeProfit, self.stopLoss,
+                            self.timeZone)
+        return self.trade(range(len(self))[item])
+
+    def __eq__(self, other):
+        """
+        Logs are equal when their records (positions, dates, prices, profits and durations of trades) are equal, list
+        or tuple of Trade objects is compared with the same fields of its trades
+        """
+        if isinstance(other, (list, tuple)) and all(isinstance(t, Trade) for t in other):
+            other = TradeLog.fromTrades(list(other))
+        if isinstance(other, TradeLog):
+            return bool(np.array_equal(self.records, other.records))
+        if isinstance(other, (list, tuple)):
+            return False
+        return NotImplemented
+
+    # log is mutable (its records may be changed in place), so it is not hashable
+    __hash__ = None
+
+    def __repr__(self):
+        return f"TradeLog({len(self)} trades, total profit: {self.totalProfit()})"
@@ -0,0 +1,141 @@
+"""
+File containing walk-forward backtest. Strategy is backtested over sliding windows (folds) of stock price.
+Indicators, criteria arrays and buy signals are calculated once over the whole span and only sliced for every fold,
+folds are run in parallel threads (they share precalculated arrays).
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import time
+import pandas as pd
+
+import stockPrice
+
+
+class WalkForward(object):
+    """ Span notation, the same as used by StockPrice.interpretDates: H-k (hours), W-k (weeks), Y-k (years) """
+    spanUnits = {"H": "hours", "W": "weeks", "Y": "years"}
+
+    def __init__(self, data: pd.DataFrame, criteria: dict, window: (str | pd.DateOffset),
+                 step: (str | pd.DateOffset), **kwargs):
+        """
+        :param data: stock price data frame
+        :param criteria: dictionary with 'buyOn' and 'sellOn' criteria (and optionally compiled 'plan')
+        :param window: length of every fold e.g. 'W-4' (four weeks) or pd.DateOffset
+        :param step: distance between starts of consecutive folds e.g. 'W-1'
+        :param kwargs: indicators (list of Indicators.compute specs added before backtesting, missing indicator
+                       columns used by criteria are added anyway), startDate, endDate (span of all folds, e.g. 'Y-1'
+                       and 'W-0'), profitType, workers (number of threads, 1 runs folds in current thread)
+        """
+        self.criteria = criteria
+        self.plan = criteria.get("plan") or stockPrice.CriteriaPlan(criteria)
+        self.window = WalkForward.span(window)
+        self.step = WalkForward.span(step)
+        indicators = kwargs.pop("indicators", [])
+        self.startDate = kwargs.pop("startDate", '')
+        self.endDate = kwargs.pop("endDate", '')
+        self.profitType = kwargs.pop("profitType", 't')
+        self.workers = kwargs.pop("workers", None) or os.cpu_count()
+
+        if kwargs:
+            raise UserWarning(
+                f"{kwargs} contains not allowed parameters. "
+                f"Please choose from: [indicators, startDate, endDate, profitType, workers]"
+            )
+
+        start = time.perf_counter()
+        if indicators:
+            data = stockPrice.Indicators(data).compute(indicators).getSP()
+        self.stockPrice = stockPrice.Sweep.addIndicators(data, self.plan.dependencies)
+        self.stats = {"indicators": time.perf_counter() - start}
+        self.data, self.buySignals = {}, None
+        self.logs = {}
+
+    @staticmethod
+    def span(notation: (str | pd.DateOffset)) -> pd.DateOffset:
+        """
+        Converts span notation e.g. 'W-4' to date offset
+        """
+        if isinstance(notation, pd.DateOffset):
+            return notation
+        match = re.fullmatch(r"([HWY])-(\d+)", str(notation))
+        if match is None or int(match.group(2)) == 0:
+            raise ValueError(f"Incorrect span: {notation}. Use H-k, W-k or Y-k, where k > 0")
+
+        return pd.DateOffset(**{WalkForward.spanUnits[match.group(1)]: int(match.group(2))})
+
+    def folds(self) -> list:
+        """
+        Splits span into complete windows, windows without any bars (e.g. weekends) are skipped
+        :return: list of (first row, last row (exclusive), start date, end date (exclusive)) tuples
+        """
+        index = stockPrice.StockPrice(self.stockPrice).applyDateRange(self.startDate, self.endDate).index
+        if index.empty:
+            return []
+        offset = self.stockPrice.index.get_loc(index[0])
+
+        folds, start = [], index[0]
+        while start + self.window <= index[-1]:
+            end = start + self.window
+            lo, hi = index.searchsorted(start), index.searchsorted(end)
+            if hi > lo:
+                folds.append((offset + lo, offset + hi, start, end))
+            start += self.step
+
+        return folds
+
+    def prepare(self) -> None:
+        """
+        Calculates criteria arrays and buy signals once over the whole stock price
+        """
+        start = time.perf_counter()
+        self.data = self.plan.prepare(self.stockPrice)
+        self.buySignals = self.plan.evaluate("buyOn", self.data) if self.plan.warmUp("buyOn") is not None else None
+        self.stats["signals"] = time.perf_counter() - start
+
+    def runFold(self, fold: tuple) -> dict:
+        """
+        Backtests single fold on slices of precalculated arrays
+        :param fold: (fold number, (first row, last row, start date, end date))
+        :return: dictionary with fold dates and backtest summary
+        """
+        number, (lo, hi, startDate, endDate) = fold
+        start = time.perf_counter()
+        strategy = stockPrice.Strategy(self.stockPrice.iloc[lo:hi], self.criteria)
+        takeProfit, stopLoss = strategy.calculateTPSL()
+        buySignals = None if self.buySignals is None else self.buySignals[lo:hi]
+        simulator = stockPrice.Simulator(strategy, data={name: v[lo:hi] for name, v in self.data.items()},
+                                         buySignals=buySignals)
+        self.logs[number] = trades = simulator.run(self.profitType, takeProfit, stopLoss)
+
+        return {"fold": number, "startDate": startDate, "endDate": endDate, "bars": hi - lo,
+                **trades.summary(), "seconds": time.perf_counter() - start}
+
+    def run(self):
+        """
+        Runs all folds and yields their results in order, trade logs are kept in logs (fold number -> TradeLog)
+        :return: generator of dictionaries
+        """
+        self.prepare()
+        folds = list(enumerate(self.folds()))
+        if self.workers == 1:
+            yield from map(self.runFold, folds)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            yield from pool.map(self.runFold, folds)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Runs all folds and collects results into columns
+        :return: data frame with one row per fold
+        """
+        start = time.perf_counter()
+        columns = {}
+        for result in self.run():
+            for name, value in result.items():
+                columns.setdefault(name, []).append(value)
+        self.stats["folds"] = time.perf_counter() - start - self.stats["signals"]
+
+        return pd.DataFrame(columns)
@@ -3,6 +3,19 @@ Initializer file for stockPrice module
 """
 
 from .StockPrice import *
+from .Rolling import Rolling
+from .Kernels import Kernels
 from .Indicators import *
+from .StreamingIndicators import StreamingIndicators
 from .Backtesting import *
 from .Trade import Trade
+from .TradeLog import TradeLog
+from .Expression import Expression
+from .CriteriaPlan import CriteriaPlan
+from .Simulator import Simulator
+from .StreamingBacktest import StreamingBacktest
+from .Portfolio import Portfolio
+from .Sweep import Sweep
+from .WalkForward import WalkForward
+from .Resampler import Resampler
+from .MultiTimeframe import MultiTimeframe
@@ -0,0 +1,45 @@
+"""
+Script running parameter sweep over strategy template, e.g.:
+python sweep.py newHighAfterReversal --grid fast=20 slow=100,150 window=10,20 stopLoss=20,40 takeProfit=20,40 \
+    --tickers EURUSD=X GBPUSD=X --intervals 5m 15m --workers 8 --output sweep.csv
+"""
+import argparse
+
+from stockPrice import Sweep
+
+
+def parseGrid(grid: list) -> dict:
+    """
+    Changes ['name=1,2,3', ...] into {'name': [1, 2, 3], ...}
+    """
+    def parseValue(v: str):
+        for t in (int, float):
+            try:
+                return t(v)
+            except ValueError:
+                pass
+        return v
+
+    return {name: [parseValue(v) for v in values.split(',')]
+            for name, values in (g.split('=', 1) for g in grid)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backtests every combination of strategy template parameters.")
+    parser.add_argument("template", help="template name from input/stretegysTemplates/")
+    parser.add_argument("--grid", nargs="+", required=True, help="parameters as name=value1,value2,...")
+    parser.add_argument("--tickers", nargs="+", default=["EURUSD=X"])
+    parser.add_argument("--intervals", nargs="+", default=["5m"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--startDate", default='')
+    parser.add_argument("--endDate", default='')
+    parser.add_argument("--output", default=None, help="csv file for summary, printed if not provided")
+    args = parser.parse_args()
+
+    sweep = Sweep(Sweep.loadTemplate(args.template), parseGrid(args.grid), args.tickers, args.intervals,
+                  workers=args.workers, startDate=args.startDate, endDate=args.endDate)
+    summary = sweep.summary().sort_values("totalProfit", ascending=False)
+    if args.output:
+        summary.to_csv(args.output, index=False)
+    else:
+        print(summary.to_string(index=False))
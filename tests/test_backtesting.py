@@ -0,0 +1,106 @@
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex
+from stockPrice import Backtesting
+
+FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
+INDICATORS = ["Close_sma_20", "Close_sma_150", "Close_rsi", "Close_MACD_12_26"]
+
+
+def tradeKeys(trades: list) -> list:
+    return [(t.entryDate, t.exitDate, t.profit, t.duration) for t in trades]
+
+
+class TestSimulator(unittest.TestCase):
+
+    def assertSameTrades(self, stockPrice: pd.DataFrame, criteria: dict, **kwargs):
+        expected = Backtesting.Strategy(stockPrice, criteria).executeTrades(engine='loop', **kwargs)
+        actual = Backtesting.Strategy(stockPrice, criteria).executeTrades(engine='vectorized', **kwargs)
+        self.assertEqual(tradeKeys(expected), tradeKeys(actual))
+
+    def test_same_trades_as_loop_on_forex_data(self):
+        criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
+        for interval in ["15m", "30m", "1h"]:
+            for ticker in FOREX:
+                with self.subTest(ticker=ticker, interval=interval):
+                    self.assertSameTrades(loadForex(ticker, interval, INDICATORS), criteria)
+
+    def test_same_trades_as_loop_with_window_sell_criteria(self):
+        criteria = {
+            "buyOn": pd.DataFrame({"statistic": ["Close", "Close", "Close_rsi"],
+                                   "operation": [">", ">", "<"],
+                                   "value": ["avg_10", "[max_5]", "65"]}),
+            "sellOn": pd.DataFrame({"statistic": ["Low", "Close"],
+                                    "operation": ["<", "<"],
+                                    "value": ["SL_30", "min_10"]})
+        }
+        for ticker in ["EURUSD=X", "GBPUSD=X"]:
+            with self.subTest(ticker=ticker):
+                self.assertSameTrades(loadForex(ticker, "30m", INDICATORS), criteria, profitType='r')
+
+    def test_empty_result_when_no_buy_signal(self):
+        criteria = {
+            "buyOn": pd.DataFrame({"statistic": ["Close"], "operation": ["<"], "value": ["0"]}),
+            "sellOn": pd.DataFrame({"statistic": ["Low", "High"], "operation": ["<", ">"],
+                                    "value": ["SL_30", "TP_30"]})
+        }
+        trades = Backtesting.Strategy(loadForex("EURUSD=X", "1h", INDICATORS), criteria).executeTrades()
+        self.assertEqual([], trades)
+
+
+class TestCriteriaPlan(unittest.TestCase):
+
+    def test_plan_evaluates_same_buy_and_sell_signals_as_legacy(self):
+        criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)
+        stockPrice = loadForex("EURUSD=X", "30m", INDICATORS)
+        strategy = Backtesting.Strategy(stockPrice, criteria)
+        data = criteria["plan"].prepare(stockPrice)
+
+        buy = strategy.applyBuyCriteria(criteria["buyOn"], stockPrice)["Buy"].values
+        np.testing.assert_array_equal(buy, criteria["plan"].evaluate("buyOn", data))
+        sell = strategy.applySellCriteria(criteria["sellOn"], stockPrice.iloc[100:])["Sell"].values
+        np.testing.assert_array_equal(sell, criteria["plan"].evaluate("sellOn", data, 100, None, 100))
+
+    def test_plan_dependencies(self):
+        plan = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)["plan"]
+        self.assertEqual(["Close", "Close_sma_20", "Close_sma_150", "max_20", "Close_rsi", "Low", "High"],
+                         plan.dependencies)
+
+    def test_compiled_plan_is_memoized_by_modification_time(self):
+        filePath = "input/stretegysCriteria/newHighAfterReversal.json"
+        first = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)
+        second = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)
+        self.assertIs(first["plan"], second["plan"])
+
+        stat = os.stat(filePath)
+        try:
+            os.utime(filePath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            third = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)
+        finally:
+            os.utime(filePath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIsNot(first["plan"], third["plan"])
+
+    def test_compiled_criteria_are_copied(self):
+        first = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)
+        first["sellOn"].loc[0, "value"] = "SL_10"
+        first["buyOn"].drop(index=0, inplace=True)
+        second = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)
+        self.assertIs(first["plan"], second["plan"])
+        self.assertEqual("SL_40", second["sellOn"].loc[0, "value"])
+        self.assertEqual(5, len(second["buyOn"].index))
+        self.assertEqual(5, len(second["plan"].criteria["buyOn"].index))
+
+    def test_compiled_criteria_give_same_trades(self):
+        stockPrice = loadForex("GBPUSD=X", "15m", INDICATORS)
+        criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
+        compiled = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal", compiled=True)
+        self.assertEqual(tradeKeys(Backtesting.Strategy(stockPrice, criteria).executeTrades()),
+                         tradeKeys(Backtesting.Strategy(stockPrice, compiled).executeTrades()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,12 @@
 import datetime
 import os.path
+import tempfile
 import unittest
 
 import pandas as pd
 
 import cache.Yahoo as Yahoo
+from cache import ColumnarStore
 
 
 class TestCache(unittest.TestCase):
@@ -78,5 +80,88 @@ class TestCache(unittest.TestCase):
         self.assertEqual(y.interval, "1d")
 
 
+class TestAppendToExistingData(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filePath = os.path.join(self.folder.name, "EURUSD=X.csv")
+        self.data = ColumnarStore.readCsv("data/forex/15m/EURUSD=X.csv")
+        oldData = self.data.iloc[:100].copy()
+        oldData.iloc[-1, oldData.columns.get_loc("High")] += 0.001  # last candle was not finished yet
+        oldData.to_csv(self.filePath)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_append_replaces_last_candle(self):
+        Yahoo("EURUSD=X", "15m").appendToExistingData(self.data.iloc[99:150], self.filePath)
+        pd.testing.assert_frame_equal(self.data.iloc[:150], ColumnarStore.readCsv(self.filePath))
+
+    def test_append_writes_same_file_as_full_rewrite(self):
+        oldData = ColumnarStore.readCsv(self.filePath)
+        expectedPath = os.path.join(self.folder.name, "expected.csv")
+        pd.concat([oldData.iloc[:-1, :], self.data.iloc[90:150].loc[oldData.index[-1]:, :]]).dropna()\
+            .to_csv(expectedPath)
+
+        Yahoo("EURUSD=X", "15m").appendToExistingData(self.data.iloc[90:150], self.filePath)
+        with open(expectedPath) as expected, open(self.filePath) as actual:
+            self.assertEqual(expected.read(), actual.read())
+
+    def test_append_aligns_columns_and_time_zone(self):
+        newData = self.data.iloc[99:150, ::-1].copy()
+        newData.index = newData.index.tz_convert("UTC")
+        Yahoo("EURUSD=X", "15m").appendToExistingData(newData, self.filePath)
+        pd.testing.assert_frame_equal(self.data.iloc[:150], ColumnarStore.readCsv(self.filePath))
+
+    def test_older_data_does_not_change_file(self):
+        with open(self.filePath) as f:
+            before = f.read()
+        Yahoo("EURUSD=X", "15m").appendToExistingData(self.data.iloc[10:50], self.filePath)
+        with open(self.filePath) as f:
+            self.assertEqual(before, f.read())
+
+    def test_interrupted_append_is_replayed(self):
+        _, offset, _ = Yahoo.readTail(self.filePath)
+        Yahoo.writeJournal(self.filePath, offset, self.data.iloc[99:120].to_csv(header=False))
+        with open(self.filePath, 'a') as f:
+            f.write("2022-09-01 00:00:00+02:00,1.0")  # partially written row
+
+        Yahoo("EURUSD=X", "15m").appendToExistingData(self.data.iloc[119:150], self.filePath)
+        self.assertFalse(os.path.exists(f"{self.filePath}.journal"))
+        pd.testing.assert_frame_equal(self.data.iloc[:150], ColumnarStore.readCsv(self.filePath))
+
+    def test_incomplete_or_garbled_journal_is_discarded(self):
+        _, offset, _ = Yahoo.readTail(self.filePath)
+        rows = self.data.iloc[99:120].to_csv(header=False)
+        Yahoo.writeJournal(self.filePath, offset, rows)
+        with open(f"{self.filePath}.journal", 'rb') as f:
+            complete = f.read()
+        with open(self.filePath) as f:
+            before = f.read()
+
+        for journal in [complete[:len(complete) // 2], complete[:-3] + b"9\n", b"\n" + complete, b"", b"\xff\n"]:
+            with self.subTest(journal=journal[:20]):
+                with open(f"{self.filePath}.journal", 'wb') as f:
+                    f.write(journal)
+                Yahoo.replayJournal(self.filePath)
+                self.assertFalse(os.path.exists(f"{self.filePath}.journal"))
+                with open(self.filePath) as f:
+                    self.assertEqual(before, f.read())
+
+        with open(f"{self.filePath}.journal", 'w') as f:
+            f.write("garbled")
+        Yahoo("EURUSD=X", "15m").appendToExistingData(self.data.iloc[99:150], self.filePath)
+        pd.testing.assert_frame_equal(self.data.iloc[:150], ColumnarStore.readCsv(self.filePath))
+        self.assertEqual([], [p for p in os.listdir(self.folder.name) if "journal" in p])
+
+    def test_read_tail(self):
+        columns, offset, lastDate = Yahoo.readTail(self.filePath, blockSize=16)
+        self.assertEqual(list(self.data.columns), columns)
+        self.assertEqual(self.data.index[99], lastDate)
+        with open(self.filePath, 'rb') as f:
+            f.seek(offset)
+            self.assertTrue(f.read().decode().startswith(str(self.data.index[99])))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+import sqlalchemy
+
+from cache import ColumnarStore
+from dataBase import StockPriceDb
+import interface
+import stockPrice
+
+
+class TestStockPriceDb(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(self.folder.name, 'db.sqlite')}")
+        self.db = StockPriceDb(self.engine)
+        self.data = ColumnarStore.readCsv("data/forex/1h/EURUSD=X.csv")
+        self.inserted = []
+        sqlalchemy.event.listen(self.engine, "before_cursor_execute", self.countInserted)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.folder.cleanup()
+
+    def countInserted(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT"):
+            self.inserted.append(len(parameters) if executemany else 1)
+
+    def stored(self, ticker: str, interval: str = "1h") -> pd.DataFrame:
+        table = self.db.table(interval)
+        query = sqlalchemy.select(table).where(table.c.Ticker == ticker).order_by(table.c.Datetime)
+        stored = pd.read_sql(query, self.engine, parse_dates=["Datetime"]).set_index("Datetime")
+        return stored.drop(columns=["ID", "Ticker"])
+
+    def expected(self, data: pd.DataFrame) -> pd.DataFrame:
+        expected = data.rename(columns=lambda x: x.replace(' ', '_'))
+        expected.index = expected.index.tz_localize(None).rename("Datetime")
+        return expected
+
+    def test_save_creates_table(self):
+        self.db.save(self.data.iloc[:100], "EURUSD=X", "1h")
+        pd.testing.assert_frame_equal(self.expected(self.data.iloc[:100]), self.stored("EURUSD=X"),
+                                      check_index_type=False)
+
+    def test_save_replaces_last_candle_and_appends(self):
+        partial = self.data.iloc[:100].copy()
+        partial.iloc[-1, partial.columns.get_loc("Close")] += 0.001
+        self.db.save(partial, "EURUSD=X", "1h")
+        self.inserted.clear()
+
+        self.db.save(self.data.iloc[50:150], "EURUSD=X", "1h")
+        pd.testing.assert_frame_equal(self.expected(self.data.iloc[:150]), self.stored("EURUSD=X"),
+                                      check_index_type=False)
+        self.assertEqual([51], self.inserted)
+
+    def test_save_does_not_touch_other_tickers(self):
+        gbp = ColumnarStore.readCsv("data/forex/1h/GBPUSD=X.csv")
+        self.db.save(self.data.iloc[:100], "EURUSD=X", "1h")
+        self.db.save(gbp.iloc[:120], "GBPUSD=X", "1h")
+        self.db.save(self.data.iloc[99:110], "EURUSD=X", "1h")
+        self.assertEqual(120, len(self.stored("GBPUSD=X").index))
+        self.assertEqual(110, len(self.stored("EURUSD=X").index))
+
+    def test_save_older_data_keeps_stored(self):
+        self.db.save(self.data.iloc[:100], "EURUSD=X", "1h")
+        self.db.save(self.data.iloc[:50], "EURUSD=X", "1h")
+        self.assertEqual(100, len(self.stored("EURUSD=X").index))
+
+    def test_save_in_batches(self):
+        StockPriceDb(self.engine, batchSize=40).save(self.data.iloc[:100], "EURUSD=X", "1h")
+        self.assertEqual([40, 40, 20], self.inserted)
+
+
+class TestStockPriceDbQueries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(cls.folder.name, 'db.sqlite')}")
+        cls.db = StockPriceDb(cls.engine)
+        cls.data = {t: ColumnarStore.readCsv(f"data/forex/1h/{t}.csv") for t in ["EURUSD=X", "GBPUSD=X"]}
+        for ticker, data in cls.data.items():
+            cls.db.save(data, ticker, "1h")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+        cls.folder.cleanup()
+
+    def test_find_date_range_matches_loc(self):
+        start, end = "2022-09-05 10:00:00+02:00", "2022-09-07"
+        found = self.db.find("EURUSD=X", "1h", start, end, columns=["Close", "Volume"])
+        expected = self.data["EURUSD=X"].loc[pd.to_datetime(start, utc=True):pd.to_datetime(end, utc=True),
+                                             ["Close", "Volume"]]
+        pd.testing.assert_frame_equal(expected, found, check_index_type=False, check_names=False)
+
+    def test_find_multiple_tickers(self):
+        found = self.db.find(["EURUSD=X", "GBPUSD=X"], "1h", "2022-09-05", "2022-09-06", columns=["Ticker", "Close"])
+        self.assertEqual({"EURUSD=X", "GBPUSD=X"}, set(found["Ticker"]))
+        self.assertEqual(len(self.db.findByDateRange("2022-09-05", "2022-09-06", "1h").index), len(found.index))
+
+    def test_find_uses_bound_parameters(self):
+        self.assertTrue(self.db.find('EURUSD=X" OR "1"="1', "1h").empty)
+
+    def test_find_by_ticker_returns_all_columns_in_time_zone(self):
+        found = self.db.findByTicker("EURUSD=X", "1h")
+        self.assertEqual(["Adj_Close", "Close", "High", "Low", "Open", "Volume", "Ticker"], list(found.columns))
+        self.assertEqual(len(self.data["EURUSD=X"].index), len(found.index))
+        self.assertEqual("Europe/Warsaw", str(found.index.tz))
+
+    def test_stream_matches_find(self):
+        chunks = list(self.db.stream(None, "1h", "2022-09-01", chunkSize=100))
+        self.assertTrue(all(len(c.index) <= 100 and c["Ticker"].nunique() == 1 for c in chunks))
+        pd.testing.assert_frame_equal(self.db.find(None, "1h", "2022-09-01"), pd.concat(chunks))
+
+    def test_stream_overlap(self):
+        chunks = list(self.db.stream("EURUSD=X", "1h", columns=["Close"], chunkSize=100, overlap=10))
+        self.assertEqual(110, len(chunks[1].index))
+        pd.testing.assert_frame_equal(chunks[0].iloc[-10:], chunks[1].iloc[:10])
+
+    def test_map_chunks_indicators_match_whole_history(self):
+        def addSMA(data: pd.DataFrame) -> pd.DataFrame:
+            return stockPrice.Indicators(data).addSMA("Close", length=20).getSP()
+
+        chunks = self.db.mapChunks(addSMA, ["EURUSD=X", "GBPUSD=X"], "1h", columns=["Close", "Ticker"],
+                                   chunkSize=64, warmUp=19)
+        expected = pd.concat([addSMA(self.db.find(t, "1h", columns=["Close", "Ticker"])) for t in self.data])
+        pd.testing.assert_frame_equal(expected, pd.concat(chunks))
+
+    def test_map_chunks_records_span_of_every_chunk(self):
+        with interface.instrumentation.recording():
+            chunks = list(self.db.mapChunks(lambda data: data, "EURUSD=X", "1h", columns=["Close"], chunkSize=64))
+        histogram = interface.instrumentation.histograms()["StockPriceDb.mapChunks"]
+        interface.instrumentation.reset()
+        self.assertEqual(len(chunks), histogram["count"])
+        self.assertEqual(sum(interface.Instrumentation.sizeOf(c) for c in chunks), histogram["bytes"])
+
+    def test_migrate_creates_index_once(self):
+        self.data["EURUSD=X"].rename_axis("Datetime").reset_index().assign(Ticker="EURUSD=X")\
+            .to_sql("30m", self.engine, index=False)
+        self.assertEqual(["30m"], self.db.migrate(["30m"]))
+        self.assertEqual([], self.db.migrate())
+        indexes = sqlalchemy.inspect(self.engine).get_indexes("30m")
+        self.assertEqual([["Ticker", "Datetime"]], [i["column_names"] for i in indexes])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from interface import Utils
+from stockPrice import StockPrice
+
+
+class TestParseDates(unittest.TestCase):
+
+    def test_same_as_to_datetime(self):
+        for interval in ["1m", "2m", "1d"]:
+            dates = pd.read_csv(f"data/forex/{interval}/EURUSD=X.csv", index_col=[0]).index
+            expected = pd.to_datetime(dates, utc=True).tz_convert("Europe/Warsaw").as_unit("ns")
+            parsed = Utils.parseDates(dates)
+            self.assertTrue(expected.equals(parsed))
+            self.assertEqual(dates.name, parsed.name)
+            self.assertEqual("ns", parsed.unit)
+
+    def test_mixed_offsets(self):
+        parsed = Utils.parseDates(["2022-10-30 02:30:00+02:00", "2022-10-30 02:30:00+01:00",
+                                   "2022-10-29 22:00:00-05:00"])
+        self.assertEqual([pd.Timestamp("2022-10-30 00:30", tz="UTC"), pd.Timestamp("2022-10-30 01:30", tz="UTC"),
+                          pd.Timestamp("2022-10-30 03:00", tz="UTC")], list(parsed.tz_convert("UTC")))
+
+    def test_dates_without_offset_are_local(self):
+        parsed = Utils.parseDates(["2022-10-01 12:00:00", "2022-10-02 12:00:00"])
+        self.assertEqual(pd.Timestamp("2022-10-01 12:00", tz="Europe/Warsaw"), parsed[0])
+
+    def test_other_formats(self):
+        self.assertIsNone(Utils.parseFixedDates(np.array(["2022-10-01T12:00:00Z"])))
+        self.assertIsNone(Utils.parseFixedDates(np.array(["2022-10-01 12:00:00+02:00", "2022-10-01"])))
+        self.assertEqual(pd.Timestamp("2022-10-01 14:00", tz="Europe/Warsaw"),
+                         Utils.parseDates(["2022-10-01T12:00:00Z"])[0])
+        self.assertEqual(pd.Timestamp("2022-10-01", tz="Europe/Warsaw"), Utils.parseDates(["2022-10-01"])[0])
+
+
+class TestApplyDateRange(unittest.TestCase):
+
+    def setUp(self):
+        self.data = pd.read_csv("data/forex/2m/EURUSD=X.csv", index_col=[0])
+        self.data.index = Utils.parseDates(self.data.index)
+
+    def test_same_as_label_slicing(self):
+        index = self.data.index
+        for startDate, endDate in [('', ''), (index[100], index[500]), (str(index[100]), ''),
+                                   ("2022-09-05", "2022-09-07"), ("2030-01-01", ''), ('', "2000-01-01"),
+                                   (index[100].to_pydatetime(), index[200].tz_localize(None))]:
+            expected = self.data.loc[pd.to_datetime(str(startDate or index[0]), utc=True):
+                                     pd.to_datetime(str(endDate or index[-1]), utc=True), :]
+            selected = StockPrice(self.data).applyDateRange(startDate, endDate)
+            pd.testing.assert_frame_equal(expected, selected)
+
+    def test_returns_view(self):
+        selected = StockPrice(self.data).applyDateRange(self.data.index[100], self.data.index[500])
+        self.assertTrue(np.shares_memory(selected["Close"].to_numpy(), self.data["Close"].to_numpy()))
+
+    def test_unsorted_index(self):
+        rotated = pd.concat([self.data.iloc[1000:], self.data.iloc[:1000]])
+        startDate, endDate = self.data.index[1100], self.data.index[1500]
+        expected = rotated.loc[startDate:endDate, :]
+        pd.testing.assert_frame_equal(expected, StockPrice(rotated).applyDateRange(startDate, endDate))
+        self.assertEqual(401, len(expected.index))
+
+
+if __name__ == '__main__':
+    unittest.main()
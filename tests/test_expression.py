@@ -0,0 +1,107 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from stockPrice import CriteriaPlan, Expression, Indicators, Portfolio, StreamingBacktest, Strategy, StrategyUtils, \
+    Sweep
+
+SELL_ON = [{"statistic": "Low", "operation": "<", "value": "SL_40"},
+           {"statistic": "High", "operation": ">", "value": "TP_20"}]
+
+
+class TestExpression(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = pd.read_csv("data/forex/5m/EURUSD=X.csv", index_col=[0])
+        cls.data.index = pd.to_datetime(cls.data.index, utc=True).tz_convert("Europe/Warsaw")
+        cls.data = Indicators(cls.data).compute(["Close_sma_20", "Close_sma_150", "Close_rsi"]).getSP()
+        cls.rules = StrategyUtils.loadCriteria("newHighAfterReversal")
+        cls.expression = StrategyUtils.loadCriteria("newHighAfterReversalExpression")
+
+    def evaluate(self, expression: str, chunkSize: int = 8192) -> np.ndarray:
+        plan = CriteriaPlan({"buyOn": expression, "sellOn": SELL_ON}, chunkSize=chunkSize)
+        return plan.evaluate("buyOn", plan.prepare(self.data))
+
+    def test_expression_matches_rules(self):
+        rules, expression = CriteriaPlan(self.rules), CriteriaPlan(self.expression)
+        self.assertEqual(rules.dependencies, expression.dependencies)
+        self.assertEqual(rules.warmUp("buyOn"), expression.warmUp("buyOn"))
+        np.testing.assert_array_equal(rules.evaluate("buyOn", rules.prepare(self.data)),
+                                      expression.evaluate("buyOn", expression.prepare(self.data)))
+        trades = Strategy(self.data, self.expression).executeTrades()
+        self.assertTrue(len(trades))
+        self.assertEqual(Strategy(self.data, self.rules).executeTrades(), trades)
+
+    def test_expression_in_portfolio_and_streaming(self):
+        stockPrices = {"EURUSD=X": self.data.iloc[:4000], "EURUSD=X 2": self.data.iloc[4000:]}
+        expected = Portfolio(stockPrices, self.rules).run()
+        self.assertEqual(expected, Portfolio(stockPrices, self.expression).run())
+
+        bars = self.data[["Open", "High", "Low", "Close", "Volume"]]
+        trades = list(StreamingBacktest(self.expression).run(StreamingBacktest.frameBars(bars)))
+        self.assertEqual([(t.entryDate, t.exitDate) for t in Strategy(self.data, self.rules).executeTrades()],
+                         [(t.entryDate, t.exitDate) for t in trades])
+
+    def test_operators(self):
+        close, rsi, sma = (self.data[c].to_numpy() for c in ["Close", "Close_rsi", "Close_sma_20"])
+        cases = {"30 < Close_rsi < 70": (rsi > 30) & (rsi < 70),
+                 "inRange(Close_rsi, 30, 70)": (rsi > 30) & (rsi < 70),
+                 "not Close_rsi >= 50 or Close - Close_sma_20 > 0.001": ~(rsi >= 50) | (close - sma > 0.001),
+                 "-Close_rsi * 2 <= -100": -rsi * 2 <= -100,
+                 "Close_rsi != Close_rsi": rsi != rsi}
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                np.testing.assert_array_equal(expected, self.evaluate(expression))
+
+    def test_chunks_match_whole_evaluation(self):
+        expression = "Close > max(Close, 20) and Close_rsi < 70 or Close < min(Close, 10)"
+        np.testing.assert_array_equal(self.evaluate(expression), self.evaluate(expression, chunkSize=97))
+
+    def test_constant_or_anchored_first_operand(self):
+        close, sma = self.data["Close"].to_numpy(), self.data["Close_sma_20"].to_numpy()
+        np.testing.assert_array_equal(close > sma, self.evaluate("True and Close > Close_sma_20"))
+        np.testing.assert_array_equal(close > sma, self.evaluate("False or Close > Close_sma_20", chunkSize=97))
+
+        for buyOn in ["True and Close > Close_sma_20", "SL(40) > 0.5 and Close > Close_sma_20"]:
+            with self.subTest(buyOn=buyOn):
+                criteria = dict(self.rules, buyOn="Close > Close_sma_20")
+                expected = Strategy(self.data, criteria).executeTrades()
+                self.assertEqual(expected, Strategy(self.data, dict(criteria, buyOn=buyOn)).executeTrades())
+                stockPrices = {"EURUSD=X": self.data.iloc[:4000], "EURUSD=X 2": self.data.iloc[4000:]}
+                self.assertEqual(Portfolio(stockPrices, criteria).run(),
+                                 Portfolio(stockPrices, dict(criteria, buyOn=buyOn)).run())
+
+    def test_sell_on_expression(self):
+        criteria = dict(self.rules, sellOn="Low < SL(40) or High > TP_20")
+        self.assertEqual([40.0, 20.0], StrategyUtils.calculateTPSL(criteria["sellOn"]))
+        self.assertEqual(Strategy(self.data, self.rules).executeTrades(), Strategy(self.data, criteria).executeTrades())
+        self.assertEqual(Portfolio({"EURUSD=X": self.data}, self.rules).run(),
+                         Portfolio({"EURUSD=X": self.data}, criteria).run())
+        with self.assertRaises(ValueError):
+            Strategy(self.data, dict(self.rules, sellOn="Low < Close_sma_20"))
+
+    def test_common_subexpressions_are_shared(self):
+        plan = CriteriaPlan({"buyOn": "Close > max(Close, 20) and (Close > max_20 or Close_rsi < 70) and "
+                                      "Close_rsi < 70", "sellOn": SELL_ON})
+        expression = plan.expressions["buyOn"]
+        self.assertEqual(["Close", "max_20", "Close_rsi", "70"], [o.name for o in expression.operands])
+        self.assertEqual(2, sum(node.kind == "compare" for node in expression.nodes))
+        self.assertEqual(["Close", "max_20", "Close_rsi", "Low", "High"], plan.dependencies)
+
+    def test_timeframe_columns(self):
+        plan = CriteriaPlan({"buyOn": "Close > 1h:Close_sma_150 and 1d:Close_rsi < 70", "sellOn": SELL_ON})
+        self.assertEqual(["Close", "1h:Close_sma_150", "1d:Close_rsi", "Low", "High"], plan.dependencies)
+
+    def test_sweep_template(self):
+        criteria = Sweep.formatCriteria({"buyOn": "Close > max(Close, {window})", "sellOn": SELL_ON}, {"window": 30})
+        self.assertEqual("Close > max(Close, 30)", criteria["buyOn"])
+        self.assertEqual(["Close", "max_30", "Low", "High"], CriteriaPlan(criteria).dependencies)
+
+    def test_unsupported_expressions(self):
+        for expression in ["Close ** 2 > 1", "foo(Close) > 1", "max(High, 20) < Close", "Close >", "Close[0] > 1",
+                           "max(Close, x) > 1"]:
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    Expression(CriteriaPlan({"buyOn": [], "sellOn": []}).compileOperand).parse(expression)
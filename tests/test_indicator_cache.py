@@ -0,0 +1,111 @@
+from concurrent.futures import ProcessPoolExecutor
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import ColumnarStore, IndicatorCache
+from stockPrice import Indicators, Sweep
+
+
+SPECS = ["Close_sma_20", "Close_sma_150", "Close_rsi", "Close_MACD_12_26", "Close_max_20"]
+
+
+def computeRepeatedly(folder: str, repeat: int) -> bool:
+    """
+    Computes the same entries as other processes, alternately with and without the last bars, so every call
+    replaces (or evicts) entries other processes may be reading at the moment
+    """
+    cache = IndicatorCache(folder, maxBytes=2 ** 20)
+    data = ColumnarStore.readCsv("data/forex/15m/EURUSD=X.csv")
+    expected = {rows: Indicators(data.iloc[:rows]).compute(SPECS).getSP() for rows in [len(data.index) - 200,
+                                                                                      len(data.index)]}
+    matches = True
+    for i in range(repeat):
+        for rows, frame in expected.items():
+            computed = cache.compute(data.iloc[:rows], ["EURUSD=X", "GBPUSD=X"][i % 2], "15m", SPECS)
+            matches &= np.allclose(frame.to_numpy(), computed.to_numpy(), rtol=1e-7, equal_nan=True)
+    return matches
+
+
+class TestIndicatorCache(unittest.TestCase):
+
+    specs = SPECS
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.cache = IndicatorCache(self.folder.name)
+        self.data = ColumnarStore.readCsv("data/forex/15m/EURUSD=X.csv")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_miss_then_hit(self):
+        computed = self.cache.compute(self.data, "EURUSD=X", "15m", self.specs)
+        cached = self.cache.compute(self.data, "EURUSD=X", "15m", self.specs)
+        expected = Indicators(self.data).compute(self.specs).getSP()
+        pd.testing.assert_frame_equal(expected, computed)
+        pd.testing.assert_frame_equal(expected, cached)
+        self.assertEqual({"hits": 1, "extensions": 0, "misses": 1, "evictions": 0}, self.cache.stats)
+
+    def test_equivalent_specs_share_entry(self):
+        self.cache.compute(self.data, "EURUSD=X", "15m", ["Close_rsi"])
+        self.cache.compute(self.data, "EURUSD=X", "15m", [{"indicator": "rsi", "length": 14}])
+        self.assertEqual(1, self.cache.stats["hits"])
+        self.cache.compute(self.data, "GBPUSD=X", "15m", ["Close_rsi"])
+        self.assertEqual(2, self.cache.stats["misses"])
+
+    def test_appended_bars_are_extended(self):
+        self.cache.compute(self.data.iloc[:-200], "EURUSD=X", "15m", self.specs)
+        extended = self.cache.compute(self.data, "EURUSD=X", "15m", self.specs)
+        self.assertEqual(1, self.cache.stats["extensions"])
+        expected = Indicators(self.data).compute(self.specs).getSP()
+        pd.testing.assert_frame_equal(expected, extended, rtol=1e-7)
+
+        self.cache.compute(self.data, "EURUSD=X", "15m", self.specs)
+        self.assertEqual(1, self.cache.stats["hits"])
+
+    def test_changed_data_is_recalculated(self):
+        self.cache.compute(self.data, "EURUSD=X", "15m", self.specs)
+        changed = self.data.copy()
+        changed.iloc[100, changed.columns.get_loc("Close")] += 0.01
+        computed = self.cache.compute(changed, "EURUSD=X", "15m", self.specs)
+        self.assertEqual(2, self.cache.stats["misses"])
+        pd.testing.assert_frame_equal(Indicators(changed).compute(self.specs).getSP(), computed)
+
+        self.cache.maxAppend = 10
+        self.cache.compute(self.data.iloc[:-200], "EURUSD=X", "15m", self.specs)
+        self.cache.compute(self.data, "EURUSD=X", "15m", self.specs)
+        self.assertEqual(4, self.cache.stats["misses"])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.compute(self.data, "EURUSD=X", "15m", ["Close_sma_20"])
+        self.cache.maxBytes = int(2.5 * self.cache.size())
+        self.cache.compute(self.data, "GBPUSD=X", "15m", ["Close_sma_20"])
+        self.cache.compute(self.data, "EURUSD=X", "15m", ["Close_sma_20"])
+        self.cache.compute(self.data, "AUDUSD=X", "15m", ["Close_sma_20"])
+        self.assertEqual(1, self.cache.stats["evictions"])
+        self.assertLessEqual(self.cache.size(), self.cache.maxBytes)
+
+        self.cache.compute(self.data, "EURUSD=X", "15m", ["Close_sma_20"])
+        self.cache.compute(self.data, "GBPUSD=X", "15m", ["Close_sma_20"])
+        self.assertEqual(2, self.cache.stats["hits"])
+        self.assertEqual(4, self.cache.stats["misses"])
+
+    def test_sweep_add_indicators(self):
+        added = Sweep.addIndicators(self.data, ["Close", "Close_sma_20"], self.cache, "EURUSD=X", "15m")
+        self.assertIn("Close_sma_20", added.columns)
+        self.assertEqual(1, self.cache.stats["misses"])
+
+    def test_concurrent_processes(self):
+        with ProcessPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(computeRepeatedly, [self.folder.name] * 6, [10] * 6))
+        self.assertEqual([True] * 6, results)
+        self.assertEqual([], [p.name for p in self.cache.store.folderPath.glob("*/*") if p.suffix in [".tmp", ".old"]])
+        pd.testing.assert_frame_equal(Indicators(self.data).compute(self.specs).getSP(),
+                                      self.cache.compute(self.data, "EURUSD=X", "15m", self.specs), rtol=1e-7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from stockPrice import Indicators, Kernels
+from stockPrice.Kernels import emaLoop
+
+
+class TestIndicatorsCompute(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = pd.read_csv("data/forex/15m/EURUSD=X.csv", index_col=[0])
+        cls.data.index = pd.to_datetime(cls.data.index, utc=True).tz_convert("Europe/Warsaw")
+
+    def test_compute_matches_add_methods(self):
+        chained = Indicators(self.data, backend="ta").addSMA(["Close", "Open"], length=20).addEMA(length=12).addRSI()\
+            .addMACD(shortMACD=5, longMACD=35).addBollingerBands(length=30).getSP()
+        computed = Indicators(self.data).compute([{"indicator": "sma", "column": ["Close", "Open"]},
+                                                  {"indicator": "ema", "length": 12},
+                                                  {"indicator": "rsi"},
+                                                  {"indicator": "macd", "shortMACD": 5, "longMACD": 35},
+                                                  {"indicator": "bollinger", "length": 30}]).getSP()
+        self.assertEqual(list(chained.columns), list(computed.columns))
+        pd.testing.assert_frame_equal(chained, computed, check_exact=False, rtol=1e-9)
+
+    def test_compute_from_column_names(self):
+        computed = Indicators(self.data).compute(["Close_sma_150", "High_ema_5", "Close_MACD_sign_12_26"]).getSP()
+        expected = Indicators(self.data, backend="ta").addSMA(length=150).addEMA("High", length=5).addMACD().getSP()
+        pd.testing.assert_frame_equal(expected, computed, check_exact=False, rtol=1e-9)
+
+    def test_compute_replaces_existing_columns(self):
+        data = self.data.assign(Close_sma_20=0.0)
+        computed = Indicators(data).compute(["Close_sma_20"]).getSP()
+        self.assertEqual(list(data.columns), list(computed.columns))
+        np.testing.assert_allclose(self.data["Close"].rolling(20).mean(), computed["Close_sma_20"])
+
+    def test_parse_spec(self):
+        self.assertEqual({"indicator": "macd", "column": "Open", "shortMACD": 5, "longMACD": 35, "signalMACD": 9},
+                         Indicators.parseSpec("Open_MACD_diff_5_35"))
+        self.assertEqual({"indicator": "rsi", "column": "Close", "length": 7},
+                         Indicators.parseSpec({"indicator": "RSI", "length": 7}))
+        with self.assertRaises(ValueError):
+            Indicators.parseSpec("Close")
+        with self.assertRaises(UserWarning):
+            Indicators.parseSpec({"indicator": "sma", "window": 20})
+
+
+class TestKernels(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = pd.read_csv("data/forex/2m/EURUSD=X.csv", index_col=[0])
+        cls.data.index = pd.to_datetime(cls.data.index, utc=True).tz_convert("Europe/Warsaw")
+        cls.close = cls.data["Close"].to_numpy()
+
+    def test_numpy_backend_matches_ta(self):
+        specs = ["Close_sma_20", "Close_sma_500", "Close_ema_10", "Close_ema_200", "Close_rsi", "Close_MACD_12_26",
+                 {"indicator": "rsi", "length": 2}, {"indicator": "bollinger"}, {"indicator": "macd", "shortMACD": 3,
+                                                                                 "longMACD": 6, "signalMACD": 2}]
+        numpy = Indicators(self.data).compute(specs).getSP()
+        ta = Indicators(self.data, backend="ta").compute(specs).getSP()
+        self.assertEqual(list(ta.columns), list(numpy.columns))
+        pd.testing.assert_frame_equal(ta, numpy, check_exact=False, rtol=1e-7, atol=1e-9)
+
+    def test_add_methods_use_backend(self):
+        numpy = Indicators(self.data).addRSI().addBollingerBands().getSP()
+        ta = Indicators(self.data, backend="ta").addRSI().addBollingerBands().getSP()
+        pd.testing.assert_frame_equal(ta, numpy, check_exact=False, rtol=1e-7, atol=1e-9)
+        with self.assertRaises(ValueError):
+            Indicators(self.data, backend="talib")
+
+    def test_ema_with_nan_values(self):
+        values = self.close[:500].copy()
+        values[[0, 1, 7, 100, 101, 102]] = np.nan
+        for minPeriods in [1, 10]:
+            expected = pd.Series(values).ewm(alpha=0.2, min_periods=minPeriods, adjust=False).mean().to_numpy()
+            out = np.empty_like(values)
+            emaLoop(values, 0.2, minPeriods, out)
+            np.testing.assert_allclose(expected, out, rtol=1e-12)
+            np.testing.assert_allclose(expected, Kernels.ema(values, 0.2, minPeriods), rtol=1e-12)
+            np.testing.assert_allclose(expected[2:7], Kernels.ema(values[:7], 0.2, minPeriods)[2:7], rtol=1e-12)
+
+    def test_linear_filter_matches_recursion(self):
+        b = np.random.default_rng(0).normal(size=10000)
+        for gamma in [0.0, 0.3, 0.9, 0.999]:
+            expected, previous = np.empty_like(b), 1.5
+            for i, v in enumerate(b):
+                expected[i] = previous = gamma * previous + v
+            np.testing.assert_allclose(expected, Kernels.linearFilter(b, gamma, 1.5), rtol=1e-9, atol=1e-12)
+
+    def test_sma_std_match_pandas_with_nan_values(self):
+        values = self.close.copy()
+        values[[3, 1000, 1001]] = np.nan
+        for length in [20, 150]:
+            with self.subTest(length=length):
+                series = pd.Series(values).rolling(length, min_periods=length)
+                np.testing.assert_allclose(series.mean().to_numpy(), Kernels.sma(values, length), rtol=1e-12)
+                np.testing.assert_allclose(series.std(ddof=0).to_numpy(), Kernels.std(values, length), rtol=1e-6,
+                                           atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
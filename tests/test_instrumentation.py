@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import interface
+from interface import Instrumentation, instrumentation
+from cache import ColumnarStore
+from stockPrice import Indicators
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+
+    def test_disabled_records_nothing(self):
+        with self.instrumentation.span("a") as span:
+            span.bytes = 10
+        self.instrumentation.count("calls")
+        self.assertIs(Instrumentation.noSpan, span)
+        self.assertEqual({"histograms": {}, "counters": {}, "dropped": 0}, self.instrumentation.summary())
+
+    def test_nested_spans(self):
+        with self.instrumentation.recording():
+            with self.instrumentation.span("outer", size=100):
+                for _ in range(3):
+                    with self.instrumentation.span("inner"):
+                        pass
+            self.instrumentation.count("calls", 2)
+
+        histograms = self.instrumentation.histograms()
+        self.assertFalse(self.instrumentation.enabled)
+        self.assertEqual(1, histograms["outer"]["count"])
+        self.assertEqual(3, histograms["inner"]["count"])
+        self.assertEqual(100, histograms["outer"]["bytes"])
+        self.assertEqual(3, sum(histograms["inner"]["buckets"].values()))
+        self.assertLessEqual(histograms["inner"]["p50"], histograms["inner"]["p99"])
+        self.assertEqual({"calls": 2}, self.instrumentation.counters)
+
+        events = {e["name"]: e for e in self.instrumentation.traceEvents()}
+        self.assertEqual("outer", events["inner"]["args"]["parent"])
+        self.assertEqual(1, events["inner"]["args"]["depth"])
+        self.assertGreaterEqual(events["inner"]["ts"], events["outer"]["ts"])
+
+    def test_max_events(self):
+        limited = Instrumentation(enabled=True, maxEvents=2)
+        for _ in range(5):
+            with limited.span("a"):
+                pass
+        self.assertEqual(2, len(limited.traceEvents()))
+        self.assertEqual(3, limited.dropped)
+        self.assertEqual(5, limited.histograms()["a"]["count"])
+
+    def test_export(self):
+        with self.instrumentation.recording():
+            with self.instrumentation.span("a"):
+                self.instrumentation.count("calls")
+        with tempfile.TemporaryDirectory() as folder:
+            self.instrumentation.toJson(os.path.join(folder, "spans.json"))
+            self.instrumentation.toChromeTrace(os.path.join(folder, "trace.json"))
+            with open(os.path.join(folder, "spans.json")) as f:
+                saved = json.load(f)
+            with open(os.path.join(folder, "trace.json")) as f:
+                trace = json.load(f)
+        self.assertEqual(1, saved["histograms"]["a"]["count"])
+        self.assertEqual({"calls": 1}, saved["counters"])
+        self.assertEqual(["X", "C"], [e["ph"] for e in trace["traceEvents"]])
+
+    def test_timer_records_indicators(self):
+        data = ColumnarStore.readCsv("data/forex/1h/EURUSD=X.csv")
+        with instrumentation.recording():
+            indicators = Indicators(data).addSMA(length=20)
+        histograms = instrumentation.histograms()
+        instrumentation.reset()
+
+        self.assertEqual(1, histograms["Indicators.addSMA"]["count"])
+        self.assertEqual(1, histograms["Indicators.compute"]["count"])
+        self.assertEqual(Instrumentation.sizeOf(indicators.getSP()), histograms["Indicators.addSMA"]["bytes"])
+
+    def test_timer_keeps_function(self):
+        @interface.timer(name="square")
+        def square(x):
+            """ Squares x """
+            return x * x
+
+        self.assertEqual("square", square.__name__)
+        self.assertEqual(9, square(3))
+        with instrumentation.recording():
+            np.testing.assert_array_equal(np.ones(4), square(np.ones(4)))
+        self.assertEqual(32, instrumentation.histograms()["square"]["bytes"])
+        instrumentation.reset()
+
+
+if __name__ == '__main__':
+    unittest.main()
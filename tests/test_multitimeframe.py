@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import ColumnarStore
+from stockPrice import Backtesting, CriteriaPlan, Indicators, MultiTimeframe, Resampler, Sweep
+
+
+class TestMultiTimeframe(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = ColumnarStore.readCsv("data/forex/5m/EURUSD=X.csv").iloc[:3000]
+
+    def test_names_and_intervals(self):
+        self.assertEqual(("1h", "Close_sma_150"), MultiTimeframe.splitName("1h:Close_sma_150"))
+        self.assertEqual(('', "Close_sma_150"), MultiTimeframe.splitName("Close_sma_150"))
+        self.assertEqual("5m", MultiTimeframe.inferInterval(self.data.index))
+        self.assertEqual(["1h:Close_min_20", "1h:Close_max_20"],
+                         Backtesting.StrategyUtils.splitValue("[1h:Close_min_20:1h:Close_max_20]"))
+        self.assertEqual(["30", "70"], Backtesting.StrategyUtils.splitValue("[30:70]"))
+        self.assertRaises(ValueError, MultiTimeframe(self.data).columns, ["1m:Close"])
+
+    @staticmethod
+    def naiveLookup(frame: pd.DataFrame, column: str, duration, baseIndex: pd.DatetimeIndex,
+                    baseDuration=pd.Timedelta(minutes=5)) -> list:
+        """
+        Value of the last bar of frame closed (start + duration) at or before every base bar is closed
+        """
+        closed = pd.Series(frame[column].to_numpy(), index=frame.index + duration)
+        return [closed.loc[:end].iloc[-1] if closed.index[0] <= end else np.nan for end in baseIndex + baseDuration]
+
+    def test_matches_naive_lookup(self):
+        columns = MultiTimeframe(self.data, "5m").columns(["1h:Close", "1h:Close_sma_20", "1d:High"])
+        for interval, column, duration in [("1h", "Close", pd.Timedelta(hours=1)),
+                                           ("1h", "Close_sma_20", pd.Timedelta(hours=1)),
+                                           ("1d", "High", pd.DateOffset(days=1))]:
+            frame = Indicators(Resampler.resample(self.data, interval)).compute(["Close_sma_20"]).getSP()
+            np.testing.assert_array_equal(self.naiveLookup(frame, column, duration, self.data.index),
+                                          columns[f"{interval}:{column}"].to_numpy())
+
+    def test_provided_frame_not_aligned_to_midnight(self):
+        # Yahoo's 90m bars start at 23:30, 01:00, ..., the 23:30 bar is closed at 01:00
+        frame = ColumnarStore.readCsv("data/forex/90m/EURUSD=X.csv")
+        columns = MultiTimeframe(self.data, "5m", {"90m": frame}).columns(["90m:Close"])
+        np.testing.assert_array_equal(self.naiveLookup(frame, "Close", pd.Timedelta(minutes=90), self.data.index),
+                                      columns["90m:Close"].to_numpy())
+        self.assertTrue(np.isnan(columns.loc["2022-08-19 00:50", "90m:Close"]))
+        self.assertEqual(frame.loc["2022-08-18 23:30", "Close"], columns.loc["2022-08-19 00:55", "90m:Close"])
+
+    def test_no_look_ahead(self):
+        names = ["1h:Close", "1h:Close_rsi", "1d:Close_sma_5"]
+        columns = MultiTimeframe(self.data, "5m").columns(names)
+        future = self.data.copy()
+        future.iloc[2000:, :] *= 1.1
+        changed = MultiTimeframe(future, "5m").columns(names)
+        pd.testing.assert_frame_equal(columns.iloc[:2000], changed.iloc[:2000])
+        self.assertFalse(columns.iloc[2000:].equals(changed.iloc[2000:]))
+
+    def test_provided_frames_are_used(self):
+        hours = Resampler.resample(self.data, "1h")
+        hours["Close"] += 1
+        columns = MultiTimeframe(self.data, "5m", {"1h": hours}).columns(["1h:Close"])
+        expected = MultiTimeframe(self.data, "5m").columns(["1h:Close"]) + 1
+        pd.testing.assert_frame_equal(expected, columns)
+
+    def test_criteria_reference_other_interval(self):
+        criteria = {"buyOn": [{"statistic": "Close", "operation": ">", "value": "1h:Close_sma_20"},
+                              {"statistic": "1h:Close_rsi", "operation": "<", "value": "70"}],
+                    "sellOn": [{"statistic": "Low", "operation": "<", "value": "SL_40"},
+                               {"statistic": "High", "operation": ">", "value": "TP_20"}]}
+        plan = CriteriaPlan(criteria)
+        self.assertEqual(["Close", "1h:Close_sma_20", "1h:Close_rsi", "Low", "High"], plan.dependencies)
+        data = Sweep.addIndicators(self.data, plan.dependencies)
+        expected = Indicators(self.data).addTimeframes(["1h:Close_sma_20", "1h:Close_rsi"], "5m").getSP()
+        pd.testing.assert_frame_equal(expected, data)
+
+        criteria = {side: pd.DataFrame(rules) for side, rules in criteria.items()}
+        strategy = Backtesting.Strategy(data, criteria)
+        buy = strategy.applyBuyCriteria(criteria["buyOn"], data)["Buy"].to_numpy()
+        np.testing.assert_array_equal(buy, plan.evaluate("buyOn", plan.prepare(data)))
+        self.assertTrue(len(Backtesting.Strategy(data, dict(criteria, plan=plan)).executeTrades()))
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import ColumnarStore, CsvProvider, DownloadPipeline
+from stockPrice import Resampler
+
+FOREX = ["EURUSD=X", "GBPUSD=X"]
+INTERVALS = ["15m", "30m", "1h"]
+
+
+class FlakyProvider(CsvProvider):
+
+    def __init__(self, failures: int, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, tickers: list, interval: str) -> dict:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("simulated network error")
+        return super().__call__(tickers, interval)
+
+
+class TestDownloadPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        for interval in INTERVALS:
+            os.makedirs(os.path.join(self.folder.name, interval))
+            for ticker in FOREX:
+                data = ColumnarStore.readCsv(f"data/forex/{interval}/{ticker}.csv")
+                data.iloc[:-20].to_csv(os.path.join(self.folder.name, interval, f"{ticker}.csv"))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def assertCachedFilesComplete(self, intervals: list):
+        for interval in intervals:
+            for ticker in FOREX:
+                pd.testing.assert_frame_equal(
+                    ColumnarStore.readCsv(f"data/forex/{interval}/{ticker}.csv"),
+                    ColumnarStore.readCsv(os.path.join(self.folder.name, interval, f"{ticker}.csv")))
+
+    def test_pipeline_appends_fetched_data(self):
+        stats = DownloadPipeline(FOREX, INTERVALS, fetch=CsvProvider(lastRows=50), folderPath=self.folder.name,
+                                 fetchWorkers=3, persistWorkers=2).run()
+        self.assertCachedFilesComplete(INTERVALS)
+        self.assertEqual(3, stats["fetch"]["count"])
+        self.assertEqual(6, stats["persist"]["count"])
+        self.assertEqual([], stats["errors"])
+
+    def test_fetch_is_retried(self):
+        stats = DownloadPipeline(FOREX, ["1h"], fetch=FlakyProvider(2, lastRows=50), folderPath=self.folder.name,
+                                 retries=3, backoff=0).run()
+        self.assertCachedFilesComplete(["1h"])
+        self.assertEqual(2, stats["fetch"]["retries"])
+        self.assertEqual(0, stats["fetch"]["failures"])
+
+    def test_failed_fetch_is_reported(self):
+        stats = DownloadPipeline(FOREX, ["1h"], fetch=FlakyProvider(5, lastRows=50), folderPath=self.folder.name,
+                                 retries=2, backoff=0).run()
+        self.assertEqual(1, stats["fetch"]["failures"])
+        self.assertEqual(0, stats["persist"]["count"])
+        self.assertEqual(1, len(stats["errors"]))
+
+    def test_persist_saves_to_db(self):
+        class FakeDb:
+            saved = []
+
+            def save(self, newData, ticker, interval):
+                self.saved.append((ticker, interval, len(newData.index)))
+
+        db = FakeDb()
+        DownloadPipeline(FOREX, ["1h"], fetch=CsvProvider(lastRows=50), folderPath=self.folder.name, db=db).run()
+        self.assertEqual([("EURUSD=X", "1h", 50), ("GBPUSD=X", "1h", 50)], sorted(db.saved))
+
+    def test_derived_intervals_are_resampled(self):
+        data = ColumnarStore.readCsv("data/forex/5m/EURUSD=X.csv")
+        os.makedirs(os.path.join(self.folder.name, "5m"))
+        data.iloc[:-200].to_csv(os.path.join(self.folder.name, "5m", "EURUSD=X.csv"))
+        stats = DownloadPipeline(["EURUSD=X"], ["5m"], fetch=CsvProvider(lastRows=500), folderPath=self.folder.name,
+                                 derived={"15m": "5m"}).run()
+        self.assertEqual([], stats["errors"])
+        derived = ColumnarStore.readCsv(os.path.join(self.folder.name, "15m", "EURUSD=X.csv"))
+        expected = Resampler.resample(data, "15m")
+        pd.testing.assert_frame_equal(expected.loc[derived.index[-150]:], derived.loc[derived.index[-150]:],
+                                      check_freq=False)
+
+    def test_derived_bars_continue_yahoo_grid(self):
+        os.makedirs(os.path.join(self.folder.name, "90m"))
+        yahoo = ColumnarStore.readCsv("data/forex/90m/EURUSD=X.csv")
+        yahoo.iloc[:-10].to_csv(os.path.join(self.folder.name, "90m", "EURUSD=X.csv"))
+        stats = DownloadPipeline(["EURUSD=X"], ["5m"], fetch=CsvProvider(lastRows=500), folderPath=self.folder.name,
+                                 derived={"90m": "5m"}).run()
+        self.assertEqual([], stats["errors"])
+        derived = ColumnarStore.readCsv(os.path.join(self.folder.name, "90m", "EURUSD=X.csv"))
+        self.assertGreater(len(derived.index), len(yahoo.index) - 10)
+        minutes = derived.index.tz_convert("UTC").hour * 60 + derived.index.tz_convert("UTC").minute
+        self.assertTrue(np.all(minutes % 90 == 30))
+
+    def test_derived_interval_has_to_be_nested(self):
+        self.assertRaises(ValueError, DownloadPipeline, FOREX, ["1h"], derived={"1h": "1d"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex
+from stockPrice import Backtesting, Portfolio, Rolling
+
+FOREX = ["EURUSD=X", "GBPUSD=X", "AUDUSD=X", "USDJPY=X", "USDCHF=X", "USDCAD=X"]
+INDICATORS = ["Close_sma_20", "Close_sma_150", "Close_rsi"]
+
+
+class TestPortfolio(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.frames = {t: loadForex(t, "15m", INDICATORS) for t in FOREX}
+        cls.criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
+
+    def assertSameTrades(self, criteria: dict, **kwargs):
+        logs = Portfolio(self.frames, criteria).run(**kwargs)
+        self.assertEqual(FOREX, list(logs.keys()))
+        for ticker in FOREX:
+            with self.subTest(ticker=ticker):
+                expected = Backtesting.Strategy(self.frames[ticker], criteria).executeTrades(**kwargs)
+                self.assertEqual(expected, logs[ticker])
+
+    def test_same_trades_as_strategy_per_ticker(self):
+        self.assertSameTrades(self.criteria)
+        self.assertSameTrades(self.criteria, profitType='r')
+
+    def test_same_trades_with_window_sell_criteria(self):
+        criteria = {
+            "buyOn": pd.DataFrame({"statistic": ["Close", "Close_rsi"], "operation": [">", "<"],
+                                   "value": ["max_10", "70"]}),
+            "sellOn": pd.DataFrame({"statistic": ["Close", "High"], "operation": ["<", ">"],
+                                    "value": ["min_5", "TP_30"]})
+        }
+        self.assertSameTrades(criteria)
+
+    def test_same_trades_in_date_range(self):
+        self.assertSameTrades(self.criteria, startDate="2022-09-05", endDate="2022-09-30")
+
+    def test_aggregate_and_equity(self):
+        portfolio = Portfolio(self.frames, self.criteria)
+        logs = portfolio.run()
+        aggregate = Portfolio.aggregate(logs)
+        self.assertEqual(sum(len(log) for log in logs.values()), len(aggregate))
+        self.assertTrue(aggregate.exitDates.is_monotonic_increasing)
+        self.assertAlmostEqual(sum(log.totalProfit() for log in logs.values()), aggregate.totalProfit())
+
+        equity = portfolio.equity(logs)
+        self.assertEqual(FOREX + ["portfolio"], list(equity.columns))
+        self.assertAlmostEqual(aggregate.totalProfit(), equity["portfolio"].iat[-1])
+        self.assertEqual(FOREX + ["portfolio"], list(Portfolio.summary(logs).index))
+
+    def test_rolling_columns_are_independent(self):
+        values = np.column_stack([self.frames[t]["Close"].to_numpy()[:3000] for t in FOREX[:3]])
+        values[100:130, 1] = np.nan
+        for function in [Rolling.mean, Rolling.max, Rolling.min]:
+            rolled = function(values, 20)
+            for j in range(values.shape[1]):
+                np.testing.assert_allclose(function(values[:, j], 20), rolled[:, j], rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
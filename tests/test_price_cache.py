@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+import sqlalchemy
+
+from cache import ColumnarStore, PriceCache, Yahoo, priceCache
+from dataBase import StockPriceDb
+
+
+class TestPriceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PriceCache()
+        self.data = ColumnarStore.readCsv("data/forex/1h/EURUSD=X.csv")
+
+    def test_hit_and_miss(self):
+        self.assertIsNone(self.cache.get("csv", "EURUSD=X", "1h"))
+        self.cache.put("csv", "EURUSD=X", "1h", self.data)
+        pd.testing.assert_frame_equal(self.data, self.cache.get("csv", "EURUSD=X", "1h"))
+        self.assertIsNone(self.cache.get("db", "EURUSD=X", "1h"))
+        self.assertEqual(1, self.cache.stats["hits"])
+        self.assertEqual(2, self.cache.stats["misses"])
+        self.assertEqual(PriceCache.size(self.data), self.cache.stats["bytes"])
+
+    def test_load_calls_loader_once(self):
+        calls = []
+        loader = lambda: calls.append(1) or self.data
+        for _ in range(3):
+            self.cache.load("csv", "EURUSD=X", "1h", loader)
+        self.assertEqual(1, len(calls))
+
+    def test_other_version_is_miss(self):
+        self.cache.put("csv", "EURUSD=X", "1h", self.data, version=1)
+        self.assertIsNone(self.cache.get("csv", "EURUSD=X", "1h", version=2))
+        self.assertIsNotNone(self.cache.get("csv", "EURUSD=X", "1h", version=1))
+
+    def test_returned_series_does_not_change_cached(self):
+        self.cache.put("csv", "EURUSD=X", "1h", self.data)
+        cached = self.cache.get("csv", "EURUSD=X", "1h")
+        cached["Close_sma_20"] = 1.0
+        cached.loc[cached.index[0], "Close"] = 0.0
+        self.assertEqual(list(self.data.columns), list(self.cache.get("csv", "EURUSD=X", "1h").columns))
+        self.assertEqual(self.data["Close"].iloc[0], self.cache.get("csv", "EURUSD=X", "1h")["Close"].iloc[0])
+
+    def test_least_recently_used_are_evicted(self):
+        self.cache.maxBytes = int(2.5 * PriceCache.size(self.data))
+        for ticker in ["A", "B", "C"]:
+            self.cache.put("csv", ticker, "1h", self.data)
+            self.cache.get("csv", "A", "1h")
+        self.assertEqual(1, self.cache.stats["evictions"])
+        self.assertIsNone(self.cache.get("csv", "B", "1h"))
+        self.assertIsNotNone(self.cache.get("csv", "A", "1h"))
+        self.assertLessEqual(self.cache.stats["bytes"], self.cache.maxBytes)
+
+        self.cache.maxBytes = 10
+        self.cache.put("csv", "D", "1h", self.data)
+        self.assertIsNone(self.cache.get("csv", "D", "1h"))
+
+    def test_invalidate_all_sources(self):
+        self.cache.put("csv", "EURUSD=X", "1h", self.data)
+        self.cache.put("db", "EURUSD=X", "1h", self.data)
+        self.cache.put("db", "EURUSD=X", "5m", self.data)
+        self.cache.invalidate("EURUSD=X", "1h")
+        self.assertEqual(1, len(self.cache))
+        self.assertEqual(2, self.cache.stats["invalidations"])
+        self.assertEqual(PriceCache.size(self.data), self.cache.stats["bytes"])
+
+
+class TestPriceCacheLayers(unittest.TestCase):
+
+    def setUp(self):
+        priceCache.clear()
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        priceCache.clear()
+        self.folder.cleanup()
+
+    def test_yahoo_load_data(self):
+        yahoo = Yahoo("EURUSD=X", "15m")
+        yahoo.store = ColumnarStore(self.folder.name)
+        first = yahoo.loadData("EURUSD=X", startDate="2022-09-05")
+        second = yahoo.loadData("EURUSD=X", startDate="2022-09-05")
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual({"hits": 1, "misses": 1}, {k: priceCache.stats[k] for k in ["hits", "misses"]})
+
+    def test_append_invalidates(self):
+        os.mkdir(os.path.join(self.folder.name, "15m"))
+        filePath = os.path.join(self.folder.name, "15m", "EURUSD=X.csv")
+        shutil.copy("data/forex/15m/EURUSD=X.csv", filePath)
+        priceCache.put(os.path.abspath(filePath), "EURUSD=X", "15m", ColumnarStore.readCsv(filePath))
+        Yahoo("EURUSD=X", "15m").appendToExistingData(ColumnarStore.readCsv(filePath).iloc[-5:], filePath)
+        self.assertEqual(0, len(priceCache))
+
+    def test_db_find_and_save(self):
+        engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(self.folder.name, 'db.sqlite')}")
+        data = ColumnarStore.readCsv("data/forex/1h/EURUSD=X.csv")
+        db, cachedDb = StockPriceDb(engine), StockPriceDb(engine, useCache=True)
+        db.save(data.iloc[:-100], "EURUSD=X", "1h")
+
+        for startDate, endDate, columns in [(None, None, None), ("2022-09-05 10:00:00+02:00", "2022-09-07", None),
+                                            ("2022-09-05", None, ["Close", "Volume"])]:
+            pd.testing.assert_frame_equal(db.find("EURUSD=X", "1h", startDate, endDate, columns),
+                                          cachedDb.find("EURUSD=X", "1h", startDate, endDate, columns),
+                                          check_index_type=False)
+        self.assertTrue(cachedDb.find("EURUSD=X", "1h", "W-2", "W-0").empty)
+        self.assertEqual(3, priceCache.stats["hits"])
+
+        db.save(data, "EURUSD=X", "1h")
+        self.assertEqual(len(data.index), len(cachedDb.find("EURUSD=X", "1h").index))
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import ColumnarStore
+from stockPrice import Resampler, StockPrice
+
+AGGREGATIONS = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Adj Close": "last", "Volume": "sum"}
+
+
+class TestResampler(unittest.TestCase):
+
+    def setUp(self):
+        self.m1 = ColumnarStore.readCsv("data/forex/1m/EURUSD=X.csv")
+
+    def assertMatchesPandas(self, interval: str, rule: str, **kwargs):
+        expected = self.m1.resample(rule, **kwargs).agg(AGGREGATIONS).dropna(subset=["Open"])
+        resampled = Resampler.resample(self.m1, interval)
+        pd.testing.assert_frame_equal(expected[resampled.columns], resampled, check_freq=False)
+
+    def test_intraday_intervals_match_pandas(self):
+        for interval, rule in [("2m", "2min"), ("15m", "15min"), ("90m", "90min"), ("1h", "1h")]:
+            self.assertMatchesPandas(interval, rule)
+
+    def test_calendar_intervals_match_pandas(self):
+        self.assertMatchesPandas("1d", "1D")
+        self.assertMatchesPandas("1wk", "W-MON", label="left", closed="left")
+        self.assertMatchesPandas("1mo", "MS")
+
+    def test_buckets_follow_daylight_saving_time(self):
+        index = pd.date_range("2022-10-29 22:00", "2022-10-31 02:00", freq="1min", tz="UTC")
+        data = pd.DataFrame({"Open": np.arange(len(index), dtype=float), "Close": 1.0}, index=index)
+        hours = Resampler.resample(data, "1h")
+        self.assertTrue(hours.index.is_unique)
+        self.assertEqual(25, (hours.index.date == pd.Timestamp("2022-10-30").date()).sum())
+        self.assertEqual(["2022-10-30 00:00:00+02:00", "2022-10-31 00:00:00+01:00"],
+                         [str(d) for d in Resampler.resample(data, "1d").index])
+
+    def test_origin_matches_yahoo_buckets(self):
+        yahoo = ColumnarStore.readCsv("data/forex/90m/EURUSD=X.csv")
+        m5 = ColumnarStore.readCsv("data/forex/5m/EURUSD=X.csv")
+        resampled = Resampler.resample(m5, "90m", origin="30min")
+        self.assertTrue(resampled.index[1:-1].isin(yahoo.index).all())
+        self.assertFalse(Resampler.resample(m5, "90m").index.isin(yahoo.index).any())
+
+        index = pd.date_range("2022-10-29 22:00", "2022-10-31 02:00", freq="5min", tz="UTC")
+        starts = Resampler.bucketStarts(index, "90m", origin="30min")
+        self.assertTrue(np.all(starts // 60 // 10 ** 9 % 90 == 30))
+        self.assertRaises(ValueError, Resampler.bucketStarts, index, "1d", origin="30min")
+
+    def test_source_is_coarsest_nested_interval(self):
+        self.assertEqual("5m", Resampler.source("15m", Resampler.stored))
+        self.assertEqual("1h", Resampler.source("60m", Resampler.stored))
+        self.assertEqual("1m", Resampler.source("2m", Resampler.stored))
+        self.assertEqual("1d", Resampler.source("1wk", Resampler.stored))
+        self.assertFalse(Resampler.nests("1wk", "1mo"))
+        self.assertRaises(ValueError, Resampler.parseInterval, "7m")
+        self.assertRaises(ValueError, Resampler.source, "1m", ["5m"])
+
+    def test_update_is_incremental(self):
+        resampler = Resampler()
+        resampler.update("EURUSD=X", "15m", self.m1.iloc[:-100])
+        resampler.update("EURUSD=X", "15m", self.m1.iloc[:-100])
+        base = self.m1.copy()
+        base.iloc[-101, base.columns.get_loc("Close")] += 0.001
+        updated = resampler.update("EURUSD=X", "15m", base)
+        self.assertEqual({"hits": 1, "updates": 1, "misses": 1}, resampler.stats)
+        pd.testing.assert_frame_equal(Resampler.resample(base, "15m"), updated)
+
+    def test_changed_history_is_resampled_again(self):
+        resampler = Resampler()
+        resampler.update("EURUSD=X", "1h", self.m1.iloc[:-100])
+        resampler.update("EURUSD=X", "1h", self.m1.iloc[10:])
+        self.assertEqual(2, resampler.stats["misses"])
+
+    def test_load_resamples_only_not_stored_intervals(self):
+        loaded = []
+
+        def loader(ticker, interval):
+            loaded.append(interval)
+            return self.m1
+
+        resampler = Resampler(loader, stored=["1m"])
+        pd.testing.assert_frame_equal(self.m1, resampler.load("EURUSD=X", "1m"))
+        hours = resampler.load("EURUSD=X", "1h", "2022-10-03", "2022-10-04")
+        expected = StockPrice(Resampler.resample(self.m1, "1h")).applyDateRange("2022-10-03", "2022-10-04")
+        pd.testing.assert_frame_equal(expected, hours)
+        self.assertEqual(1, resampler.stats["misses"])
+        self.assertEqual(["1m", "1m"], loaded)
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from stockPrice import Rolling
+
+
+def legacy(inputCol: pd.Series, k: int, function) -> np.ndarray:
+    # list comprehension used by Strategy.average/maxLast/minLast before Rolling was introduced
+    return np.append(np.repeat(np.nan, k), [function(inputCol.iloc[i-k: i]) for i in range(k, len(inputCol))])
+
+
+class TestRolling(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        close = pd.read_csv("data/forex/15m/EURUSD=X.csv", index_col=[0])["Close"]
+        cls.close = close.reset_index(drop=True)
+        cls.withNan = cls.close.copy()
+        cls.withNan.iloc[[0, 5, 6, 7, 100, 101]] = np.nan
+
+    def test_mean_matches_legacy(self):
+        for k in [1, 20, 150]:
+            with self.subTest(k=k):
+                np.testing.assert_allclose(Rolling.mean(self.close.values, k), legacy(self.close, k, np.mean),
+                                           rtol=0, atol=1e-12)
+
+    def test_max_min_match_legacy_exactly(self):
+        for k in [1, 3, 20, 150]:
+            with self.subTest(k=k):
+                np.testing.assert_array_equal(Rolling.max(self.close.values, k), legacy(self.close, k, np.max))
+                np.testing.assert_array_equal(Rolling.min(self.close.values, k), legacy(self.close, k, np.min))
+
+    def test_nan_values_are_skipped(self):
+        np.testing.assert_allclose(Rolling.mean(self.withNan.values, 3), legacy(self.withNan, 3, np.mean),
+                                   rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(Rolling.max(self.withNan.values, 3), legacy(self.withNan, 3, np.max))
+        np.testing.assert_array_equal(Rolling.min(self.withNan.values, 3), legacy(self.withNan, 3, np.min))
+
+    def test_window_longer_than_input_is_all_nan(self):
+        values = self.close.values[:10]
+        for function in [Rolling.mean, Rolling.max, Rolling.min]:
+            with self.subTest(function=function.__name__):
+                output = function(values, 10)
+                self.assertEqual(10, output.shape[0])
+                self.assertTrue(np.isnan(output).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
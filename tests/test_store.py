@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cache import ColumnarStore
+
+
+class TestColumnarStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.store = ColumnarStore(self.folder.name)
+        self.csvPath = "data/forex/15m/EURUSD=X.csv"
+        self.csv = ColumnarStore.readCsv(self.csvPath)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_save_load_round_trip(self):
+        self.store.save(self.csv, "EURUSD=X", "15m", self.csvPath)
+        loaded = self.store.load("EURUSD=X", "15m")
+        pd.testing.assert_frame_equal(self.csv, loaded, check_index_type=False)
+        self.assertEqual(str(self.csv.index.tz), str(loaded.index.tz))
+        self.assertEqual(list(self.csv.columns), list(loaded.columns))
+
+    def test_load_date_range_matches_loc(self):
+        self.store.save(self.csv, "EURUSD=X", "15m")
+        start, end = "2022-09-05 10:00:00+02:00", "2022-09-07"
+        expected = self.csv.loc[pd.to_datetime(start, utc=True):pd.to_datetime(end, utc=True), :]
+        loaded = self.store.load("EURUSD=X", "15m", start, end)
+        pd.testing.assert_frame_equal(expected, loaded, check_index_type=False)
+
+    def test_load_is_memory_mapped(self):
+        self.store.save(self.csv, "EURUSD=X", "15m")
+        loaded = self.store.load("EURUSD=X", "15m", columns=["Close"])
+        self.assertEqual(["Close"], list(loaded.columns))
+        values = loaded["Close"].to_numpy()
+        while values.base is not None and not isinstance(values, np.memmap):
+            values = values.base
+        self.assertIsInstance(values, np.memmap)
+
+    def test_loaded_data_is_writable(self):
+        self.store.save(self.csv, "EURUSD=X", "15m")
+        loaded = self.store.load("EURUSD=X", "15m")
+        loaded.iloc[0, 0] = 1.0
+        loaded.loc[loaded.index[:10], "Close"] = 2.0
+        self.assertEqual(1.0, loaded.iloc[0, 0])
+        pd.testing.assert_frame_equal(self.csv, self.store.load("EURUSD=X", "15m"), check_freq=False)
+
+    def test_boolean_and_text_columns(self):
+        flagged = self.csv.assign(Flag=self.csv["Close"] > self.csv["Open"])
+        self.store.save(flagged, "EURUSD=X", "15m")
+        loaded = self.store.load("EURUSD=X", "15m")["Flag"].to_numpy()
+        self.assertEqual(np.bool_, loaded.dtype)
+        np.testing.assert_array_equal(flagged["Flag"].to_numpy(), loaded)
+        with self.assertRaises(ValueError):
+            self.store.save(self.csv.assign(Ticker="EURUSD=X"), "EURUSD=X", "15m")
+
+    def test_is_fresh_follows_source_modification(self):
+        source = os.path.join(self.folder.name, "source.csv")
+        self.csv.to_csv(source)
+        self.assertFalse(self.store.isFresh("EURUSD=X", "15m", source))
+        self.store.save(self.csv, "EURUSD=X", "15m", source)
+        self.assertTrue(self.store.isFresh("EURUSD=X", "15m", source))
+        os.utime(source, (0, os.path.getmtime(source) + 1))
+        self.assertFalse(self.store.isFresh("EURUSD=X", "15m", source))
+        self.store.save(self.csv, "EURUSD=X", "15m", source)
+        os.remove(source)
+        self.assertFalse(self.store.isFresh("EURUSD=X", "15m", source))
+
+    def test_migrate_csv_tree(self):
+        csvFolder = os.path.join(self.folder.name, "forex")
+        os.makedirs(os.path.join(csvFolder, "1h"))
+        for ticker in ["EURUSD=X", "GBPUSD=X"]:
+            ColumnarStore.readCsv(f"data/forex/1h/{ticker}.csv").to_csv(os.path.join(csvFolder, "1h", f"{ticker}.csv"))
+
+        self.assertEqual([("1h", "EURUSD=X"), ("1h", "GBPUSD=X")], self.store.migrate(csvFolder))
+        self.assertEqual(len(ColumnarStore.readCsv("data/forex/1h/GBPUSD=X.csv").index),
+                         len(self.store.load("GBPUSD=X", "1h").index))
+
+    def test_load_missing_partition(self):
+        with self.assertRaises(FileNotFoundError):
+            self.store.load("EURUSD=X", "1m")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from stockPrice.StreamingIndicators import IndicatorState
+from stockPrice import Indicators, StreamingIndicators, StreamingBacktest, Strategy, StrategyUtils
+
+SPECS = ["Close_sma_20", "Close_ema_10", "Close_rsi", "Close_MACD_12_26", {"indicator": "bollinger"},
+         "Close_max_20", "Close_min_50", {"indicator": "sma", "column": "Open", "length": 150}]
+
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = pd.read_csv("data/forex/15m/EURUSD=X.csv", index_col=[0])
+        cls.data.index = pd.to_datetime(cls.data.index, utc=True).tz_convert("Europe/Warsaw")
+        cls.withNan = cls.data.copy()
+        cls.withNan.iloc[[0, 30, 31, 2000], cls.withNan.columns.get_loc("Close")] = np.nan
+
+    def replay(self, streaming: StreamingIndicators, data: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame([streaming.update(bar) for _, bar in data.iterrows()], index=data.index)
+
+    def assertMatchesBatch(self, data: pd.DataFrame, streamed: pd.DataFrame):
+        batch = Indicators(data).compute(SPECS).getSP().loc[streamed.index, streamed.columns]
+        pd.testing.assert_frame_equal(batch, streamed, check_exact=False, rtol=1e-7, atol=1e-10, check_freq=False)
+
+    def test_update_matches_batch(self):
+        for data in [self.data, self.withNan]:
+            streaming = StreamingIndicators(SPECS)
+            streamed = self.replay(streaming, data)
+            self.assertEqual(streaming.names, list(streamed.columns))
+            self.assertMatchesBatch(data, streamed)
+
+    def test_seed_then_update_matches_batch(self):
+        for data in [self.data, self.withNan]:
+            streaming = StreamingIndicators(SPECS).seed(data.iloc[:3000])
+            self.assertMatchesBatch(data, self.replay(streaming, data.iloc[3000:]))
+
+    def test_restored_state_resumes(self):
+        streaming = StreamingIndicators(SPECS).seed(self.withNan.iloc[:1000])
+        self.replay(streaming, self.withNan.iloc[1000:1010])
+        restored = StreamingIndicators.fromJson(streaming.toJson())
+        self.assertMatchesBatch(self.withNan, self.replay(restored, self.withNan.iloc[1010:]))
+
+    def test_incomplete_state_cannot_be_created(self):
+        class NoSeedState(IndicatorState):
+            names = ["value"]
+
+            def update(self, value: float) -> tuple:
+                return value,
+
+        with self.assertRaises(TypeError):
+            NoSeedState()
+
+
+class TestStreamingBacktest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.criteria = StrategyUtils.loadCriteria("newHighAfterReversal")
+        cls.filePath = "data/forex/5m/EURUSD=X.csv"
+        cls.data = pd.read_csv(cls.filePath, index_col=[0])
+        cls.data.index = pd.to_datetime(cls.data.index, utc=True).tz_convert("Europe/Warsaw")
+        cls.expected = Strategy(Indicators(cls.data).compute(["Close_sma_20", "Close_sma_150", "Close_rsi"]).getSP(),
+                                cls.criteria).executeTrades()
+
+    def assertSameTrades(self, expected: list, trades: list):
+        self.assertEqual([(t.entryDate, t.exitDate, t.profit) for t in expected],
+                         [(t.entryDate, t.exitDate, t.profit) for t in trades])
+
+    def test_replay_matches_execute_trades(self):
+        backtest = StreamingBacktest(self.criteria)
+        trades = list(backtest.run(StreamingBacktest.frameBars(self.data)))
+        self.assertSameTrades(self.expected, trades)
+        self.assertEqual(len(self.data.index), backtest.stats["bars"])
+
+    def test_csv_bars_in_chunks(self):
+        trades = list(StreamingBacktest(self.criteria).run(StreamingBacktest.csvBars(self.filePath, chunkSize=500)))
+        self.assertSameTrades(self.expected, trades)
+
+    def test_trades_are_yielded_when_closed(self):
+        backtest = StreamingBacktest(self.criteria)
+        bars = StreamingBacktest.frameBars(self.data)
+        for date, bar in bars:
+            if trades := backtest.update(date, bar):
+                break
+        self.assertEqual(self.expected[0].exitDate, trades[0].exitDate)
+        # exit candle is evaluated when the next one arrives
+        self.assertEqual(backtest.position - 2, self.data.index.get_loc(trades[0].exitDate))
+
+    def test_seeded_backtest(self):
+        start = 3000
+        backtest = StreamingBacktest(self.criteria).seed(self.data.iloc[:start])
+        trades = list(backtest.run(StreamingBacktest.frameBars(self.data.iloc[start:])))
+        self.assertTrue(trades)
+        self.assertTrue(all(t.entryDate >= self.data.index[start] for t in trades))
+
+
+if __name__ == '__main__':
+    unittest.main()
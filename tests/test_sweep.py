@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex
+from stockPrice import Backtesting, Indicators, Sweep
+
+
+class TestSweep(unittest.TestCase):
+
+    grid = {"fast": [20], "slow": [100, 150], "window": [20], "stopLoss": [40], "takeProfit": [20, 30]}
+
+    def test_summary_columns_and_size(self):
+        summary = Sweep(Sweep.loadTemplate("newHighAfterReversal"), self.grid, ["EURUSD=X", "GBPUSD=X"], "1h",
+                        loader=loadForex, workers=1).summary()
+        self.assertEqual(8, len(summary.index))
+        self.assertEqual(["ticker", "interval", "fast", "slow", "window", "stopLoss", "takeProfit",
+                          "totalProfit", "tradeCount", "winRate", "maxDrawdown", "seconds"], list(summary.columns))
+
+    def test_same_results_as_strategy(self):
+        summary = Sweep(Sweep.loadTemplate("newHighAfterReversal"), self.grid, "EURUSD=X", "30m",
+                        loader=loadForex, workers=2).summary()
+        row = summary[(summary["slow"] == 150) & (summary["takeProfit"] == 20)].iloc[0]
+
+        stockPrice = Indicators(loadForex("EURUSD=X", "30m")).addSMA('Close', length=20).addSMA('Close', length=150)\
+            .addRSI().getSP()
+        trades = Backtesting.Strategy(stockPrice, Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal"))\
+            .executeTrades()
+        self.assertEqual(len(trades), row["tradeCount"])
+        self.assertAlmostEqual(sum([t.profit for t in trades]), row["totalProfit"])
+
+    def test_workers_give_same_results(self):
+        template = Sweep.loadTemplate("newHighAfterReversal")
+        sequential = Sweep(template, self.grid, "EURUSD=X", "1h", loader=loadForex, workers=1).summary()
+        parallel = Sweep(template, self.grid, "EURUSD=X", "1h", loader=loadForex, workers=2).summary()
+        pd.testing.assert_frame_equal(sequential.drop(columns=["seconds"]), parallel.drop(columns=["seconds"]))
+
+    def test_max_drawdown(self):
+        self.assertEqual(0.0, Sweep.maxDrawdown(np.array([])))
+        self.assertAlmostEqual(0.005, Sweep.maxDrawdown(np.array([0.002, -0.003, -0.002, 0.004, -0.001])))
+        self.assertAlmostEqual(0.002, Sweep.maxDrawdown(np.array([-0.002, 0.001])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import loadForex
+from stockPrice import Backtesting, Trade, TradeLog
+
+INDICATORS = ["Close_sma_20", "Close_sma_150", "Close_rsi"]
+
+
+class TestTrade(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = loadForex("EURUSD=X", "1h", INDICATORS)
+        cls.criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
+
+    def test_log_trades_match_single_trades(self):
+        for profitType in ['r', 't']:
+            with self.subTest(profitType=profitType):
+                log = Backtesting.Strategy(self.data, self.criteria).executeTrades(profitType=profitType)
+                self.assertTrue(len(log))
+                for t in log:
+                    expected = Trade(t.entryDate, t.exitDate, self.data, profitType, t.takeProfit, t.stopLoss)
+                    self.assertEqual((expected.entryIdx, expected.exitIdx, expected.entryPrice, expected.exitPrice,
+                                      expected.profit, expected.duration),
+                                     (t.entryIdx, t.exitIdx, t.entryPrice, t.exitPrice, t.profit, t.duration))
+
+    def test_log_equals_its_trades(self):
+        log = Backtesting.Strategy(self.data, self.criteria).executeTrades()
+        self.assertGreater(len(log), 1)
+        self.assertEqual(log, list(log))
+        self.assertNotEqual(log, list(log)[1:])
+
+    def test_stock_price_during_trade_is_materialized_on_demand(self):
+        trade = Backtesting.Strategy(self.data, self.criteria).executeTrades()[0]
+        expected = self.data.loc[trade.entryDate:trade.exitDate, ["Open", "High", "Low", "Close"]]
+        self.assertTrue(expected.equals(trade.stockPriceDuringTrade))
+        self.assertFalse(hasattr(trade, "__dict__"))
+
+    def test_string_dates(self):
+        data = self.data.tz_localize(None)
+        dates = data.index[[10, 15]].strftime("%Y-%m-%d %H:%M:%S")
+        trade = Trade(dates[0], dates[1], data)
+        self.assertEqual((10, 15), (trade.entryIdx, trade.exitIdx))
+        self.assertEqual(pd.Timedelta(hours=5), trade.duration)
+
+
+class TestTradeLog(unittest.TestCase):
+
+    def setUp(self):
+        index = pd.date_range("2023-01-02", periods=8, freq="h", tz="Europe/Warsaw")
+        self.data = pd.DataFrame({"Open": [1.0, 1.1, 1.2, 1.0, 0.9, 1.3, 1.1, 1.0],
+                                  "High": [1.2, 1.2, 1.5, 1.1, 1.0, 1.6, 1.2, 1.1],
+                                  "Low": [0.9] * 8,
+                                  "Close": [1.1, 1.2, 1.4, 1.0, 0.95, 1.5, 1.1, 1.05]}, index=index)
+        self.log = TradeLog.fromPositions(self.data, [0, 3, 5], [2, 4, 7], 'r')
+
+    def test_aggregates(self):
+        np.testing.assert_allclose([0.4, -0.1, -0.5], self.log.profits)
+        self.assertAlmostEqual(-0.2, self.log.totalProfit())
+        self.assertAlmostEqual(1 / 3, self.log.winRate())
+        self.assertAlmostEqual(-0.2 / 3, self.log.expectancy())
+        self.assertAlmostEqual(0.6, self.log.maxDrawdown())
+        self.assertEqual(["totalProfit", "tradeCount", "winRate", "expectancy", "maxDrawdown"],
+                         list(self.log.summary().keys()))
+
+    def test_dates_and_durations(self):
+        self.assertTrue(self.data.index[[0, 3, 5]].equals(self.log.entryDates))
+        self.assertTrue(self.data.index[[2, 4, 7]].equals(self.log.exitDates))
+        self.assertEqual([pd.Timedelta(hours=h) for h in [2, 1, 2]], list(self.log.durations))
+        self.assertEqual(self.data.index[5], self.log[-1].entryDate)
+
+    def test_from_trades_round_trip(self):
+        log = TradeLog.fromTrades(list(self.log))
+        self.assertEqual(self.log, log)
+        self.assertEqual(2, len(log[1:]))
+        self.assertEqual([], TradeLog())
+
+    def test_equal_to_list_of_trades(self):
+        trades = list(self.log)
+        self.assertEqual(self.log, trades)
+        self.assertEqual(self.log, tuple(trades))
+        self.assertNotEqual(self.log, trades[:-1])
+        self.assertNotEqual(self.log, trades[::-1])
+        self.assertNotEqual(self.log, [1, 2, 3])
+        self.assertNotEqual(TradeLog.fromPositions(self.data, [0, 3, 5], [2, 4, 6], 'r'), trades)
+        with self.assertRaises(TypeError):
+            hash(self.log)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import pandas as pd
+
+from benchmarks import loadForex
+from stockPrice import Backtesting, WalkForward
+
+
+class TestWalkForward(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = loadForex("EURUSD=X", "5m")
+        cls.criteria = Backtesting.StrategyUtils.loadCriteria("newHighAfterReversal")
+
+    def test_span_notation(self):
+        self.assertEqual(pd.DateOffset(weeks=4), WalkForward.span("W-4"))
+        self.assertEqual(pd.DateOffset(years=1), WalkForward.span("Y-1"))
+        self.assertEqual(pd.DateOffset(hours=12), WalkForward.span("H-12"))
+        for notation in ["W-0", "D-1", "W4"]:
+            with self.assertRaises(ValueError):
+                WalkForward.span(notation)
+
+    def test_folds_are_complete_windows(self):
+        walkForward = WalkForward(self.data, self.criteria, "W-2", "W-1")
+        folds = walkForward.folds()
+        self.assertTrue(folds)
+        for lo, hi, startDate, endDate in folds:
+            self.assertEqual(pd.Timedelta(weeks=2), endDate - startDate)
+            dates = walkForward.stockPrice.index[lo:hi]
+            self.assertTrue(dates[0] >= startDate and dates[-1] < endDate)
+        self.assertEqual([pd.Timedelta(weeks=1)] * (len(folds) - 1),
+                         [b[2] - a[2] for a, b in zip(folds, folds[1:])])
+
+    def test_folds_match_strategy_on_window(self):
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                walkForward = WalkForward(self.data, self.criteria, "W-2", "W-1", workers=workers,
+                                          indicators=["Close_sma_20", "Close_sma_150", "Close_rsi"])
+                summary = walkForward.summary()
+                self.assertEqual(list(range(len(walkForward.folds()))), list(summary["fold"]))
+                for fold, (lo, hi, _, _) in enumerate(walkForward.folds()):
+                    expected = Backtesting.Strategy(walkForward.stockPrice.iloc[lo:hi], self.criteria)\
+                        .executeTrades()
+                    self.assertEqual(expected, walkForward.logs[fold])
+                    self.assertAlmostEqual(expected.totalProfit(), summary.at[fold, "totalProfit"])
+
+    def test_missing_indicators_are_added(self):
+        walkForward = WalkForward(self.data, self.criteria, "W-4", "W-2", workers=1)
+        self.assertIn("Close_sma_150", walkForward.stockPrice.columns)
+        self.assertIn("seconds", walkForward.summary().columns)
+        self.assertEqual({"indicators", "signals", "folds"}, set(walkForward.stats.keys()))
+
+    def test_unknown_kwargs(self):
+        with self.assertRaises(UserWarning):
+            WalkForward(self.data, self.criteria, "W-2", "W-1", chunkSize=10)
+
+
+if __name__ == '__main__':
+    unittest.main()